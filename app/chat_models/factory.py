@@ -1,27 +1,42 @@
 from langchain_core.language_models.chat_models import BaseChatModel
+# cada get_* importa la librería de su proveedor (langchain_groq, langchain_google_genai,
+# langchain_ollama) en el primer uso: no pesa en el arranque de la API
 from app.chat_models.groq import get_groq
 from app.chat_models.gemini import get_gemini
 from app.chat_models.ollama import get_ollama_instance
+from app.chat_models.pool import get_chat_model_pool
 from app.config.config import get_settings
 settings = get_settings()
 import logging
 logger = logging.getLogger(__name__)
 
+def get_model_config(chat_model: str) -> tuple:
+    # parámetros que distinguen a dos clientes del mismo proveedor dentro del pool
+    if chat_model == "ollama":
+        return (settings.ollama_base_url, settings.ollama_model)
+    elif chat_model == "gemini":
+        return (settings.google_model,)
+    elif chat_model == "groq":
+        return (settings.groq_model,)
+    return ()
+
 def get_chat_model(chat_model: str = "ollama", user_api_key: str | None = None) -> BaseChatModel | None:
+    pool = get_chat_model_pool()
+
     if chat_model == "ollama":
         if settings.enable_ollama:
-            return get_ollama_instance()
+            return pool.get(chat_model, None, get_model_config(chat_model), get_ollama_instance)
         else:
             logger.warning("Ollama sólo está habilitado localmente.")
             return None
 
     elif chat_model == "gemini":
-        gemini = get_gemini(user_api_key)
+        gemini = pool.get(chat_model, user_api_key, get_model_config(chat_model), lambda: get_gemini(user_api_key))
         if gemini is not None:
             return gemini
     
     elif chat_model == "groq":
-        groq = get_groq(user_api_key)
+        groq = pool.get(chat_model, user_api_key, get_model_config(chat_model), lambda: get_groq(user_api_key))
         if groq is not None:
             return groq
 
@@ -1,17 +1,17 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-
 import logging
+from langchain_core.language_models.chat_models import BaseChatModel
 from app.config.config import get_settings
 settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
-def get_gemini(user_api_key: str | None = None) -> ChatGoogleGenerativeAI | None:
+def get_gemini(user_api_key: str | None = None) -> BaseChatModel | None:
     api_key = user_api_key or settings.google_api_key
     if not api_key:
         logger.warning("No se proporcionó API Key para Google Gemini.")
         return None
 
+    from langchain_google_genai import ChatGoogleGenerativeAI
     return ChatGoogleGenerativeAI(
         model=settings.google_model,
         api_key=api_key
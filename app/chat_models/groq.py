@@ -1,20 +1,24 @@
-from langchain_groq import ChatGroq
-
 import logging
+from langchain_core.language_models.chat_models import BaseChatModel
 from app.config.config import get_settings
+from app.chat_models.pool import get_shared_http_clients
 settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
-def get_groq(user_api_key: str | None = None) -> ChatGroq | None:
+def get_groq(user_api_key: str | None = None) -> BaseChatModel | None:
     api_key = user_api_key or settings.groq_api_key
     if not api_key:
         logger.warning("No se proporcionó API Key para Groq.")
         return None
 
+    from langchain_groq import ChatGroq
+    http_client, http_async_client = get_shared_http_clients()
     return ChatGroq(
         api_key=api_key,
         model=settings.groq_model,
         temperature=0.1,
-        max_tokens=1024
+        max_tokens=1024,
+        http_client=http_client,
+        http_async_client=http_async_client
     )
\ No newline at end of file
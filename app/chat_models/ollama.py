@@ -1,13 +1,67 @@
-from langchain_ollama import ChatOllama
+from functools import lru_cache
+from threading import Lock
+import asyncio
+import logging
+import time
+from langchain_core.language_models.chat_models import BaseChatModel
 from app.config.config import get_settings
 settings = get_settings()
 
+logger = logging.getLogger(__name__)
+
+class OllamaSession:
+    def __init__(self):
+        self._lock = Lock()
+        self._validated = False
+        self._limiter: asyncio.Semaphore | None = None
+
+    def get_model(self) -> BaseChatModel:
+        from langchain_ollama import ChatOllama
+        with self._lock:
+            model = ChatOllama(
+                base_url=settings.ollama_base_url,
+                model=settings.ollama_model,
+                # el modelo se valida contra el servidor una sola vez por proceso
+                validate_model_on_init=not self._validated,
+                keep_alive=settings.ollama_keep_alive, # mantiene el modelo cargado entre requests
+                temperature=0.2, # subirlo lo hace mas creativo
+                # seed=77, # setear una seed hace que las respuestas sean reproducibles
+                num_predict=256
+            )
+            self._validated = True
+        return model
+
+    @property
+    def limiter(self) -> asyncio.Semaphore:
+        # tantas generaciones concurrentes como slots paralelos tenga el servidor (OLLAMA_NUM_PARALLEL)
+        if self._limiter is None:
+            self._limiter = asyncio.Semaphore(settings.ollama_num_parallel)
+        return self._limiter
+
+    async def apreload(self) -> bool:
+        # un generate sin prompt carga el modelo en memoria sin generar tokens
+        logger.info(f"Precargando modelo Ollama: {settings.ollama_model}")
+        start = time.perf_counter()
+        try:
+            from ollama import AsyncClient
+            client = AsyncClient(host=settings.ollama_base_url)
+            await client.generate(
+                model=settings.ollama_model,
+                prompt="",
+                keep_alive=settings.ollama_keep_alive
+            )
+        except Exception as e:
+            logger.warning(f"No se pudo precargar el modelo Ollama: {e}")
+            return False
+
+        with self._lock:
+            self._validated = True
+        logger.info(f"Modelo Ollama precargado en {time.perf_counter() - start:.2f}s.")
+        return True
+
+@lru_cache()
+def get_ollama_session() -> OllamaSession:
+    return OllamaSession()
+
 def get_ollama_instance():
-    return ChatOllama(
-        base_url=settings.ollama_base_url,
-        model=settings.ollama_model,
-        validate_model_on_init=True,
-        temperature=0.2, # subirlo lo hace mas creativo
-        # seed=77, # setear una seed hace que las respuestas sean reproducibles
-        num_predict=256
-    )
\ No newline at end of file
+    return get_ollama_session().get_model()
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import sha256
+from threading import Lock
+from typing import Callable, Hashable
+import logging
+import time
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from app.config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+@lru_cache()
+def get_shared_http_clients() -> tuple[httpx.Client, httpx.AsyncClient]:
+    # un único pool de conexiones (keep-alive + TLS reutilizado) compartido por los clientes de Groq.
+    # ChatGoogleGenerativeAI no acepta un cliente httpx propio: arma su genai.Client al validar
+    # y pasa los mismos client_args al cliente sync y al async, así que cada instancia de Gemini
+    # del pool mantiene su propio transporte hasta que se desaloja
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections
+    )
+    return httpx.Client(limits=limits), httpx.AsyncClient(limits=limits)
+
+def hash_api_key(api_key: str | None) -> str:
+    # la key nunca queda en memoria como parte de la clave del cache
+    if not api_key:
+        return ""
+    return sha256(api_key.encode("utf-8")).hexdigest()
+
+class ChatModelPool:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[BaseChatModel, float]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        provider: str,
+        api_key: str | None,
+        model_config: tuple,
+        builder: Callable[[], BaseChatModel | None]
+    ) -> BaseChatModel | None:
+        key = (provider, hash_api_key(api_key), model_config)
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], now)
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # la construcción queda fuera del lock: puede validar contra el proveedor
+        model = builder()
+        if model is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # otro request lo construyó en paralelo: se conserva el primero
+                model = entry[0]
+            self._entries[key] = (model, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return model
+
+    def _evict_expired(self, now: float):
+        expired = [
+            key for key, (_, last_used) in self._entries.items()
+            if now - last_used > self.ttl_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            logger.info(f"Clientes de chat expirados por inactividad: {len(expired)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+@lru_cache()
+def get_chat_model_pool() -> ChatModelPool:
+    settings = get_settings()
+    return ChatModelPool(
+        max_size=settings.chat_model_pool_size,
+        ttl_seconds=settings.chat_model_pool_ttl
+    )
@@ -10,6 +10,9 @@ class Settings(BaseSettings):
     ollama_base_url : str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     ollama_model : str = os.getenv("OLLAMA_MODEL", "llama2")
     enable_ollama : bool = os.getenv("ENABLE_OLLAMA", "false").lower() == "true"
+    ollama_keep_alive : str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    ollama_num_parallel : int = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+    ollama_preload : bool = os.getenv("OLLAMA_PRELOAD", "true").lower() == "true"
     
     groq_model : str = os.getenv("GROQ_MODEL", "qwen/qwen3-32b")
     google_model : str = os.getenv("GOOGLE_MODEL", "gemini-2.5-flash-lite")
@@ -20,19 +23,66 @@ class Settings(BaseSettings):
     
     chunk_size: int = 400
     chunk_overlap: int = 200
+    incremental_ingestion: bool = True # sólo embebe chunks nuevos y elimina los que ya no existen
+    ingestion_batch_size: int = 256 # chunks que se embeben y agregan al índice por lote
+    ingestion_prefetch_batches: int = 2 # lotes que la carga puede adelantarse a los embeddings
     
     hugging_face_embeddings_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_warmup: bool = True # carga el modelo y hace un encode de prueba al iniciar la API
     gemini_embeddings_model_name: str = "models/gemini-embedding-001"
+    embedding_batch_size: int = 64 # textos por lote al embeber chunks en la ingesta
+    embedding_workers: int = 0 # procesos para embeber con HuggingFace en la ingesta (0 = núcleos, 1 = en proceso)
+    gemini_embedding_batch_size: int = 100 # textos por request (máximo de la API)
+    gemini_embedding_concurrency: int = 4 # requests simultáneos (se reduce solo ante 429)
+    gemini_embedding_max_retries: int = 6 # reintentos con backoff ante 429/5xx
 
     persist_path_huggingface: Path = BASE_DIR / "vector_store/huggingface"
     persist_path_gemini: Path = BASE_DIR / "vector_store/gemini"
+
+    embedding_cache_enabled: bool = True # reutiliza embeddings de chunks sin cambios entre ingestas
+    embedding_cache_path: Path = BASE_DIR / ".cache/embeddings"
+    vector_store_mmap: bool = True # la API mapea el índice FAISS de sólo lectura (compartido entre workers)
+    docstore_backend: str = "sqlite" # "sqlite": la API lee los chunks bajo demanda, sin pickle | "pickle"
+    docstore_cache_size: int = 1024 # chunks más consultados que se mantienen en memoria
+
+    vector_index_type: str = "auto" # "flat" (exacto) | "ivf_flat" | "hnsw" | "ivf_pq" | "auto" (según la cantidad de chunks)
+    vector_index_auto_flat_max: int = 20_000 # auto: búsqueda exacta por debajo de esta cantidad de chunks
+    vector_index_auto_hnsw_max: int = 1_000_000 # auto: HNSW por debajo de esta cantidad, IVF-PQ por encima
+    vector_index_nlist: int = 0 # listas de IVF (0 = 4·√chunks)
+    vector_index_nprobe: int = 16 # listas de IVF revisadas por búsqueda (recall vs latencia)
+    vector_index_hnsw_m: int = 32 # vecinos por nodo de HNSW
+    vector_index_ef_construction: int = 200
+    vector_index_ef_search: int = 64 # candidatos de HNSW por búsqueda (mayor o igual a mmr_fetch_k)
+    vector_index_pq_m: int = 0 # subcuantizadores de IVF-PQ (0 = dimensión / 4)
+    vector_index_train_size: int = 100_000 # vectores de muestra para entrenar IVF
     
     urls: List[str] = [
         "https://hermanos-jota-flame.vercel.app/",
         "https://hermanos-jota-flame.vercel.app/productos",
         "https://hermanos-jota-flame.vercel.app/contacto"
     ]
+    web_crawl: bool = True # las urls son semillas: se siguen los enlaces del mismo sitio (y su sitemap)
+    web_crawl_max_depth: int = 2
+    web_crawl_max_pages: int = 200
+    web_crawl_time_budget: float = 300.0 # segundos; al agotarse se indexa lo descargado hasta el momento
+    web_crawl_use_sitemap: bool = True
+    web_rate_limit_per_host: float = 4.0 # requests por segundo a un mismo host (0 = sin límite)
+    web_http_first: bool = True # intenta cada URL por HTTP antes de abrir un navegador
+    web_js_rendered_urls: List[str] = [] # URLs que siempre se cargan con Selenium
+    web_min_text_chars: int = 200 # menos texto visible => la página se considera renderizada con JS
+    web_http_max_concurrency: int = 16
+    web_http_timeout: float = 15.0 # segundos
+    web_snapshot_cache_enabled: bool = True # guarda cada página descargada (HTML comprimido + texto extraído)
+    web_snapshot_cache_path: Path = BASE_DIR / ".cache/web"
+    web_snapshot_max_age: int = 6 * 3600 # segundos en que un snapshot se reutiliza sin volver a descargar
+    web_offline: bool = False # usa sólo snapshots, sin red (reindexado reproducible)
+    web_max_drivers: int = 4 # navegadores headless en paralelo para el scraping
+    web_max_memory_mb: int = 1500 # tope de memoria del pool de navegadores (~350 MB c/u)
     file_path: Path = BASE_DIR / "corpus"
+    pdf_extraction_workers: int = 0 # procesos para extraer PDFs (0 = núcleos disponibles, 1 = secuencial)
+    pdf_pages_per_task: int = 50 # PDFs con más páginas se dividen por rango entre procesos
+    extraction_cache_enabled: bool = True # reutiliza el texto de PDFs sin cambios entre ingestas
+    extraction_cache_path: Path = BASE_DIR / ".cache/extraction"
 
     mmr_k: int = 10 # chunks a devolver
     mmr_fetch_k: int = 50 # chunks candidatos
@@ -40,7 +90,26 @@ class Settings(BaseSettings):
 
     max_context_length: int = 4000
 
+    retrieval_max_workers: int = 4 # hilos para el trabajo CPU-bound (embeddings + FAISS) del path async
+
+    retrieval_cache_enabled: bool = True
+    retrieval_cache_max_size: int = 2048 # consultas distintas recordadas (sólo IDs de documentos)
+
+    query_embedding_cache_enabled: bool = True
+    query_embedding_cache_max_bytes: int = 32 * 1024 * 1024 # memoria máxima del cache de embeddings de consultas
+
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.95 # similitud coseno mínima para reutilizar una respuesta
+    semantic_cache_max_size: int = 1000
+    semantic_cache_ttl: int = 3600 # segundos
+
+    chat_model_pool_size: int = 32 # clientes de chat reutilizables (LRU)
+    chat_model_pool_ttl: int = 900 # segundos de inactividad antes de descartar un cliente
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+
     port: int = 8000
+    langserve_enabled: bool = True # expone /rag con LangServe (un servidor sin /rag no importa langserve)
 
     model_config = SettingsConfigDict(
         env_file = ".env"
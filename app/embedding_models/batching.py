@@ -0,0 +1,144 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, List
+import logging
+import math
+import multiprocessing
+import os
+import time
+from langchain_core.embeddings import Embeddings
+from app.embedding_models.cache import is_gemini, is_hugging_face
+from app.embedding_models.disk_cache import DiskEmbeddingCache
+from app.embedding_models.gemini_batch import GeminiBatchEmbeddings
+
+logger = logging.getLogger(__name__)
+
+# modelo cargado en cada proceso del pool
+_worker_embeddings: Embeddings | None = None
+
+def _init_worker(factory: Callable[[], Embeddings], threads: int):
+    # cada proceso usa su parte de los núcleos para no sobresuscribir la CPU
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    global _worker_embeddings
+    _worker_embeddings = factory()
+
+def _embed_in_worker(texts: List[str]) -> List[List[float]]:
+    return _worker_embeddings.embed_documents(texts)
+
+class BatchedEmbeddings(Embeddings):
+    # embeddings de ingesta: textos agrupados por longitud (menos padding por lote) y,
+    # con workers > 1, repartidos entre procesos que cargan cada uno su copia del modelo;
+    # con menos de workers * batch_size textos (p. ej. pocos chunks cambiados) no compensa
+    # levantar el pool y se embeben en proceso
+    def __init__(
+        self,
+        underlying: Embeddings,
+        batch_size: int,
+        workers: int = 1,
+        worker_factory: Callable[[], Embeddings] | None = None
+    ):
+        self.underlying = underlying
+        self.batch_size = max(1, batch_size)
+        self.workers = workers if worker_factory is not None else 1
+        self.worker_factory = worker_factory
+        self._pool: ProcessPoolExecutor | None = None
+        self.embedded = 0
+        self.seconds = 0.0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            logger.info(f"Iniciando {self.workers} procesos de embeddings ({threads} hilos c/u)...")
+            # spawn: torch no es seguro tras un fork con hilos activos
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.worker_factory, threads)
+            )
+        return self._pool
+
+    def _use_pool(self, count: int) -> bool:
+        return self.workers > 1 and count >= self.workers * self.batch_size
+
+    def _buckets(self, texts: List[str], use_pool: bool = False) -> List[List[int]]:
+        # índices ordenados por longitud y cortados en lotes: cada lote tiene textos parecidos;
+        # con varios procesos, lotes más chicos para que todos reciban trabajo
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        size = self.batch_size
+        if use_pool:
+            size = min(size, max(1, math.ceil(len(texts) / self.workers)))
+        return [order[start:start + size] for start in range(0, len(order), size)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        start = time.perf_counter()
+        use_pool = self._use_pool(len(texts))
+        buckets = self._buckets(texts, use_pool)
+        batches = [[texts[i] for i in bucket] for bucket in buckets]
+
+        if use_pool:
+            results = self._get_pool().map(_embed_in_worker, batches)
+        else:
+            results = map(self.underlying.embed_documents, batches)
+
+        vectors: List[List[float] | None] = [None] * len(texts)
+        for bucket, batch_vectors in zip(buckets, results):
+            for i, vector in zip(bucket, batch_vectors):
+                vectors[i] = list(vector)
+
+        elapsed = time.perf_counter() - start
+        self.embedded += len(texts)
+        self.seconds += elapsed
+        logger.info(
+            f"Embeddings: {len(texts)} chunks en {elapsed:.2f}s "
+            f"({len(texts) / elapsed if elapsed else 0:.1f} chunks/s, acumulado {self.chunks_per_second():.1f} chunks/s)"
+        )
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
+
+    def chunks_per_second(self) -> float:
+        return self.embedded / self.seconds if self.seconds else 0.0
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+def build_ingestion_embeddings(
+    embeddings: Embeddings,
+    settings,
+    checkpoint: DiskEmbeddingCache | None = None
+) -> Embeddings:
+    if is_gemini(embeddings):
+        # API remota: lotes, concurrencia acotada, reintentos y checkpoint por lote
+        return GeminiBatchEmbeddings(
+            embeddings,
+            batch_size=settings.gemini_embedding_batch_size,
+            max_concurrency=settings.gemini_embedding_concurrency,
+            max_retries=settings.gemini_embedding_max_retries,
+            checkpoint=checkpoint
+        )
+    if not is_hugging_face(embeddings):
+        return embeddings
+
+    # modelo local: lotes por longitud y varios procesos
+    batch_size = settings.embedding_batch_size
+    workers = settings.embedding_workers if settings.embedding_workers > 0 else (os.cpu_count() or 1)
+    factory = None
+    if workers > 1:
+        factory = partial(
+            type(embeddings),
+            model_name=embeddings.model_name,
+            model_kwargs={**embeddings.model_kwargs, "device": "cpu"},
+            encode_kwargs={**embeddings.encode_kwargs, "batch_size": batch_size}
+        )
+    return BatchedEmbeddings(embeddings, batch_size=batch_size, workers=workers, worker_factory=factory)
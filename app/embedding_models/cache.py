@@ -0,0 +1,103 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import List
+import logging
+import sys
+import unicodedata
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+def model_name_of(embeddings: Embeddings) -> str:
+    return (
+        getattr(embeddings, "model_name", None)
+        or getattr(embeddings, "model", None)
+        or type(embeddings).__name__
+    )
+
+class CachedQueryEmbeddings(Embeddings):
+    # cache LRU de embed_query acotado por memoria; embed_documents (ingesta) pasa directo
+    def __init__(self, underlying: Embeddings, max_bytes: int):
+        self.underlying = underlying
+        self.model_name = model_name_of(underlying)
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_query(text: str) -> str:
+        # sólo normalizaciones que no cambian el embedding: unicode NFC y espacios
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @staticmethod
+    def _entry_size(key: tuple[str, str], vector: np.ndarray) -> int:
+        return vector.nbytes + len(key[1].encode("utf-8"))
+
+    def embed_query(self, text: str) -> List[float]:
+        text = self.normalize_query(text)
+        key = (self.model_name, text)
+
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector.tolist()
+            self.misses += 1
+
+        # el cálculo queda fuera del lock para no serializar consultas distintas
+        vector = np.asarray(self.underlying.embed_query(text), dtype=np.float32)
+        size = self._entry_size(key, vector)
+        if size > self.max_bytes:
+            return vector.tolist()
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = vector
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    old_key, old_vector = self._entries.popitem(last=False)
+                    self._bytes -= self._entry_size(old_key, old_vector)
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.underlying.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.underlying.aembed_documents(texts)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model_name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+def unwrap_embeddings(embeddings: Embeddings) -> Embeddings:
+    return embeddings.underlying if isinstance(embeddings, CachedQueryEmbeddings) else embeddings
+
+def is_provider(embeddings: Embeddings, module: str, class_name: str) -> bool:
+    # isinstance sin importar el proveedor: si su módulo no se cargó, no puede haber instancias
+    provider = sys.modules.get(module)
+    return provider is not None and isinstance(embeddings, getattr(provider, class_name))
+
+def is_hugging_face(embeddings: Embeddings) -> bool:
+    return is_provider(embeddings, "langchain_huggingface", "HuggingFaceEmbeddings")
+
+def is_gemini(embeddings: Embeddings) -> bool:
+    return is_provider(embeddings, "langchain_google_genai", "GoogleGenerativeAIEmbeddings")
@@ -0,0 +1,191 @@
+from pathlib import Path
+from threading import Lock
+from typing import List
+import hashlib
+import logging
+import re
+import sqlite3
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.f32"
+INDEX_FILE = "index.sqlite"
+# formato anterior: índice JSON reescrito completo en cada lote
+LEGACY_INDEX_FILE = "index.json"
+# parámetros por consulta (SQLite admite 999 en versiones viejas)
+QUERY_CHUNK_SIZE = 500
+# segundos que espera un proceso el lock de escritura del índice
+SQLITE_TIMEOUT = 60.0
+
+class DiskEmbeddingCache:
+    # cache content-addressed en disco: sha256(modelo + texto) -> fila de una matriz float32
+    # (vectors.f32, leída con np.memmap) + index.sqlite con la fila de cada hash y la cantidad
+    # de filas confirmadas; en memoria no queda ningún hash
+    def __init__(self, directory: Path, model_name: str):
+        self.model_name = model_name
+        self.directory = Path(directory) / re.sub(r"[^\w.-]+", "_", model_name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.directory / VECTORS_FILE
+        self._index_path = self.directory / INDEX_FILE
+        self._lock = Lock()
+        self._dim: int | None = None
+        self._count = 0
+        self._matrix: np.memmap | None = None
+        self._connection: sqlite3.Connection | None = None
+        self._open_index()
+
+    def _open_index(self):
+        legacy_path = self.directory / LEGACY_INDEX_FILE
+        if legacy_path.exists():
+            # sus filas pueden estar desalineadas por escrituras interrumpidas: se descarta
+            logger.warning(f"Cache de embeddings con formato anterior en {self.directory}, se descarta.")
+            legacy_path.unlink()
+            self._vectors_path.unlink(missing_ok=True)
+        try:
+            self._connect()
+        except sqlite3.DatabaseError as e:
+            logger.warning(f"Índice del cache de embeddings ilegible, se descarta: {e}")
+            if self._connection is not None:
+                self._connection.close()
+            self._index_path.unlink(missing_ok=True)
+            self._vectors_path.unlink(missing_ok=True)
+            self._connect()
+
+    def _connect(self):
+        # la ingesta puede escribir desde el hilo del event loop de Gemini: se serializa con el lock;
+        # entre procesos (varios workers de uvicorn ingiriendo a la vez) lo hace la transacción
+        # de escritura de put_many. Sin transacciones implícitas: se abren explícitamente
+        self._connection = sqlite3.connect(
+            self._index_path, timeout=SQLITE_TIMEOUT, isolation_level=None, check_same_thread=False
+        )
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS rows (key BLOB PRIMARY KEY, row INTEGER NOT NULL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        """)
+        self._read_meta()
+
+    def _read_meta(self):
+        # otro proceso puede haber agregado filas: la cantidad confirmada se lee del índice
+        meta = dict(self._connection.execute("SELECT name, value FROM meta"))
+        self._dim = meta.get("dim")
+        self._count = meta.get("count", 0)
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).digest()
+
+    def _lookup(self, keys: List[bytes]) -> dict[bytes, int]:
+        rows: dict[bytes, int] = {}
+        for start in range(0, len(keys), QUERY_CHUNK_SIZE):
+            chunk = keys[start:start + QUERY_CHUNK_SIZE]
+            rows.update(self._connection.execute(
+                f"SELECT key, row FROM rows WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        return rows
+
+    def _get_matrix(self) -> np.memmap | None:
+        # sólo las filas confirmadas en el índice: una cola huérfana no se lee
+        if self._count == 0:
+            return None
+        if self._matrix is None or self._matrix.shape[0] != self._count:
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self._count, self._dim))
+        return self._matrix
+
+    def get_many(self, texts: List[str]) -> List[List[float] | None]:
+        with self._lock:
+            self._read_meta()
+            matrix = self._get_matrix()
+            if matrix is None:
+                return [None] * len(texts)
+            keys = [self._key(text) for text in texts]
+            rows = self._lookup(list(set(keys)))
+            # filas confirmadas por otro proceso después de leer la cantidad: se tratan como ausentes
+            return [
+                matrix[rows[key]].tolist() if key in rows and rows[key] < matrix.shape[0] else None
+                for key in keys
+            ]
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]):
+        with self._lock:
+            # textos ya guardados (p. ej. por un checkpoint previo) no se duplican en el archivo
+            new: dict[bytes, List[float]] = {}
+            for text, vector in zip(texts, vectors):
+                new.setdefault(self._key(text), vector)
+
+            # lock de escritura del índice hasta confirmar: otro proceso que comparta el cache
+            # espera, y la cantidad de filas y la dimensión se releen dentro de la transacción
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._read_meta()
+                for key in self._lookup(list(new)):
+                    del new[key]
+                if not new:
+                    self._connection.execute("ROLLBACK")
+                    return
+                array = np.asarray(list(new.values()), dtype=np.float32)
+
+                if self._dim is None:
+                    self._dim = array.shape[1]
+                elif array.shape[1] != self._dim:
+                    raise ValueError(f"Dimensión de embeddings inesperada: {array.shape[1]} (cache: {self._dim})")
+
+                # una escritura interrumpida puede dejar filas (o media fila) sin confirmar al final:
+                # se recorta el archivo a las filas del índice antes de agregar, así no se desplazan
+                start = self._count
+                with open(self._vectors_path, "ab") as f:
+                    f.truncate(start * self._dim * 4)
+                    f.write(array.tobytes())
+                # las filas se confirman después de escribir los vectores
+                self._connection.executemany(
+                    "INSERT INTO rows VALUES (?, ?)", ((key, start + offset) for offset, key in enumerate(new))
+                )
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                    (("dim", self._dim), ("count", start + len(new)))
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                self._read_meta()
+                raise
+            self._count = start + len(new)
+            self._matrix = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._read_meta()
+            return self._count
+
+class CachedDocumentEmbeddings(Embeddings):
+    # embed_documents consulta primero el cache en disco y sólo envía al modelo los textos nuevos
+    def __init__(self, underlying: Embeddings, cache: DiskEmbeddingCache):
+        self.underlying = underlying
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            # textos repetidos dentro del mismo lote se embeben una sola vez
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            computed = dict(zip(unique_texts, self.underlying.embed_documents(unique_texts)))
+            self.cache.put_many(unique_texts, [computed[text] for text in unique_texts])
+            for i in missing:
+                vectors[i] = list(computed[texts[i]])
+
+        logger.info(f"Embeddings desde cache: {len(texts) - len(missing)}/{len(texts)}")
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
+
+    def close(self):
+        close = getattr(self.underlying, "close", None)
+        if callable(close):
+            close()
@@ -1,14 +1,35 @@
 from langchain_core.embeddings import Embeddings
-from app.embedding_models.huggingface import hugging_face_embeddings
+from app.embedding_models.huggingface import get_hugging_face_embeddings
 from app.embedding_models.gemini import get_gemini_embeddings
+from app.embedding_models.cache import CachedQueryEmbeddings, model_name_of
+from app.config.config import get_settings
 import logging
 logger = logging.getLogger(__name__)
 
+# un único cache de consultas por modelo (nombre del modelo -> wrapper): acotado a los
+# modelos configurados aunque se pidan instancias nuevas
+_query_caches: dict[str, CachedQueryEmbeddings] = {}
+
+def _with_query_cache(embeddings: Embeddings) -> Embeddings:
+    settings = get_settings()
+    if not settings.query_embedding_cache_enabled:
+        return embeddings
+
+    model_name = model_name_of(embeddings)
+    cached = _query_caches.get(model_name)
+    if cached is None or cached.underlying is not embeddings:
+        cached = CachedQueryEmbeddings(embeddings, max_bytes=settings.query_embedding_cache_max_bytes)
+        _query_caches[model_name] = cached
+    return cached
+
 def get_embeddings(embeddings: str = "default") -> Embeddings | None:
     if embeddings == "default":
-        return hugging_face_embeddings
+        return _with_query_cache(get_hugging_face_embeddings())
     elif embeddings == "gemini":
-        return get_gemini_embeddings()
+        gemini_embeddings = get_gemini_embeddings()
+        if gemini_embeddings is None:
+            return None
+        return _with_query_cache(gemini_embeddings)
     else:
         logger.error("Modelo de embeddings no soportado o error al cargar el modelo.")
-        return None
\ No newline at end of file
+        return None
@@ -1,12 +1,23 @@
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-
+from threading import Lock
 import logging
+from langchain_core.embeddings import Embeddings
 from app.config.config import get_settings
 
 logger = logging.getLogger(__name__)
 
-def get_gemini_embeddings() -> GoogleGenerativeAIEmbeddings | None:
+# un único cliente por proceso: cada instancia abre su propio cliente del SDK
+_embeddings: Embeddings | None = None
+_lock = Lock()
+
+def get_gemini_embeddings() -> Embeddings | None:
+    global _embeddings
     if not get_settings().google_api_key:
         return None
 
-    return GoogleGenerativeAIEmbeddings(model=get_settings().gemini_embeddings_model_name)
\ No newline at end of file
+    if _embeddings is None:
+        with _lock:
+            if _embeddings is None:
+                # el SDK de Google se importa sólo si se usan embeddings de Gemini
+                from langchain_google_genai import GoogleGenerativeAIEmbeddings
+                _embeddings = GoogleGenerativeAIEmbeddings(model=get_settings().gemini_embeddings_model_name)
+    return _embeddings
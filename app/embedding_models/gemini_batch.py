@@ -0,0 +1,151 @@
+from typing import List
+import asyncio
+import logging
+import random
+import time
+from langchain_core.embeddings import Embeddings
+from app.embedding_models.disk_cache import DiskEmbeddingCache
+from app.utils.async_runner import run_sync
+
+logger = logging.getLogger(__name__)
+
+# límite de textos por request de batchEmbedContents
+GEMINI_MAX_BATCH_SIZE = 100
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+def _status_of(error: Exception) -> int | None:
+    # GoogleGenerativeAIError envuelve el error del SDK, que trae el código HTTP
+    for candidate in (error, error.__cause__):
+        code = getattr(candidate, "code", None)
+        if isinstance(code, int):
+            return code
+    return None
+
+def _retry_after(error: Exception) -> float | None:
+    response = getattr(error.__cause__, "response", None)
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+class AdaptiveConcurrency:
+    # AIMD: un 429 reduce a la mitad los requests simultáneos permitidos;
+    # cada `limit` respuestas exitosas seguidas lo vuelven a subir en 1, hasta el máximo
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.active = 0
+        self._successes = 0
+        self._condition: asyncio.Condition | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        # el límite aprendido persiste entre llamadas; la condición pertenece al event loop
+        # (embed_documents corre cada llamada en un loop nuevo)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+            self.active = 0
+        return self._condition
+
+    async def acquire(self):
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def release(self, throttled: bool = False):
+        condition = self._get_condition()
+        async with condition:
+            self.active -= 1
+            if throttled:
+                self._successes = 0
+                if self.limit > 1:
+                    self.limit = max(1, self.limit // 2)
+                    logger.warning(f"Gemini limitó la tasa: concurrencia reducida a {self.limit}.")
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_concurrency:
+                    self._successes = 0
+                    self.limit += 1
+            condition.notify_all()
+
+class GeminiBatchEmbeddings(Embeddings):
+    # ingesta con Gemini: lotes de hasta 100 textos, requests concurrentes acotados, reintentos
+    # con backoff ante 429/5xx y checkpoint por lote en el cache en disco (una corrida que
+    # falla retoma desde los lotes ya embebidos)
+    def __init__(
+        self,
+        underlying: Embeddings,
+        batch_size: int = GEMINI_MAX_BATCH_SIZE,
+        max_concurrency: int = 4,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        checkpoint: DiskEmbeddingCache | None = None
+    ):
+        self.underlying = underlying
+        self.batch_size = max(1, min(batch_size, GEMINI_MAX_BATCH_SIZE))
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.checkpoint = checkpoint
+        # compartido entre llamadas: un 429 sigue limitando los lotes siguientes de la ingesta
+        self.limiter = AdaptiveConcurrency(max_concurrency)
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return run_sync(self.aembed_documents(texts))
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.checkpoint.get_many(texts) if self.checkpoint is not None else [None] * len(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            start = time.perf_counter()
+            batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+            results = await asyncio.gather(*(self._embed_batch(batch) for batch in batches))
+
+            computed = {text: vector for batch, batch_vectors in zip(batches, results) for text, vector in zip(batch, batch_vectors)}
+            vectors = [vector if vector is not None else computed[text] for text, vector in zip(texts, vectors)]
+            logger.info(
+                f"Gemini: {len(missing)} textos en {len(batches)} requests, {time.perf_counter() - start:.2f}s "
+                f"(concurrencia: {self.limiter.limit}, reintentos: {self.retries}, limitados: {self.throttled})"
+            )
+        return [list(vector) for vector in vectors]
+
+    def texts_per_call(self) -> int:
+        # textos por llamada necesarios para tener max_concurrency requests en vuelo
+        return self.batch_size * self.max_concurrency
+
+    async def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        limiter = self.limiter
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            self.requests += 1
+            try:
+                batch_vectors = await self.underlying.aembed_documents(batch)
+            except Exception as e:
+                status = _status_of(e)
+                await limiter.release(throttled=status == 429)
+                # errores de red (sin código) o del lado de Gemini: se reintenta; 4xx no
+                if (status is not None and status not in RETRYABLE_STATUS) or attempt == self.max_retries:
+                    raise
+                if status == 429:
+                    self.throttled += 1
+                self.retries += 1
+                delay = _retry_after(e) or min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(f"Error de Gemini ({status or type(e).__name__}), reintento en {delay:.1f}s...")
+                await asyncio.sleep(delay)
+                continue
+
+            await limiter.release()
+            if self.checkpoint is not None:
+                self.checkpoint.put_many(batch, batch_vectors)
+            return batch_vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
@@ -1,8 +1,39 @@
-from langchain_huggingface import HuggingFaceEmbeddings
-
+from threading import Lock
 import logging
+import time
+from langchain_core.embeddings import Embeddings
 from app.config.config import get_settings
 
 logger = logging.getLogger(__name__)
 
-hugging_face_embeddings = HuggingFaceEmbeddings(model_name=get_settings().hugging_face_embeddings_model_name)
\ No newline at end of file
+# el modelo (torch + pesos de sentence-transformers) se carga en el primer uso, no al importar
+_embeddings: Embeddings | None = None
+_lock = Lock()
+_load_stats: dict[str, float | None] = {"load_seconds": None, "warmup_seconds": None}
+
+def get_hugging_face_embeddings() -> Embeddings:
+    global _embeddings
+    if _embeddings is None:
+        # una sola carga aunque varios hilos lo pidan a la vez
+        with _lock:
+            if _embeddings is None:
+                from langchain_huggingface import HuggingFaceEmbeddings
+                model_name = get_settings().hugging_face_embeddings_model_name
+                logger.info(f"Cargando modelo de embeddings {model_name}...")
+                start = time.perf_counter()
+                _embeddings = HuggingFaceEmbeddings(model_name=model_name)
+                _load_stats["load_seconds"] = round(time.perf_counter() - start, 3)
+                logger.info(f"Modelo de embeddings cargado en {_load_stats['load_seconds']:.2f}s.")
+    return _embeddings
+
+def warmup_hugging_face_embeddings() -> float:
+    # un encode de prueba al iniciar: la primera consulta real no paga la inicialización de torch
+    embeddings = get_hugging_face_embeddings()
+    start = time.perf_counter()
+    embeddings.embed_query("warmup")
+    _load_stats["warmup_seconds"] = round(time.perf_counter() - start, 3)
+    logger.info(f"Modelo de embeddings precalentado en {_load_stats['warmup_seconds']:.2f}s.")
+    return _load_stats["warmup_seconds"]
+
+def hugging_face_load_stats() -> dict[str, float | None]:
+    return {"loaded": _embeddings is not None, **_load_stats}
@@ -0,0 +1,91 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import List
+import gzip
+import hashlib
+import json
+import logging
+import os
+from langchain_core.documents import Document
+from app.config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+HASH_INDEX_FILE = "file_hashes.json"
+
+def _atomic_write(path: Path, data: bytes):
+    # nombre temporal único: varios procesos de extracción pueden escribir a la vez
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(path)
+
+class ExtractionCache:
+    # texto y metadata por página, indexados por hash del contenido del archivo + versión del loader;
+    # un PDF sin cambios se sirve desde aquí sin volver a parsearlo
+    def __init__(self, directory: Path, loader_version: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.loader_version = loader_version
+        self._hash_index_path = self.directory / HASH_INDEX_FILE
+        self._hash_index: dict[str, list] | None = None
+
+    def _load_hash_index(self) -> dict[str, list]:
+        if self._hash_index is None:
+            try:
+                self._hash_index = json.loads(self._hash_index_path.read_text())
+            except Exception:
+                self._hash_index = {}
+        return self._hash_index
+
+    def file_hash(self, path: Path) -> str:
+        # (tamaño, mtime) iguales => mismo hash, sin volver a leer el archivo
+        stat = path.stat()
+        index = self._load_hash_index()
+        entry = index.get(str(path))
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        file_hash = digest.hexdigest()
+
+        index[str(path)] = [stat.st_size, stat.st_mtime_ns, file_hash]
+        try:
+            _atomic_write(self._hash_index_path, json.dumps(index).encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"No se pudo actualizar el índice de hashes: {e}")
+        return file_hash
+
+    def _entry_path(self, file_hash: str, pages: range | None) -> Path:
+        pages_key = "all" if pages is None else f"{pages.start}-{pages.stop}"
+        key = hashlib.sha256(f"{file_hash}|{self.loader_version}|{pages_key}".encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.json.gz"
+
+    def get(self, file_hash: str, pages: range | None = None) -> List[Document] | None:
+        entry_path = self._entry_path(file_hash, pages)
+        if not entry_path.exists():
+            return None
+        try:
+            with gzip.open(entry_path, "rt", encoding="utf-8") as f:
+                pages_data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Entrada de cache ilegible ({entry_path.name}): {e}")
+            return None
+        return [Document(page_content=p["text"], metadata=p["metadata"]) for p in pages_data]
+
+    def put(self, file_hash: str, docs: List[Document], pages: range | None = None):
+        pages_data = [{"text": doc.page_content, "metadata": doc.metadata} for doc in docs]
+        try:
+            data = gzip.compress(json.dumps(pages_data, ensure_ascii=False, default=str).encode("utf-8"))
+            _atomic_write(self._entry_path(file_hash, pages), data)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la extracción en cache: {e}")
+
+@lru_cache()
+def get_extraction_cache(loader_version: str) -> ExtractionCache | None:
+    settings = get_settings()
+    if not settings.extraction_cache_enabled:
+        return None
+    return ExtractionCache(settings.extraction_cache_path, loader_version)
@@ -0,0 +1,220 @@
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, Iterable, List
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+import asyncio
+import hashlib
+import logging
+import posixpath
+import re
+import time
+import httpx
+from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+from app.config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# parámetros que no cambian el contenido de la página
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "ref"}
+# recursos que no son páginas
+SKIPPED_EXTENSIONS = {
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".css", ".js",
+    ".pdf", ".zip", ".mp4", ".mp3", ".woff", ".woff2", ".xml", ".json"
+}
+SITEMAP_LOC = re.compile(r"<loc>\s*(.*?)\s*</loc>", re.IGNORECASE | re.DOTALL)
+
+def canonicalize_url(url: str) -> str:
+    # una sola forma por página: esquema y host en minúsculas, sin puerto por defecto,
+    # sin fragmento ni parámetros de tracking, query ordenada y sin "/" final (salvo la raíz)
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme == "http" and parts.port == 80) and not (scheme == "https" and parts.port == 443):
+        host = f"{host}:{parts.port}"
+
+    path = posixpath.normpath(parts.path) if parts.path else "/"
+    if parts.path.endswith("/") and path != "/":
+        path = path.rstrip("/")
+    if path == ".":
+        path = "/"
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+def site_of(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+def extract_links(html: str, base_url: str) -> List[str]:
+    # enlaces http(s) de la página, absolutos y canónicos, sin repetir y en orden de aparición
+    links: dict[str, None] = {}
+    for anchor in BeautifulSoup(html, "html.parser").find_all("a", href=True):
+        url = urljoin(base_url, anchor["href"].strip())
+        if urlsplit(url).scheme not in ("http", "https"):
+            continue
+        if posixpath.splitext(urlsplit(url).path)[1].lower() in SKIPPED_EXTENSIONS:
+            continue
+        links[canonicalize_url(url)] = None
+    return list(links)
+
+def remaining_time(deadline: float | None, timeout: float) -> float:
+    # tiempo para una operación: su timeout, acotado por el deadline del crawler (si hay)
+    if deadline is None:
+        return timeout
+    return min(timeout, deadline - time.monotonic())
+
+class HostRateLimiter:
+    # intervalo mínimo entre requests al mismo host, compartido por HTTP y Selenium
+    def __init__(self, requests_per_second: float):
+        self.interval = 1 / requests_per_second if requests_per_second > 0 else 0
+        self._next_slot: dict[str, float] = {}
+        self._lock = Lock()
+
+    def reserve(self, url: str) -> float:
+        # reserva el próximo turno del host y devuelve cuánto hay que esperar
+        if not self.interval:
+            return 0
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+            return slot - now
+
+    def wait(self, url: str, deadline: float | None = None) -> bool:
+        # False (sin esperar) si el turno del host cae después del deadline
+        delay = self.reserve(url)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    async def await_turn(self, url: str, deadline: float | None = None) -> bool:
+        delay = self.reserve(url)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return False
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return True
+
+@lru_cache()
+def get_host_rate_limiter() -> HostRateLimiter:
+    return HostRateLimiter(get_settings().web_rate_limit_per_host)
+
+def fetch_sitemap_urls(
+    seeds: Iterable[str],
+    timeout: float = 10.0,
+    rate_limiter: HostRateLimiter | None = None,
+    deadline: float | None = None
+) -> List[str]:
+    # /sitemap.xml de cada sitio semilla (y un nivel de sitemaps anidados), respetando
+    # el rate limit por host y el presupuesto de tiempo del crawler
+    origins = dict.fromkeys(
+        f"{urlsplit(seed).scheme}://{urlsplit(seed).netloc}" for seed in seeds
+    )
+    urls: List[str] = []
+    with httpx.Client(timeout=timeout, follow_redirects=True) as client:
+        for origin in origins:
+            pending = [f"{origin}/sitemap.xml"]
+            for _ in range(2):
+                nested: List[str] = []
+                for sitemap_url in pending:
+                    request_timeout = remaining_time(deadline, timeout)
+                    if request_timeout <= 0 or (rate_limiter and not rate_limiter.wait(sitemap_url, deadline)):
+                        logger.warning(f"Presupuesto de tiempo agotado leyendo sitemaps: {len(urls)} URLs encontradas.")
+                        return urls
+                    try:
+                        response = client.get(sitemap_url, timeout=remaining_time(deadline, timeout))
+                        response.raise_for_status()
+                    except Exception as e:
+                        logger.info(f"Sin sitemap en {sitemap_url}: {type(e).__name__}")
+                        continue
+                    for loc in SITEMAP_LOC.findall(response.text):
+                        if loc.lower().endswith(".xml"):
+                            nested.append(loc)
+                        else:
+                            urls.append(loc)
+                pending = nested
+    return urls
+
+class WebCrawler:
+    # recorrido en anchura desde las semillas: cada nivel se descarga en lotes con `fetch`
+    # (snapshots / HTTP / Selenium) y los enlaces del mismo sitio forman el nivel siguiente;
+    # `fetch` recibe el deadline del presupuesto de tiempo para no pasarse dentro de un lote
+    def __init__(
+        self,
+        seeds: List[str],
+        fetch: Callable[[List[str], float | None], List[Document]],
+        max_depth: int,
+        max_pages: int,
+        time_budget: float,
+        batch_size: int,
+        use_sitemap: bool = False
+    ):
+        self.seeds = [canonicalize_url(seed) for seed in seeds]
+        self.sites = {site_of(seed) for seed in self.seeds}
+        self.fetch = fetch
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.time_budget = time_budget
+        self.batch_size = max(1, batch_size)
+        self.use_sitemap = use_sitemap
+
+    def _same_site(self, url: str) -> bool:
+        return site_of(url) in self.sites
+
+    def crawl(self) -> List[Document]:
+        deadline = time.monotonic() + self.time_budget
+        seen: set[str] = set()
+        frontier: List[str] = []
+
+        def enqueue(url: str, target: List[str]):
+            if url not in seen and len(seen) < self.max_pages and self._same_site(url):
+                seen.add(url)
+                target.append(url)
+
+        for seed in self.seeds:
+            enqueue(seed, frontier)
+        if self.use_sitemap:
+            sitemap_urls = fetch_sitemap_urls(
+                self.seeds,
+                timeout=get_settings().web_http_timeout,
+                rate_limiter=get_host_rate_limiter(),
+                deadline=deadline
+            )
+            for url in sitemap_urls:
+                enqueue(canonicalize_url(url), frontier)
+
+        docs: List[Document] = []
+        content_hashes: set[str] = set()
+        depth = 0
+        while frontier:
+            next_frontier: List[str] = []
+            for start in range(0, len(frontier), self.batch_size):
+                if time.monotonic() >= deadline:
+                    logger.warning(
+                        f"Presupuesto de tiempo del crawler agotado ({self.time_budget}s): "
+                        f"{len(docs)} páginas indexadas, {len(frontier) - start} pendientes en el nivel {depth}."
+                    )
+                    return docs
+
+                for doc in self.fetch(frontier[start:start + self.batch_size], deadline):
+                    # la misma página bajo otra URL (p. ej. con parámetros) se indexa una vez
+                    digest = hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+                    if digest not in content_hashes:
+                        content_hashes.add(digest)
+                        docs.append(doc)
+                    if depth < self.max_depth:
+                        for link in doc.metadata.get("links", []):
+                            enqueue(link, next_frontier)
+
+            frontier = next_frontier
+            depth += 1
+
+        logger.info(f"Crawler: {len(docs)} páginas de {len(seen)} URLs descubiertas (profundidad {max(depth - 1, 0)}).")
+        return docs
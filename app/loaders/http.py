@@ -0,0 +1,188 @@
+from typing import List
+import asyncio
+import json
+import logging
+import time
+import httpx
+from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+from app.loaders.base import BaseLoader
+from app.loaders.crawler import HostRateLimiter, extract_links, get_host_rate_limiter, remaining_time
+from app.loaders.snapshots import SnapshotStore, get_snapshot_store, snapshot_document
+from app.config.config import get_settings
+from app.utils.async_runner import run_sync
+
+logger = logging.getLogger(__name__)
+
+def parse_html(html: str) -> tuple[str, str, bool]:
+    # devuelve (título, texto visible, la página pide JavaScript)
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text(strip=True) if soup.title else ""
+    asks_for_js = any("javascript" in tag.get_text().lower() for tag in soup("noscript"))
+
+    # Eliminar scripts y estilos que meten ruido
+    for tag in soup(["script", "style", "noscript", "svg"]):
+        tag.extract()
+
+    return title, soup.get_text(separator="\n", strip=True), asks_for_js
+
+def looks_js_rendered(text: str, asks_for_js: bool, min_text_chars: int) -> bool:
+    # una SPA sin renderizar trae casi nada de texto; si además avisa por <noscript>
+    # que necesita JavaScript, se le exige más texto para considerarla estática
+    threshold = min_text_chars * 5 if asks_for_js else min_text_chars
+    return len(text) < threshold
+
+# un 403 o 429 suele ser un bloqueo anti-bots o un límite de tasa que el navegador
+# puede superar; el resto de los errores HTTP y los timeouts fallarían igual con Selenium
+BROWSER_RETRY_STATUSES = {403, 429}
+
+class HTTPLoader(BaseLoader):
+    # descarga liviana sin navegador: un AsyncClient con pool de conexiones, respuestas
+    # comprimidas y requests condicionales; las páginas que necesitan JavaScript quedan
+    # en fallback_urls para el loader de Selenium y los errores definitivos en failed_urls
+    def __init__(
+        self,
+        urls: List[str],
+        max_concurrency: int | None = None,
+        timeout: float | None = None,
+        min_text_chars: int | None = None,
+        store: SnapshotStore | None = None,
+        rate_limiter: HostRateLimiter | None = None,
+        deadline: float | None = None
+    ):
+        settings = get_settings()
+        self.urls = urls
+        self.max_concurrency = max_concurrency or settings.web_http_max_concurrency
+        self.timeout = timeout or settings.web_http_timeout
+        self.min_text_chars = settings.web_min_text_chars if min_text_chars is None else min_text_chars
+        self.store = store if store is not None else get_snapshot_store()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_host_rate_limiter()
+        # time.monotonic() límite del crawler: las URLs que no alcanzan a pedirse se omiten
+        self.deadline = deadline
+        self.fallback_urls: List[str] = []
+        self.skipped_urls: List[str] = []
+        self.failed_urls: List[str] = []
+        self.timings: dict[str, float] = {}
+
+    def load(self) -> List[Document]:
+        return run_sync(self.aload())
+
+    async def aload(self) -> List[Document]:
+        self.fallback_urls = []
+        self.skipped_urls = []
+        self.failed_urls = []
+        self.timings = {}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency
+        )
+        settings = get_settings()
+        # httpx ya anuncia Accept-Encoding (gzip, deflate y br/zstd si están instalados)
+        # y descomprime la respuesta
+        async with httpx.AsyncClient(
+            limits=limits,
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers={"User-Agent": settings.user_agent}
+        ) as client:
+            results = await asyncio.gather(*(self._fetch(client, semaphore, url) for url in self.urls))
+
+        docs: List[Document] = []
+        discarded = set(self.skipped_urls) | set(self.failed_urls)
+        for url, doc in zip(self.urls, results):
+            if url in discarded:
+                continue
+            if doc is None:
+                self.fallback_urls.append(url)
+            else:
+                docs.append(doc)
+
+        logger.info(
+            f"Carga HTTP: {len(docs)}/{len(self.urls)} URLs sin navegador, "
+            f"{len(self.fallback_urls)} requieren JavaScript, {len(self.failed_urls)} fallaron"
+            + (f", {len(self.skipped_urls)} omitidas por el presupuesto de tiempo." if self.skipped_urls else ".")
+        )
+        return docs
+
+    async def _fetch(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, url: str) -> Document | None:
+        cached = self.store.get(url) if self.store else None
+        if cached and cached.get("renderer") != "http":
+            # un snapshot del navegador no tiene validadores HTTP ni sirve para comparar el HTML crudo
+            cached = None
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        start = time.perf_counter()
+        try:
+            async with semaphore:
+                if remaining_time(self.deadline, self.timeout) <= 0 or (
+                    self.rate_limiter and not await self.rate_limiter.await_turn(url, self.deadline)
+                ):
+                    self.skipped_urls.append(url)
+                    return None
+                response = await client.get(url, headers=headers, timeout=remaining_time(self.deadline, self.timeout))
+
+            if response.status_code == 304 and cached:
+                logger.info(f"{url} sin cambios (304), se reutiliza el snapshot.")
+                snapshot = {key: value for key, value in cached.items() if key not in ("fetched_at", "content_hash")}
+            else:
+                response.raise_for_status()
+                body, content_type = response.text, response.headers.get("content-type", "")
+                if self.store and self.store.same_content(cached, body):
+                    logger.info(f"{url} con el mismo contenido, se reutiliza el texto extraído.")
+                    extracted = cached["extracted"]
+                else:
+                    extracted = self._extract(url, body, content_type)
+                snapshot = {
+                    "renderer": "http",
+                    "etag": response.headers.get("etag"),
+                    "last_modified": response.headers.get("last-modified"),
+                    "content_type": content_type,
+                    "body": body,
+                    "extracted": extracted
+                }
+        except httpx.HTTPStatusError as e:
+            logger.warning(f"Error HTTP en {url}: {e.response.status_code}")
+            if e.response.status_code not in BROWSER_RETRY_STATUSES:
+                self.failed_urls.append(url)
+            return None
+        except httpx.TimeoutException as e:
+            logger.warning(f"Timeout HTTP en {url}: {type(e).__name__}")
+            self.failed_urls.append(url)
+            return None
+        except Exception as e:
+            logger.warning(f"Error HTTP en {url}: {type(e).__name__}: {e}")
+            return None
+        finally:
+            self.timings[url] = round((time.perf_counter() - start) * 1000, 2)
+
+        if self.store:
+            self.store.put(url, snapshot)
+        doc = snapshot_document(url, snapshot)
+        if doc is not None:
+            logger.info(f"Contenido de {url} extraído por HTTP.")
+        return doc
+
+    def _extract(self, url: str, body: str, content_type: str) -> dict | None:
+        if "json" in content_type:
+            # APIs JSON: el contenido se indexa tal cual, legible
+            try:
+                return {"title": "", "text": json.dumps(json.loads(body), ensure_ascii=False, indent=2)}
+            except ValueError:
+                logger.warning(f"JSON inválido en {url}")
+                return None
+        if "html" in content_type or not content_type:
+            title, text, asks_for_js = parse_html(body)
+            if looks_js_rendered(text, asks_for_js, self.min_text_chars):
+                logger.info(f"{url} parece renderizada con JavaScript, se usará el navegador.")
+                return None
+            return {"title": title, "text": text, "links": extract_links(body, url)}
+        if content_type.startswith("text/"):
+            return {"title": "", "text": body.strip()}
+        logger.warning(f"Tipo de contenido no soportado en {url}: {content_type}")
+        return None
@@ -1,16 +1,119 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
 from langchain_core.documents import Document
 import logging
+import multiprocessing
+import os
+import time
 
-from app.loaders.pdf import PDFLoader
-from app.loaders.web import WebLoader
 from app.loaders.normalizer import normalize_documents
 from app.config.config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+def _extract_pdf(task: tuple[Path, range | None]) -> List[Document]:
+    # función de módulo para poder enviarse a los procesos del pool
+    # (los loaders se importan al cargar: pymupdf y selenium no pesan en el arranque de la API)
+    from app.loaders.pdf import PDFLoader
+    pdf, pages = task
+    return PDFLoader(pdf, pages=pages).load()
+
+def _pdf_tasks(pdfs: List[Path], pages_per_task: int) -> List[tuple[Path, range | None]]:
+    # los PDFs grandes se dividen por rango de páginas para repartirlos entre procesos
+    from app.loaders.pdf import count_pages
+    tasks: List[tuple[Path, range | None]] = []
+    for pdf in pdfs:
+        try:
+            total_pages = count_pages(pdf)
+        except Exception:
+            # el error se informa al cargarlo
+            total_pages = 0
+
+        if total_pages > pages_per_task:
+            for start in range(0, total_pages, pages_per_task):
+                tasks.append((pdf, range(start, min(start + pages_per_task, total_pages))))
+        else:
+            tasks.append((pdf, None))
+    return tasks
+
+def iter_pdfs(pdfs: List[Path], workers: int | None = None) -> Iterator[Document]:
+    if workers is None:
+        workers = settings.pdf_extraction_workers
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+
+    start = time.perf_counter()
+    tasks = [(pdf, None) for pdf in pdfs] if workers == 1 else _pdf_tasks(pdfs, settings.pdf_pages_per_task)
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield from _extract_pdf(task)
+    else:
+        workers = min(workers, len(tasks))
+        logger.info(f"Extrayendo {len(pdfs)} PDFs en {len(tasks)} tareas con {workers} procesos...")
+        # spawn: la extracción corre desde el hilo de prefetch de la ingesta y un fork con
+        # hilos activos puede heredar locks tomados
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            # a lo sumo 2 tareas por proceso en vuelo: la extracción no se adelanta al consumo
+            # y los resultados salen en el orden de las tareas (determinista)
+            pending_tasks = iter(tasks)
+            in_flight = deque(pool.submit(_extract_pdf, task) for task in islice(pending_tasks, workers * 2))
+            while in_flight:
+                task_docs = in_flight.popleft().result()
+                next_task = next(pending_tasks, None)
+                if next_task is not None:
+                    in_flight.append(pool.submit(_extract_pdf, next_task))
+                yield from task_docs
+
+    logger.info(f"Extracción de PDFs completada en {time.perf_counter() - start:.2f}s.")
+
+def load_pdfs(pdfs: List[Path], workers: int | None = None) -> List[Document]:
+    return list(iter_pdfs(pdfs, workers))
+
+def _local_pdfs(path: Path) -> List[Path]:
+    if not path.exists():
+        return []
+    if path.is_dir():
+        return sorted(path.glob("**/*.pdf"))
+    if path.is_file() and path.suffix.lower() == ".pdf":
+        return [path]
+    logger.warning(f"Ruta no soportada: {path}")
+    return []
+
+def iter_documents(path: str, include_web: bool = True) -> Iterator[Document]:
+    # versión en streaming de load_documents: los PDFs se entregan a medida que se extraen,
+    # sin materializar el corpus; la carga web está acotada por los límites del crawler
+    path = Path(path).resolve()
+
+    logger.info(f"Iniciando carga local desde: {path}")
+    count = 0
+    try:
+        for doc in iter_pdfs(_local_pdfs(path)):
+            for normalized in normalize_documents([doc]):
+                count += 1
+                yield normalized
+        logger.info(f"Carga local completada. Documentos cargados: {count}")
+    except Exception as e:
+        logger.error(f"Error durante la carga local: {e}")
+
+    if include_web and settings.urls:
+        logger.info(f"Iniciando carga Web de {len(settings.urls)} URLs...")
+        try:
+            from app.loaders.web import WebLoader
+            web_docs = WebLoader(settings.urls).load()
+        except Exception as e:
+            logger.error(f"Error durante la carga web: {e}")
+            web_docs = []
+
+        if web_docs:
+            logger.info(f"Carga web finalizada: {len(web_docs)} documentos obtenidos.")
+            yield from normalize_documents(web_docs)
+        else:
+            logger.warning("La carga web finalizó sin obtener documentos.")
+
 def load_documents(path: str, include_web: bool = True) -> List[Document]:
     path = Path(path).resolve()
     all_docs: List[Document] = []
@@ -20,10 +123,9 @@ def load_documents(path: str, include_web: bool = True) -> List[Document]:
     try:
         if path.exists():
             if path.is_dir():
-                for pdf in path.glob("**/*.pdf"):
-                    all_docs.extend(PDFLoader(pdf).load())
+                all_docs.extend(load_pdfs(sorted(path.glob("**/*.pdf"))))
             elif path.is_file() and path.suffix.lower() == ".pdf":
-                all_docs.extend(PDFLoader(path).load())
+                all_docs.extend(load_pdfs([path]))
             else:
                 logger.warning(f"Ruta no soportada: {path}")
         logger.info(f"Carga local completada. Documentos cargados: {len(all_docs)}")
@@ -34,6 +136,7 @@ def load_documents(path: str, include_web: bool = True) -> List[Document]:
     if include_web and settings.urls:
         logger.info(f"Iniciando carga Web de {len(settings.urls)} URLs...")
         try:
+            from app.loaders.web import WebLoader
             web_loader = WebLoader(settings.urls)
             web_docs = web_loader.load()
 
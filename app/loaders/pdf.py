@@ -1,24 +1,85 @@
 from typing import List
 from pathlib import Path
 import logging
+import pymupdf
 from langchain_core.documents import Document
 from langchain_community.document_loaders import PyMuPDFLoader
 from app.loaders.base import BaseLoader
+from app.loaders.cache import get_extraction_cache
 
 logger = logging.getLogger(__name__)
 
+# cambiarlo invalida el cache de extracción (p. ej. si cambia el post-procesado de páginas)
+LOADER_VERSION = f"pymupdf-{pymupdf.__version__}-1"
+
+def count_pages(path: Path) -> int:
+    with pymupdf.open(str(path)) as pdf:
+        return pdf.page_count
+
 class PDFLoader(BaseLoader):
-    def __init__(self, path: Path):
+    def __init__(self, path: Path, pages: range | None = None):
         self.path = path.resolve()
+        # rango de páginas a extraer (PDFs grandes repartidos entre procesos); None = todo el archivo
+        self.pages = pages
+
+    def _load_pages(self) -> List[Document]:
+        # PyMuPDFLoader no permite extraer un rango sin recorrer las páginas previas
+        docs: List[Document] = []
+        with pymupdf.open(str(self.path)) as pdf:
+            metadata = {k: v for k, v in (pdf.metadata or {}).items() if v}
+            for page_number in self.pages:
+                if page_number >= pdf.page_count:
+                    break
+                docs.append(Document(
+                    page_content=pdf[page_number].get_text(),
+                    metadata={
+                        **metadata,
+                        "source": str(self.path),
+                        "file_path": str(self.path),
+                        "page": page_number,
+                        "total_pages": pdf.page_count
+                    }
+                ))
+        return docs
 
     def load(self) -> List[Document]:
+        cache = get_extraction_cache(LOADER_VERSION)
+        file_hash = None
+        if cache is not None:
+            try:
+                file_hash = cache.file_hash(self.path)
+                cached_docs = cache.get(file_hash, self.pages)
+                if cached_docs is not None:
+                    logger.info(f"PDF sin cambios, servido desde cache: {self.path}")
+                    # El cache se indexa por contenido: la ruta es la de este archivo,
+                    # no la de la primera extracción (renombrados o duplicados)
+                    for doc in cached_docs:
+                        doc.metadata["source"] = str(self.path)
+                        doc.metadata["file_path"] = str(self.path)
+                    return cached_docs
+            except OSError as e:
+                logger.warning(f"No se pudo consultar el cache de extracción para {self.path}: {e}")
+
+        docs = self._extract()
+        if cache is not None and file_hash is not None and docs is not None:
+            cache.put(file_hash, docs, self.pages)
+        return docs or []
+
+    def _extract(self) -> List[Document] | None:
+        # None indica error de extracción (no se cachea)
         docs: List[Document] = []
 
-        logger.info(f"Cargando PDF: {self.path}")
+        if self.pages is None:
+            logger.info(f"Cargando PDF: {self.path}")
+        else:
+            logger.info(f"Cargando PDF: {self.path} (páginas {self.pages.start}-{self.pages.stop - 1})")
 
         try:
-            loader = PyMuPDFLoader(str(self.path))
-            loaded_docs = loader.load()
+            if self.pages is None:
+                loader = PyMuPDFLoader(str(self.path))
+                loaded_docs = loader.load()
+            else:
+                loaded_docs = self._load_pages()
 
             for doc in loaded_docs:
                 content = (doc.page_content or "").strip()
@@ -32,5 +93,6 @@ class PDFLoader(BaseLoader):
 
         except Exception as e:
             logger.error(f"Error cargando PDF {self.path}: {e}")
+            return None
 
         return docs
@@ -0,0 +1,84 @@
+from functools import lru_cache
+from pathlib import Path
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from langchain_core.documents import Document
+from app.config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def snapshot_document(url: str, snapshot: dict) -> Document | None:
+    # el texto ya extraído del snapshot, sin volver a parsear el HTML
+    extracted = snapshot.get("extracted")
+    if not extracted or not extracted.get("text"):
+        return None
+    metadata = {
+        "source": url,
+        "title": extracted.get("title", ""),
+        "source_type": "web",
+        "language": "es"
+    }
+    if extracted.get("links"):
+        # enlaces de la página, para el crawler (el normalizador no los conserva)
+        metadata["links"] = extracted["links"]
+    return Document(page_content=extracted["text"], metadata=metadata)
+
+class SnapshotStore:
+    # una página por URL, comprimida en disco: cuerpo crudo (HTTP o renderizado por el navegador),
+    # validadores ETag/Last-Modified, momento de descarga, hash del contenido y texto extraído
+    def __init__(self, directory: Path, max_age_seconds: float = 0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_age_seconds = max_age_seconds
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{content_hash(url)}.json.gz"
+
+    def get(self, url: str) -> dict | None:
+        path = self._path(url)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Snapshot ilegible de {url}: {e}")
+            return None
+
+    def put(self, url: str, snapshot: dict) -> dict:
+        snapshot = {
+            "url": url,
+            "fetched_at": time.time(),
+            "content_hash": content_hash(snapshot.get("body", "")),
+            **snapshot
+        }
+        path = self._path(url)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_bytes(gzip.compress(json.dumps(snapshot, ensure_ascii=False).encode("utf-8")))
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el snapshot de {url}: {e}")
+        return snapshot
+
+    def is_fresh(self, snapshot: dict) -> bool:
+        return time.time() - snapshot.get("fetched_at", 0) <= self.max_age_seconds
+
+    @staticmethod
+    def same_content(snapshot: dict | None, body: str) -> bool:
+        # mismo contenido que la última descarga => el texto extraído sigue siendo válido
+        return bool(snapshot) and "extracted" in snapshot and snapshot.get("content_hash") == content_hash(body)
+
+@lru_cache()
+def get_snapshot_store() -> SnapshotStore | None:
+    settings = get_settings()
+    if not settings.web_snapshot_cache_enabled:
+        return None
+    return SnapshotStore(settings.web_snapshot_cache_path, settings.web_snapshot_max_age)
@@ -1,16 +1,26 @@
 import logging
+import queue
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from langchain_core.documents import Document
 from app.loaders.base import BaseLoader
+from app.loaders.crawler import HostRateLimiter, WebCrawler, extract_links, get_host_rate_limiter, remaining_time
+from app.loaders.http import HTTPLoader, parse_html
+from app.loaders.snapshots import SnapshotStore, get_snapshot_store, snapshot_document
+from app.config.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# estado de carga de la página: readyState, recursos de red cargados y tamaño del DOM
+STABILITY_SCRIPT = """
+    return [
+        document.readyState,
+        performance.getEntriesByType('resource').length,
+        document.body ? document.body.innerHTML.length : 0
+    ];
+"""
+
 class SeleniumURLLoaderWithWait:
     def __init__(
         self,
@@ -18,15 +28,36 @@ class SeleniumURLLoaderWithWait:
         wait_map: dict[str, tuple] | None = None,
         wait_time: int = 10,
         headless: bool = True,
-        arguments: List[str] | None = None
+        arguments: List[str] | None = None,
+        max_drivers: int = 1,
+        max_memory_mb: int | None = None,
+        driver_memory_mb: int = 350,
+        stable_time: float = 0.5,
+        poll_interval: float = 0.1,
+        store: SnapshotStore | None = None,
+        rate_limiter: HostRateLimiter | None = None,
+        deadline: float | None = None
     ):
         self.urls = urls
         self.wait_map = wait_map or {}
         self.wait_time = wait_time
         self.headless = headless
         self.arguments = arguments or []
+        self.max_drivers = max_drivers
+        self.max_memory_mb = max_memory_mb
+        self.driver_memory_mb = driver_memory_mb
+        self.stable_time = stable_time
+        self.poll_interval = poll_interval
+        self.store = store
+        self.rate_limiter = rate_limiter
+        # time.monotonic() límite del crawler: las esperas se acotan y las URLs restantes se omiten
+        self.deadline = deadline
+        self.skipped_urls: List[str] = []
+        self.timings: dict[str, float] = {}
 
     def _get_driver(self):
+        # selenium se importa sólo si hace falta el navegador (HTTP y snapshots no lo usan)
+        from selenium import webdriver
         options = webdriver.ChromeOptions()
         
         if self.headless:
@@ -55,92 +86,231 @@ class SeleniumURLLoaderWithWait:
         )
         return driver
 
-    def load(self) -> List[Document]:
-        documents = []
-        driver = None
+    def _wait_until_stable(self, driver, timeout: float):
+        # en lugar de un sleep fijo: espera a que el documento esté completo y que ni la red
+        # (recursos cargados) ni el DOM cambien durante stable_time segundos
+        deadline = time.monotonic() + timeout
+        last_state = None
+        stable_since = None
+
+        while time.monotonic() < deadline:
+            state = driver.execute_script(STABILITY_SCRIPT)
+            if not isinstance(state, (list, tuple)):
+                # el driver no permite medir estabilidad: se continúa sin esperar
+                return
+            now = time.monotonic()
+            if state[0] == "complete" and state == last_state:
+                if stable_since is None:
+                    stable_since = now
+                if now - stable_since >= self.stable_time:
+                    return
+            else:
+                stable_since = None
+            last_state = state
+            time.sleep(self.poll_interval)
 
+        logger.warning(f"La página no se estabilizó en {timeout}s, se extrae el contenido actual.")
+
+    def _load_url(self, driver, url: str) -> Document | None:
+        if remaining_time(self.deadline, self.wait_time) <= 0 or (
+            self.rate_limiter and not self.rate_limiter.wait(url, self.deadline)
+        ):
+            self.skipped_urls.append(url)
+            return None
+        logger.info(f"Cargando URL: {url}")
+        start = time.perf_counter()
         try:
-            driver = self._get_driver()
-
-            for url in self.urls:
-                logger.info(f"Cargando URL: {url}")
-                try:
-                    driver.get(url)
-
-                    wait_selector = self.wait_map.get(url)
-
-                    if wait_selector:
-                        # Espera extra para React
-                        logger.info(f"Esperando selector {wait_selector}...")
-                        WebDriverWait(driver, self.wait_time).until(
-                            EC.presence_of_element_located(wait_selector)
-                        )
-                        time.sleep(2) 
-                    else:
-                        # Espera mínima para carga básica
-                        logger.info(f"No se requiere espera")
-                        driver.implicitly_wait(2)
-
-                    # Parseo manual
-                    page_source = driver.page_source
-                    soup = BeautifulSoup(page_source, "html.parser")
-
-                    # Eliminar scripts y estilos que meten ruido
-                    for script in soup(["script", "style", "noscript", "svg"]):
-                        script.extract()
-
-                    text = soup.get_text(separator="\n", strip=True)
-
-                    if text:
-                        metadata = {
-                            "source": url,
-                            "title": driver.title,
-                            "source_type": "web",
-                            "language": "es" 
-                        }
-                        docs = [Document(page_content=text, metadata=metadata)]
-                        documents.extend(docs)
-                        logger.info(f"Contenido de {url} extraído.")
-                    else:
-                        logger.warning(f"Contenido vacío en {url}")
-
-                except Exception as e:
-                    logger.error(f"Error en {url}: {type(e).__name__}: {e}")
-                    continue
+            if self.deadline is not None:
+                # sin esto driver.get puede bloquear hasta 300 s (timeout por defecto de Chrome)
+                driver.set_page_load_timeout(max(1, self.deadline - time.monotonic()))
+            driver.get(url)
+            wait_time = remaining_time(self.deadline, self.wait_time)
+
+            wait_selector = self.wait_map.get(url)
+
+            if wait_selector:
+                logger.info(f"Esperando selector {wait_selector}...")
+                from selenium.webdriver.support.ui import WebDriverWait
+                from selenium.webdriver.support import expected_conditions as EC
+                WebDriverWait(driver, max(0, wait_time)).until(
+                    EC.presence_of_element_located(wait_selector)
+                )
+            # espera extra para React: red y DOM estables
+            self._wait_until_stable(driver, remaining_time(self.deadline, self.wait_time))
+
+            page_source = driver.page_source
+            cached = self.store.get(url) if self.store else None
+            if self.store and self.store.same_content(cached, page_source):
+                logger.info(f"{url} renderizada igual que en el snapshot, se reutiliza el texto extraído.")
+                extracted = cached["extracted"]
+            else:
+                # Parseo manual
+                _, text, _ = parse_html(page_source)
+                extracted = {
+                    "title": driver.title,
+                    "text": text,
+                    "links": extract_links(page_source, url)
+                } if text else None
+            if self.store:
+                self.store.put(url, {"renderer": "browser", "body": page_source, "extracted": extracted})
+
+            doc = snapshot_document(url, {"extracted": extracted})
+            if doc is None:
+                logger.warning(f"Contenido vacío en {url}")
+                return None
+
+            logger.info(f"Contenido de {url} extraído.")
+            return doc
+
+        except Exception as e:
+            logger.error(f"Error en {url}: {type(e).__name__}: {e}")
+            return None
 
         finally:
-            if driver:
-                driver.quit()
+            self.timings[url] = round((time.perf_counter() - start) * 1000, 2)
+            logger.info(f"Tiempo de carga de {url}: {self.timings[url]} ms")
+
+    def _pool_size(self) -> int:
+        size = min(self.max_drivers, len(self.urls))
+        if self.max_memory_mb:
+            # cada Chrome headless ocupa ~driver_memory_mb: el pool no supera el tope de memoria
+            size = min(size, self.max_memory_mb // self.driver_memory_mb)
+        return max(1, size)
 
-        return documents
+    def load(self) -> List[Document]:
+        self.timings = {}
+        self.skipped_urls = []
+        results: dict[int, Document] = {}
+        pending: queue.Queue = queue.Queue()
+        for position, url in enumerate(self.urls):
+            pending.put((position, url))
+
+        def worker():
+            # cada hilo usa su propio driver y toma URLs de la cola hasta vaciarla
+            driver = None
+            try:
+                driver = self._get_driver()
+                while True:
+                    try:
+                        position, url = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    doc = self._load_url(driver, url)
+                    if doc is not None:
+                        results[position] = doc
+            finally:
+                if driver:
+                    driver.quit()
+
+        start = time.perf_counter()
+        pool_size = self._pool_size()
+        if pool_size == 1:
+            worker()
+        else:
+            logger.info(f"Cargando {len(self.urls)} URLs con {pool_size} navegadores...")
+            with ThreadPoolExecutor(max_workers=pool_size) as executor:
+                futures = [executor.submit(worker) for _ in range(pool_size)]
+            errors = [f.exception() for f in futures if f.exception() is not None]
+            for error in errors:
+                logger.error(f"Error iniciando navegador: {type(error).__name__}: {error}")
+            if len(errors) == pool_size:
+                raise errors[0]
+
+        if self.skipped_urls:
+            logger.warning(f"Presupuesto de tiempo agotado: {len(self.skipped_urls)} URLs sin cargar en el navegador.")
+        if self.timings:
+            slowest = max(self.timings, key=self.timings.get)
+            logger.info(
+                f"Carga web: {len(self.urls)} URLs en {(time.perf_counter() - start) * 1000:.0f} ms "
+                f"(más lenta: {slowest}, {self.timings[slowest]} ms)"
+            )
+
+        # orden determinista: el de la lista de URLs
+        return [results[position] for position in sorted(results)]
 
 class WebLoader(BaseLoader):
     def __init__(self, urls: List[str]):
         self.urls = urls
 
     def load(self) -> List[Document]:
-        wait_map = {
-            self.urls[0]: (By.TAG_NAME, "body"),
-            self.urls[1]: (By.TAG_NAME, "body"),
-        }
-        
-        loader = SeleniumURLLoaderWithWait(
-            urls=self.urls,
-            wait_time=20,
-            wait_map=wait_map,
-            headless=True,
-            arguments=[
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-gpu",
-                "--window-size=1920,1080",
-                "--ignore-certificate-errors"
-            ]
+        settings = get_settings()
+        if not settings.web_crawl:
+            return self.load_urls(self.urls)
+
+        # las URLs configuradas son semillas: se siguen los enlaces del mismo sitio
+        crawler = WebCrawler(
+            seeds=self.urls,
+            fetch=self.load_urls,
+            max_depth=settings.web_crawl_max_depth,
+            max_pages=settings.web_crawl_max_pages,
+            time_budget=settings.web_crawl_time_budget,
+            batch_size=settings.web_http_max_concurrency,
+            use_sitemap=settings.web_crawl_use_sitemap and not settings.web_offline
         )
-        return loader.load()
+        return crawler.crawl()
+
+    def load_urls(self, urls: List[str], deadline: float | None = None) -> List[Document]:
+        settings = get_settings()
+        store = get_snapshot_store()
+        rate_limiter = get_host_rate_limiter()
+        docs: List[Document] = []
+        pending: List[str] = []
+
+        # snapshots dentro de la ventana de frescura (o cualquiera, en modo offline): sin red
+        for url in urls:
+            snapshot = store.get(url) if store else None
+            doc = None
+            if snapshot and (settings.web_offline or store.is_fresh(snapshot)):
+                doc = snapshot_document(url, snapshot)
+            if doc is not None:
+                docs.append(doc)
+            elif settings.web_offline:
+                logger.warning(f"Modo offline: no hay snapshot de {url}, se omite.")
+            else:
+                pending.append(url)
+        if docs:
+            logger.info(f"{len(docs)}/{len(urls)} URLs servidas desde snapshots.")
+
+        browser_urls = pending
+        if pending and settings.web_http_first:
+            # primero HTTP; el navegador sólo para las páginas configuradas o detectadas como JS
+            js_rendered = set(settings.web_js_rendered_urls)
+            http_loader = HTTPLoader(
+                [url for url in pending if url not in js_rendered],
+                store=store,
+                rate_limiter=rate_limiter,
+                deadline=deadline
+            )
+            docs.extend(http_loader.load())
+            fallback = set(http_loader.fallback_urls)
+            browser_urls = [url for url in pending if url in js_rendered or url in fallback]
+
+        if browser_urls:
+            # sin selectores por URL: cada página se espera hasta que la red y el DOM se estabilizan
+            loader = SeleniumURLLoaderWithWait(
+                urls=browser_urls,
+                wait_time=20,
+                headless=True,
+                max_drivers=settings.web_max_drivers,
+                max_memory_mb=settings.web_max_memory_mb,
+                store=store,
+                rate_limiter=rate_limiter,
+                deadline=deadline,
+                arguments=[
+                    "--no-sandbox",
+                    "--disable-dev-shm-usage",
+                    "--disable-gpu",
+                    "--window-size=1920,1080",
+                    "--ignore-certificate-errors"
+                ]
+            )
+            docs.extend(loader.load())
+
+        # mismo orden que la lista de URLs, sin importar qué camino usó cada una
+        order = {url: position for position, url in enumerate(urls)}
+        return sorted(docs, key=lambda doc: order.get(doc.metadata.get("source"), len(order)))
 
 if __name__ == "__main__":
-    from app.config.config import get_settings
     settings = get_settings()
 
     if settings.urls:
@@ -1,22 +1,34 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
+import json
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import JSONResponse
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
+from sse_starlette.sse import EventSourceResponse
 
-from langserve import add_routes
 from langchain_core.runnables import RunnableLambda
+from langchain_core.language_models.chat_models import BaseChatModel
 from app.models.chat_models import ChatQuestion, ChatResponse
 
 from app.embedding_models.factory import get_embeddings
+from app.embedding_models.cache import CachedQueryEmbeddings
+from app.embedding_models.huggingface import hugging_face_load_stats, warmup_hugging_face_embeddings
 from app.chat_models.factory import get_chat_model
+from app.chat_models.ollama import get_ollama_session
 
 from app.services.data_service import DataIngestionService
 from app.services.chat_service import ChatService
+from app.services.registry import ChatServiceRegistry
+from app.services.semantic_cache import build_semantic_cache
+from app.services.retrieval_cache import build_retrieval_cache
+from app.chat_models.pool import get_chat_model_pool
+from app.services.memory import process_memory
+from app.services.docstore import SQLiteDocstore
 
 from app.config.config import get_settings
 settings = get_settings()
@@ -27,22 +39,40 @@ logger = logging.getLogger(__name__)
 
 # variable global para el vector store
 vector_store = None
+# servicios de chat reutilizados entre requests
+chat_service_registry = None
+# referencia a la precarga de Ollama (evita que el task sea recolectado)
+ollama_preload_task = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # INICIALIZACIÓN DE SERVICIOS
-    global vector_store
+    global vector_store, chat_service_registry, ollama_preload_task
     try:
         embeddings = get_embeddings()
         if embeddings is None:
             raise ValueError("Modelo de embeddings no soportado.")
+        if settings.embedding_warmup:
+            # el modelo se carga antes de aceptar requests y no en la primera consulta
+            warmup_hugging_face_embeddings()
         data_service = DataIngestionService(embeddings)
         vector_store = data_service.load_vector_store()
+        chat_service_registry = ChatServiceRegistry(
+            vector_store,
+            index_version=data_service.index_version,
+            semantic_cache=build_semantic_cache(embeddings),
+            retrieval_cache=build_retrieval_cache()
+        )
+        chat_service_registry.warmup(["groq", "gemini"] + (["ollama"] if settings.enable_ollama else []))
 
         logger.info("Vector store cargado correctamente.")
     except Exception as e:
         logger.error(f"Error al cargar los servicios: {e}")
         raise
+
+    if settings.enable_ollama and settings.ollama_preload:
+        # en segundo plano: la API queda disponible mientras Ollama carga el modelo
+        ollama_preload_task = asyncio.create_task(get_ollama_session().apreload())
     
     yield
 
@@ -65,6 +95,21 @@ app.add_middleware(
 def health_check():
     return {"status": "ok", "service": "ChatBot RAG API"}
 
+@app.get("/api/stats", response_class=JSONResponse)
+def stats():
+    semantic_cache = chat_service_registry.semantic_cache if chat_service_registry else None
+    retrieval_cache = chat_service_registry.retrieval_cache if chat_service_registry else None
+    embeddings = get_embeddings()
+    return {
+        "semantic_cache": semantic_cache.stats() if semantic_cache else None,
+        "retrieval_cache": retrieval_cache.stats() if retrieval_cache else None,
+        "query_embedding_cache": embeddings.stats() if isinstance(embeddings, CachedQueryEmbeddings) else None,
+        "embedding_model": hugging_face_load_stats(),
+        "chat_model_pool": get_chat_model_pool().stats(),
+        "docstore": vector_store.docstore.stats() if vector_store and isinstance(vector_store.docstore, SQLiteDocstore) else None,
+        "process_memory": process_memory()
+    }
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatQuestion):
     if request.model_provider == "ollama" and not settings.enable_ollama:
@@ -84,9 +129,9 @@ async def chat_endpoint(request: ChatQuestion):
                 detail=f"No se pudo iniciar {request.model_provider}. Verifique su API Key."
             )
 
-        chat_service = ChatService(vector_store, chat_model)
+        chat_service = chat_service_registry.get(request.model_provider)
 
-        response = chat_service.chat(request.question)
+        response = await chat_service.achat(request.question, chat_model)
 
         return ChatResponse(response=response)
 
@@ -97,9 +142,40 @@ async def chat_endpoint(request: ChatQuestion):
         logger.error(f"Error en el endpoint de chat: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(request: ChatQuestion):
+    if request.model_provider == "ollama" and not settings.enable_ollama:
+        raise HTTPException(
+            status_code=400,
+            detail="Ollama sólo está habilitado localmente."
+        )
+
+    chat_model = get_chat_model(
+        chat_model=request.model_provider,
+        user_api_key=request.api_key
+    )
+    if chat_model is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No se pudo iniciar {request.model_provider}. Verifique su API Key."
+        )
+
+    chat_service = chat_service_registry.get(request.model_provider)
+
+    async def event_generator():
+        try:
+            async for event, payload in chat_service.astream_chat(request.question, chat_model):
+                yield {"event": event, "data": json.dumps(payload, ensure_ascii=False)}
+        except Exception as e:
+            # la respuesta ya comenzó: el error se informa como evento, no como status HTTP
+            logger.error(f"Error en el streaming de chat: {e}")
+            yield {"event": "error", "data": json.dumps({"detail": str(e)}, ensure_ascii=False)}
+
+    return EventSourceResponse(event_generator())
+
 # SERVIDOR LANGSERVE
-def rag_chain(request: ChatQuestion | dict) -> ChatResponse:
-    if vector_store is None:
+def _build_rag_service(request: ChatQuestion | dict) -> tuple[ChatService, BaseChatModel, str]:
+    if vector_store is None or chat_service_registry is None:
         raise RuntimeError("Vector store no está disponible. Espera a que la aplicación inicie.")
 
     if isinstance(request, dict):
@@ -121,20 +197,31 @@ def rag_chain(request: ChatQuestion | dict) -> ChatResponse:
     if chat_model is None:
         raise ValueError("Modelo de chat no soportado.")
 
-    chat_service = ChatService(vector_store, chat_model)
-    response = chat_service.chat(question)
+    return chat_service_registry.get(model_provider), chat_model, question
+
+def rag_chain(request: ChatQuestion | dict) -> ChatResponse:
+    chat_service, chat_model, question = _build_rag_service(request)
+    response = chat_service.chat(question, chat_model)
+    return ChatResponse(response=response)
+
+async def arag_chain(request: ChatQuestion | dict) -> ChatResponse:
+    chat_service, chat_model, question = _build_rag_service(request)
+    response = await chat_service.achat(question, chat_model)
     return ChatResponse(response=response)
 
-rag = RunnableLambda(rag_chain).with_types(
+rag = RunnableLambda(rag_chain, afunc=arag_chain).with_types(
     input_type=ChatQuestion,
     output_type=ChatResponse
 )
 
-add_routes(
-    app,
-    rag,
-    path="/rag",
-)
+if settings.langserve_enabled:
+    # langserve es lo más pesado de importar en el arranque: sólo se carga si se expone /rag
+    from langserve import add_routes
+    add_routes(
+        app,
+        rag,
+        path="/rag",
+    )
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=settings.port, reload=True)
\ No newline at end of file
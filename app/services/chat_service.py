@@ -1,21 +1,58 @@
-from typing import List
+from typing import AsyncIterator, Hashable, List
 from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.retrievers import BaseRetriever
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_community.vectorstores import FAISS
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
 from textwrap import dedent
+import asyncio
 import re
+import time
 import logging
 from app.config.config import get_settings
+from app.services.think_filter import ThinkBlockFilter
+from app.services.semantic_cache import SemanticCache
+from app.services.retrieval_cache import RetrievalCache
+from app.embedding_models.cache import CachedQueryEmbeddings
 
 logger = logging.getLogger(__name__)
 
+NO_CONTEXT_RESPONSE = "Lo siento, no tengo información disponible para responder a su pregunta."
+
+@lru_cache()
+def get_retrieval_executor() -> ThreadPoolExecutor:
+    # pool acotado para que el retrieval no bloquee el event loop ni lance hilos sin límite
+    return ThreadPoolExecutor(
+        max_workers=get_settings().retrieval_max_workers,
+        thread_name_prefix="retrieval"
+    )
+
 class ChatService:
-    def __init__(self, vector_store: FAISS, chat_model: BaseChatModel):
+    def __init__(
+        self,
+        vector_store: FAISS,
+        chat_model: BaseChatModel | None = None,
+        generation_limiter: asyncio.Semaphore | None = None,
+        semantic_cache: SemanticCache | None = None,
+        cache_scope: Hashable = None,
+        retrieval_cache: RetrievalCache | None = None,
+        index_version: str = "0"
+    ):
         self.settings = get_settings()
         self.vector_store: FAISS = vector_store
-        self.chat_model: BaseChatModel = chat_model
+        # modelo por defecto; con el registry de servicios se pasa en cada llamada (API key del request)
+        self.chat_model: BaseChatModel | None = chat_model
+        # limita las generaciones concurrentes (p. ej. slots paralelos de Ollama)
+        self.generation_limiter = generation_limiter
+        # respuestas previas por (proveedor, modelo, versión del índice)
+        self.semantic_cache = semantic_cache
+        self.cache_scope = cache_scope
+        # documentos recuperados por consulta, compartido entre proveedores
+        self.retrieval_cache = retrieval_cache
+        self.index_version = index_version
         self.retriever: BaseRetriever = self._build_retriever()
         self.prompt: ChatPromptTemplate = self._build_prompt()
 
@@ -29,10 +66,44 @@ class ChatService:
             }
         )
     
+    def _retrieval_key(self, query: str) -> tuple:
+        return (
+            CachedQueryEmbeddings.normalize_query(query),
+            self.settings.mmr_k,
+            self.settings.mmr_fetch_k,
+            self.settings.mmr_lambda_mult
+        )
+
+    def _docs_from_ids(self, doc_ids: List[str]) -> List[Document] | None:
+        docs = []
+        for doc_id in doc_ids:
+            doc = self.vector_store.docstore.search(doc_id)
+            if not isinstance(doc, Document):
+                return None
+            docs.append(doc)
+        return docs
+
     def retrieve(self, query: str) -> List[Document]:
+        if self.retrieval_cache is not None:
+            key = self._retrieval_key(query)
+            doc_ids = self.retrieval_cache.get(key, self.index_version)
+            if doc_ids is not None:
+                docs = self._docs_from_ids(doc_ids)
+                if docs is not None:
+                    logger.info("Documentos recuperados desde el cache de retrieval.")
+                    return docs
+
         logger.info("Recuperando documentos...")
         relevant_docs = self.retriever.invoke(query)
+
+        if self.retrieval_cache is not None and all(doc.id for doc in relevant_docs):
+            self.retrieval_cache.put(key, self.index_version, [doc.id for doc in relevant_docs])
         return relevant_docs
+
+    async def aretrieve(self, query: str) -> List[Document]:
+        # embedding de la consulta + búsqueda FAISS/MMR son CPU-bound: van al executor acotado
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_retrieval_executor(), self.retrieve, query)
     
     def _build_prompt(self) -> ChatPromptTemplate:
         system_template = dedent("""
@@ -65,12 +136,28 @@ class ChatService:
             doc.page_content for doc in docs if doc.page_content
         )
     
-    def generate_response(self, question: str, context: str) -> str:
+    def _resolve_chat_model(self, chat_model: BaseChatModel | None) -> BaseChatModel:
+        chat_model = chat_model or self.chat_model
+        if chat_model is None:
+            raise ValueError("No se proporcionó un modelo de chat.")
+        return chat_model
+
+    def generate_response(self, question: str, context: str, chat_model: BaseChatModel | None = None) -> str:
         messages = self.prompt.format_messages(
             context=context,
             question=question
         )
-        response = self.chat_model.invoke(messages)
+        response = self._resolve_chat_model(chat_model).invoke(messages)
+        return response.content
+
+    async def agenerate_response(self, question: str, context: str, chat_model: BaseChatModel | None = None) -> str:
+        messages = self.prompt.format_messages(
+            context=context,
+            question=question
+        )
+        chat_model = self._resolve_chat_model(chat_model)
+        async with self.generation_limiter or nullcontext():
+            response = await chat_model.ainvoke(messages)
         return response.content
     
     @staticmethod
@@ -78,31 +165,146 @@ class ChatService:
         #eliminar bloques <think>
         return re.sub(r"<think>.*?</think>", "", response, flags=re.DOTALL).strip()
     
-    def chat(self, question: str) -> str:
+    def build_context(self, docs: List[Document]) -> str:
+        context = self.format_docs(docs)
+        if len(context) > self.settings.max_context_length:
+            context = context[: self.settings.max_context_length]
+            logger.info("Contexto truncado a la longitud máxima.")
+        return context
+
+    def chat(self, question: str, chat_model: BaseChatModel | None = None) -> str:
         logger.info("Procesando la pregunta...")
+
+        cache_vector = None
+        if self.semantic_cache is not None:
+            cache_vector = self.semantic_cache.embed(question)
+            cached = self.semantic_cache.lookup(cache_vector, self.cache_scope)
+            if cached is not None:
+                return cached
         
         relevant_docs = self.retrieve(question)
         if not relevant_docs:
-            return "Lo siento, no tengo información disponible para responder a su pregunta."
+            return NO_CONTEXT_RESPONSE
         
-        context = self.format_docs(relevant_docs)
-        if len(context) > self.settings.max_context_length:
-            context = context[: self.settings.max_context_length]
-            logger.info("Contexto truncado a la longitud máxima.")
+        context = self.build_context(relevant_docs)
 
-        response = self.generate_response(question, context)
+        response = self.generate_response(question, context, chat_model)
         response = self.format_response(response)
+        if cache_vector is not None:
+            self.semantic_cache.store(cache_vector, question, response, self.cache_scope)
         return response
 
+    async def _alookup_cache(self, question: str):
+        # el embedding de la pregunta es CPU-bound (o una llamada bloqueante): va al executor
+        if self.semantic_cache is None:
+            return None, None
+        loop = asyncio.get_running_loop()
+        cache_vector = await loop.run_in_executor(get_retrieval_executor(), self.semantic_cache.embed, question)
+        return cache_vector, self.semantic_cache.lookup(cache_vector, self.cache_scope)
+
+    async def achat(self, question: str, chat_model: BaseChatModel | None = None) -> str:
+        logger.info("Procesando la pregunta (async)...")
+
+        cache_vector, cached = await self._alookup_cache(question)
+        if cached is not None:
+            return cached
+
+        relevant_docs = await self.aretrieve(question)
+        if not relevant_docs:
+            return NO_CONTEXT_RESPONSE
+
+        context = self.build_context(relevant_docs)
+
+        response = await self.agenerate_response(question, context, chat_model)
+        response = self.format_response(response)
+        if cache_vector is not None:
+            self.semantic_cache.store(cache_vector, question, response, self.cache_scope)
+        return response
+
+    async def astream_chat(
+        self,
+        question: str,
+        chat_model: BaseChatModel | None = None
+    ) -> AsyncIterator[tuple[str, dict]]:
+        # eventos (nombre, payload): "retrieval" -> "token"* -> "end"
+        logger.info("Procesando la pregunta (streaming)...")
+        chat_model = self._resolve_chat_model(chat_model)
+        start = time.perf_counter()
+
+        cache_vector, cached = await self._alookup_cache(question)
+        if cached is not None:
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+            yield "retrieval", {"documents": 0, "retrieval_ms": elapsed_ms, "cached": True}
+            yield "token", {"text": cached}
+            yield "end", {
+                "chunks": 1,
+                "reasoning_tokens": 0,
+                "retrieval_ms": elapsed_ms,
+                "first_token_ms": elapsed_ms,
+                "total_ms": elapsed_ms,
+                "cached": True
+            }
+            return
+
+        relevant_docs = await self.aretrieve(question)
+        retrieval_ms = (time.perf_counter() - start) * 1000
+        yield "retrieval", {
+            "documents": len(relevant_docs),
+            "retrieval_ms": round(retrieval_ms, 2)
+        }
+
+        chunks = 0
+        first_token_ms = None
+        think_filter = ThinkBlockFilter()
+        answer = []
+        if not relevant_docs:
+            chunks = 1
+            yield "token", {"text": NO_CONTEXT_RESPONSE}
+        else:
+            context = self.build_context(relevant_docs)
+            messages = self.prompt.format_messages(
+                context=context,
+                question=question
+            )
+            async with self.generation_limiter or nullcontext():
+                async for chunk in chat_model.astream(messages):
+                    # los bloques <think> se filtran al vuelo: el texto visible sale sin esperar al razonamiento
+                    text = think_filter.feed(chunk.content)
+                    if not text:
+                        continue
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start) * 1000
+                    chunks += 1
+                    answer.append(text)
+                    yield "token", {"text": text}
+
+            tail = think_filter.flush()
+            if tail:
+                chunks += 1
+                answer.append(tail)
+                yield "token", {"text": tail}
+
+            if cache_vector is not None:
+                self.semantic_cache.store(cache_vector, question, "".join(answer), self.cache_scope)
+
+        yield "end", {
+            "chunks": chunks,
+            "reasoning_tokens": think_filter.reasoning_tokens,
+            "retrieval_ms": round(retrieval_ms, 2),
+            "first_token_ms": round(first_token_ms, 2) if first_token_ms is not None else None,
+            "total_ms": round((time.perf_counter() - start) * 1000, 2),
+            "cached": False
+        }
+
 if __name__ == "__main__":
     from dotenv import load_dotenv
     load_dotenv()
     from app.chat_models.groq import get_groq
     from app.chat_models.gemini import get_gemini
     from app.services.data_service import DataIngestionService
-    from app.embedding_models.huggingface import hugging_face_embeddings
+    from app.embedding_models.huggingface import get_hugging_face_embeddings
 
-    data_service = DataIngestionService(hugging_face_embeddings)
+    data_service = DataIngestionService(get_hugging_face_embeddings())
     vector_store = data_service.load_vector_store()
 
     chat_service = ChatService(
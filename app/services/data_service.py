@@ -1,17 +1,81 @@
-from typing import List
+from threading import Event, Thread
+from typing import Iterable, Iterator, List, TypeVar
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from app.loaders.loader import load_documents
+from app.loaders.loader import load_documents, iter_documents
+from app.embedding_models.cache import unwrap_embeddings, model_name_of, is_hugging_face, is_gemini
+from app.embedding_models.disk_cache import DiskEmbeddingCache, CachedDocumentEmbeddings
+from app.embedding_models.batching import build_ingestion_embeddings
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
+from app.services.docstore import DOCSTORE_FILE, SQLiteDocstore, write_sqlite_docstore
+from app.services.memory import log_process_memory
+from app.services.vector_index import (
+    LOSSLESS_INDEX_TYPES, build_index, choose_index_type, configure_search, index_type_of, reconstruct_all, to_flat
+)
 from uuid import uuid4
+from datetime import datetime, timezone
+from pathlib import Path
+import hashlib
+import json
 import logging
+import os
+import pickle
+import queue
+import shutil
+import sys
+import time
 from app.config.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+STORE_META_FILE = "store_meta.json"
+INDEX_NAME = "index"
+MANIFEST_FILE = "manifest.json"
+
+T = TypeVar("T")
+
+def prefetch(items: Iterable[T], max_items: int) -> Iterator[T]:
+    # el productor (carga + chunking) corre en un hilo y se adelanta como mucho max_items
+    # elementos al consumidor (embeddings); si el consumidor se atrasa, el productor espera
+    buffer: queue.Queue = queue.Queue(maxsize=max(1, max_items))
+    stop = Event()
+    done = object()
+
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            put((done, e))
+            return
+        put((done, None))
+
+    producer = Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
 class DataIngestionService:
     def __init__(self, embeddings: Embeddings):
         self.settings = get_settings()
@@ -24,11 +88,14 @@ class DataIngestionService:
             separators=["\n\n", "\n", " ", ""]
         )
         self._vector_store = None
+        self._index_version: str | None = None
 
     def _set_persist_path(self):
-        if isinstance(self._embeddings, HuggingFaceEmbeddings):
+        # el cache de consultas envuelve al modelo: la persistencia depende del modelo real
+        embeddings = unwrap_embeddings(self._embeddings)
+        if is_hugging_face(embeddings):
             return self.settings.persist_path_huggingface
-        elif isinstance(self._embeddings, GoogleGenerativeAIEmbeddings):
+        elif is_gemini(embeddings):
             return self.settings.persist_path_gemini
         else:
             logger.error("Tipo de embeddings no soportado para persistencia.")
@@ -39,7 +106,137 @@ class DataIngestionService:
         chunks = self._text_splitter.split_documents(all_docs)
         return all_docs, chunks
 
-    def vectorize(self) -> FAISS:
+    @staticmethod
+    def chunk_id(chunk: Document) -> str:
+        # ID determinista: mismo origen + posición + contenido => mismo ID entre ejecuciones
+        content_hash = hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()
+        key = "|".join([
+            str(chunk.metadata.get("source", "")),
+            str(chunk.metadata.get("page", "")),
+            str(chunk.metadata.get("start_index", "")),
+            content_hash
+        ])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _ingestion_embeddings(self) -> Embeddings:
+        # para la ingesta: lotes / varios procesos / reintentos según el modelo y, delante,
+        # el cache en disco (los chunks cuyo texto ya fue embebido no llegan al modelo)
+        cache = None
+        if self.settings.embedding_cache_enabled:
+            cache = DiskEmbeddingCache(
+                self.settings.embedding_cache_path,
+                model_name_of(unwrap_embeddings(self._embeddings))
+            )
+        embeddings = build_ingestion_embeddings(unwrap_embeddings(self._embeddings), self.settings, checkpoint=cache)
+        if cache is None:
+            return embeddings
+        return CachedDocumentEmbeddings(embeddings, cache)
+
+    @staticmethod
+    def _close_embeddings(embeddings: Embeddings):
+        # libera el pool de procesos de embeddings, si lo hay
+        while embeddings is not None:
+            close = getattr(embeddings, "close", None)
+            if callable(close):
+                close()
+                return
+            embeddings = getattr(embeddings, "underlying", None)
+
+    @staticmethod
+    def _texts_per_call(embeddings: Embeddings) -> int:
+        # textos que necesita el modelo por llamada para aprovechar su concurrencia, si lo declara
+        while embeddings is not None:
+            texts_per_call = getattr(embeddings, "texts_per_call", None)
+            if callable(texts_per_call):
+                return texts_per_call()
+            embeddings = getattr(embeddings, "underlying", None)
+        return 0
+
+    def iter_chunks(self) -> Iterator[Document]:
+        # documento por documento: nunca se materializa el corpus completo
+        for doc in iter_documents(self.settings.file_path):
+            yield from self._text_splitter.split_documents([doc])
+
+    def _iter_chunk_batches(self, batch_size: int) -> Iterator[dict[str, Document]]:
+        # lotes de chunks únicos por ID; en memoria sólo quedan los IDs ya vistos
+        seen: set[str] = set()
+        batch: dict[str, Document] = {}
+        for chunk in self.iter_chunks():
+            chunk_id = self.chunk_id(chunk)
+            if chunk_id in seen:
+                continue
+            seen.add(chunk_id)
+            batch[chunk_id] = chunk
+            if len(batch) >= batch_size:
+                yield batch
+                batch = {}
+        if batch:
+            yield batch
+
+    def _chunk_batches(self, embeddings: Embeddings) -> Iterator[dict[str, Document]]:
+        # con Gemini, lotes de al menos batch_size * concurrencia textos: si no, nunca hay
+        # tantos requests en vuelo como permite la concurrencia
+        batch_size = max(self.settings.ingestion_batch_size, self._texts_per_call(embeddings))
+        return prefetch(self._iter_chunk_batches(batch_size), self.settings.ingestion_prefetch_batches)
+
+    def _add_batch(self, batch: dict[str, Document], embeddings: Embeddings):
+        # embebe un lote y lo agrega al índice; el primer lote crea el vector store. Los chunks
+        # van directo al docstore en disco: en memoria sólo crecen los vectores y los IDs
+        texts = [chunk.page_content for chunk in batch.values()]
+        metadatas = [chunk.metadata for chunk in batch.values()]
+        ids = list(batch.keys())
+        text_embeddings = list(zip(texts, embeddings.embed_documents(texts)))
+        if self._vector_store is None:
+            import faiss
+            self._vector_store = FAISS(
+                self._embeddings,
+                faiss.IndexFlatL2(len(text_embeddings[0][1])),
+                self._open_staging_docstore(),
+                {}
+            )
+        self._vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+
+    def _open_staging_docstore(self, source: Path | None = None) -> SQLiteDocstore:
+        # copia de escritura del docstore para la ingesta, fuera del directorio que lee la API
+        path = self._persist_path.with_name(f"{self._persist_path.name}.{os.getpid()}.{DOCSTORE_FILE}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+        if source is not None:
+            shutil.copyfile(source, path)
+        return SQLiteDocstore(path, cache_size=0, read_only=False)
+
+    def _discard_staging_docstore(self):
+        docstore = self._vector_store.docstore
+        docstore.close()
+        docstore.path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _manifest_entry(chunk: Document) -> dict:
+        return {
+            "source": chunk.metadata.get("source"),
+            "page": chunk.metadata.get("page"),
+            "start_index": chunk.metadata.get("start_index")
+        }
+
+    def _read_manifest(self) -> dict[str, dict] | None:
+        try:
+            return json.loads((self._persist_path / MANIFEST_FILE).read_text())["chunks"]
+        except Exception:
+            return None
+
+    def _write_manifest(self, manifest: dict[str, dict]):
+        (self._persist_path / MANIFEST_FILE).write_text(json.dumps({"chunks": manifest}))
+
+    def vectorize(self, incremental: bool | None = None) -> FAISS:
+        if incremental is None:
+            incremental = self.settings.incremental_ingestion
+
+        manifest = self._read_manifest() if incremental and self._persist_path.exists() else None
+        if manifest is None:
+            return self._rebuild()
+        return self._update(manifest)
+
+    def _rebuild(self) -> FAISS:
         if self._persist_path.exists():
             logger.info("Eliminando vector store existente para recrearlo...")
             
@@ -50,24 +247,29 @@ class DataIngestionService:
             
             logger.info("Vector store eliminado. Recreando...")
         
-        # CARGA DE DATOS Y CHUNKING
-        loaded_docs, chunks = self.load_and_chunk()
-        if not loaded_docs:
+        # CARGA, CHUNKING Y ALMACENAMIENTO POR LOTES
+        self._vector_store = None
+        embeddings = self._ingestion_embeddings()
+        manifest: dict[str, dict] = {}
+        start = time.perf_counter()
+        try:
+            for batch in self._chunk_batches(embeddings):
+                self._add_batch(batch, embeddings)
+                manifest.update((chunk_id, self._manifest_entry(chunk)) for chunk_id, chunk in batch.items())
+                logger.info(f"Chunks indexados: {len(manifest)}")
+        finally:
+            self._close_embeddings(embeddings)
+
+        if self._vector_store is None:
             logger.warning("No se cargaron documentos.")
             raise
-        logger.info(f"Documentos cargados: {len(loaded_docs)}")
-        logger.info(f"Chunks generados: {len(chunks)}")
-        
-        # ALMACENAMIENTO
-        ids = [str(uuid4()) for _ in chunks]
-        self._vector_store = FAISS.from_documents(
-            documents=chunks, 
-            embedding=self._embeddings,
-            ids=ids
-        )
+        logger.info(f"Chunks generados: {len(manifest)} en {time.perf_counter() - start:.2f}s")
+        self._finalize_index()
         
         # PERSISTENCIA
-        self._vector_store.save_local(self._persist_path)
+        self._save_local()
+        self._write_manifest(manifest)
+        self._write_store_meta()
         
         self.print_vector_store_info()
 
@@ -77,29 +279,226 @@ class DataIngestionService:
 
         return self._vector_store
 
+    def _update(self, manifest: dict[str, dict]) -> FAISS:
+        # sólo se embeben los chunks nuevos y se eliminan los que ya no existen en el corpus
+        logger.info("Actualizando vector store de forma incremental...")
+        try:
+            self._vector_store = self._load_for_update()
+        except Exception as e:
+            logger.warning(f"No se pudo cargar el vector store existente ({e}). Recreando...")
+            return self._rebuild()
+
+        embeddings = self._ingestion_embeddings()
+        current: dict[str, dict] = {}
+        new_count = 0
+        try:
+            for batch in self._chunk_batches(embeddings):
+                new_chunks = {chunk_id: chunk for chunk_id, chunk in batch.items() if chunk_id not in manifest}
+                if new_chunks:
+                    self._add_batch(new_chunks, embeddings)
+                    new_count += len(new_chunks)
+                for chunk_id, chunk in batch.items():
+                    current[chunk_id] = manifest.get(chunk_id) or self._manifest_entry(chunk)
+        finally:
+            self._close_embeddings(embeddings)
+
+        if not current:
+            logger.warning("No se cargaron documentos.")
+            raise
+        removed_ids = [chunk_id for chunk_id in manifest if chunk_id not in current]
+        logger.info(f"Chunks nuevos: {new_count} | eliminados: {len(removed_ids)} | sin cambios: {len(current) - new_count}")
+
+        index_type = index_type_of(self._vector_store.index)
+        target_type = choose_index_type(len(current), self.settings)
+        if not new_count and not removed_ids and index_type == target_type:
+            self._discard_staging_docstore()
+            self._vector_store.docstore = self._saved_docstore()
+            self.print_vector_store_info()
+            return self._vector_store
+
+        if index_type not in LOSSLESS_INDEX_TYPES and (removed_ids or index_type != target_type):
+            # IVF-PQ guarda vectores comprimidos: no se puede borrar ni convertir sin perder precisión
+            logger.info(f"El índice {index_type} no conserva los vectores originales: se reconstruye (embeddings desde el cache).")
+            self._discard_staging_docstore()
+            return self._rebuild()
+
+        if removed_ids:
+            if index_type != "flat":
+                # HNSW e IVF no admiten borrar: se trabaja sobre una copia exacta y se reconstruye al final
+                self._vector_store.index = to_flat(self._vector_store.index)
+            self._vector_store.delete(removed_ids)
+        self._finalize_index()
+
+        # PERSISTENCIA
+        self._save_local()
+        self._write_manifest(current)
+        self._write_store_meta()
+
+        self.print_vector_store_info()
+
+        if self._vector_store.index.ntotal == 0:
+            logger.warning("El vector store quedó vacío tras la actualización.")
+            raise
+
+        return self._vector_store
+
+    def _finalize_index(self):
+        # los lotes se agregan a un índice exacto; al final se convierte al tipo elegido
+        # (entrenando IVF sobre una muestra) según la cantidad de chunks
+        index = self._vector_store.index
+        target_type = choose_index_type(index.ntotal, self.settings)
+        if index_type_of(index) != target_type:
+            self._vector_store.index = build_index(reconstruct_all(index), target_type, index.metric_type, self.settings)
+        else:
+            configure_search(index, self.settings)
+
+    def _load_for_update(self) -> FAISS:
+        # índice en memoria propia (uno mapeado es de sólo lectura) y copia de escritura del
+        # docstore: los chunks nunca se cargan todos en memoria
+        import faiss
+        docstore_path = self._persist_path / DOCSTORE_FILE
+        if not docstore_path.exists():
+            raise FileNotFoundError(docstore_path)
+        index = faiss.read_index(str(self._persist_path / f"{INDEX_NAME}.faiss"))
+        docstore = self._open_staging_docstore(docstore_path)
+        return FAISS(self._embeddings, index, docstore, docstore.index_to_docstore_id())
+
+    def _saved_docstore(self) -> SQLiteDocstore:
+        return SQLiteDocstore(self._persist_path / DOCSTORE_FILE, cache_size=self.settings.docstore_cache_size)
+
+    def _load_local(self, mmap: bool = False, sqlite_docstore: bool = False) -> FAISS:
+        docstore_path = self._persist_path / DOCSTORE_FILE
+        if sqlite_docstore and not docstore_path.exists():
+            logger.warning(f"No existe {DOCSTORE_FILE}: se usa el docstore pickle hasta la próxima ingesta.")
+            sqlite_docstore = False
+        if not mmap and not sqlite_docstore:
+            return FAISS.load_local(
+                self._persist_path,
+                self._embeddings,
+                index_name=INDEX_NAME,
+                allow_dangerous_deserialization=True
+            )
+
+        import faiss
+        flags = 0
+        if mmap:
+            # el índice se mapea de sólo lectura: varios workers del mismo host comparten las páginas
+            # físicas (page cache) en lugar de tener una copia cada uno; no admite agregar vectores
+            flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+        index = faiss.read_index(str(self._persist_path / f"{INDEX_NAME}.faiss"), flags)
+
+        if sqlite_docstore:
+            # sin pickle en la API: los chunks se leen de SQLite a medida que las búsquedas los piden
+            docstore = self._saved_docstore()
+            index_to_docstore_id = docstore.index_to_docstore_id()
+        else:
+            with open(self._persist_path / f"{INDEX_NAME}.pkl", "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+        return FAISS(self._embeddings, index, docstore, index_to_docstore_id)
+
+    def _save_local(self):
+        # se escribe en un directorio temporal y se reemplazan los archivos con rename: los
+        # workers que tienen el índice anterior mapeado siguen leyendo el archivo viejo
+        # (truncarlo en el lugar los haría fallar con SIGBUS)
+        import faiss
+        tmp_path = self._persist_path.with_name(f"{self._persist_path.name}.{os.getpid()}.tmp")
+        tmp_path.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(self._vector_store.index, str(tmp_path / f"{INDEX_NAME}.faiss"))
+        docstore = self._vector_store.docstore
+        docstore.write_positions(self._vector_store.index_to_docstore_id)
+        docstore.close()
+        os.replace(docstore.path, tmp_path / DOCSTORE_FILE)
+        if self.settings.docstore_backend == "pickle":
+            # el docstore pickle necesita todos los chunks en memoria al guardar y al cargar
+            exported = SQLiteDocstore(tmp_path / DOCSTORE_FILE, cache_size=0)
+            documents = exported.documents()
+            exported.close()
+            with open(tmp_path / f"{INDEX_NAME}.pkl", "wb") as f:
+                pickle.dump((InMemoryDocstore(documents), self._vector_store.index_to_docstore_id), f)
+        else:
+            # un pickle de una ingesta anterior quedaría desactualizado
+            (self._persist_path / f"{INDEX_NAME}.pkl").unlink(missing_ok=True)
+        self._persist_path.mkdir(parents=True, exist_ok=True)
+        for file in tmp_path.iterdir():
+            os.replace(file, self._persist_path / file.name)
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        # desde acá el vector store lee el docstore guardado, igual que la API
+        self._vector_store.docstore = self._saved_docstore()
+
+    def migrate_store(self) -> FAISS:
+        # vector stores guardados sólo con el pickle: genera docstore.sqlite y store_meta.json
+        # sin reembeber; los IDs del pickle no son IDs de chunk, así que no se escribe manifest
+        # y la próxima ingesta reconstruye el índice
+        self._vector_store = self._load_local(mmap=False)
+        write_sqlite_docstore(
+            self._persist_path / DOCSTORE_FILE,
+            self._vector_store.docstore._dict,
+            self._vector_store.index_to_docstore_id
+        )
+        self._write_store_meta()
+        self.print_vector_store_info()
+        return self._vector_store
+
     def print_vector_store_info(self):
         if self._vector_store is None:
             logger.warning("El vector store no ha sido inicializado.")
             return
         logger.info("--- INFORMACIÓN DEL VECTOR STORE ---")
-        logger.info(f"Modelo de Embeddings:\t{type(self._embeddings).__name__}")
+        logger.info(f"Modelo de Embeddings:\t{type(unwrap_embeddings(self._embeddings)).__name__}")
         logger.info(f"Almacenamiento:\t{self._persist_path}")
-        logger.info(f"Índice:\t\t{self._vector_store.index.ntotal}")
+        logger.info(f"Índice:\t\t{self._vector_store.index.ntotal} ({index_type_of(self._vector_store.index)})")
         logger.info(f"Dimensión:\t{self._vector_store.index.d}")
         logger.info("-------------------------------------")
 
+    @property
+    def index_version(self) -> str:
+        # identifica la generación del índice: cambia cada vez que se reconstruye el vector store
+        if self._index_version is None:
+            self._index_version = self._read_index_version()
+        return self._index_version
+
+    def _write_store_meta(self):
+        self._index_version = uuid4().hex
+        meta = {
+            "index_version": self._index_version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "embeddings": type(unwrap_embeddings(self._embeddings)).__name__
+        }
+        if self._vector_store is not None:
+            meta["index_type"] = index_type_of(self._vector_store.index)
+            meta["vectors"] = self._vector_store.index.ntotal
+        (self._persist_path / STORE_META_FILE).write_text(json.dumps(meta, indent=2))
+
+    def _read_index_version(self) -> str:
+        try:
+            meta = json.loads((self._persist_path / STORE_META_FILE).read_text())
+            return meta["index_version"]
+        except Exception:
+            pass
+        # vector stores creados antes de store_meta.json: se deriva del archivo del índice
+        try:
+            stat = (self._persist_path / "index.faiss").stat()
+            return hashlib.sha256(f"{stat.st_size}-{stat.st_mtime_ns}".encode()).hexdigest()[:32]
+        except Exception:
+            return "0"
+
     def load_vector_store(self) -> FAISS:
         if self._vector_store is not None:
             return self._vector_store
 
         if self._persist_path.exists():
-            logger.info(f"Cargando vector store desde: {self._persist_path}")
-            self._vector_store = FAISS.load_local(
-                self._persist_path,
-                self._embeddings,
-                allow_dangerous_deserialization=True
+            mmap = self.settings.vector_store_mmap
+            sqlite_docstore = self.settings.docstore_backend == "sqlite"
+            logger.info(
+                f"Cargando vector store desde: {self._persist_path} "
+                f"(índice {'mmap' if mmap else 'en memoria'}, docstore {self.settings.docstore_backend})"
             )
+            start = time.perf_counter()
+            self._vector_store = self._load_local(mmap=mmap, sqlite_docstore=sqlite_docstore)
+            configure_search(self._vector_store.index, self.settings)
+            logger.info(f"Vector store cargado en {time.perf_counter() - start:.2f}s.")
             self.print_vector_store_info()
+            log_process_memory("vector store cargado")
             return self._vector_store
         
         logger.info("El vector store aún no ha sido creado. Iniciando vectorización...")
@@ -109,9 +508,13 @@ if __name__ == "__main__":
     from dotenv import load_dotenv
     load_dotenv()
     # from app.embeddings.gemini import get_gemini_embeddings
-    from app.embedding_models.huggingface import hugging_face_embeddings
+    from app.embedding_models.huggingface import get_hugging_face_embeddings
     # embeddings = get_gemini_embeddings()
-    data_service = DataIngestionService(embeddings=hugging_face_embeddings)
+    data_service = DataIngestionService(embeddings=get_hugging_face_embeddings())
+    if "--migrate" in sys.argv:
+        # python -m app.services.data_service --migrate
+        data_service.migrate_store()
+        sys.exit(0)
     vector_store = data_service.vectorize()
     print("--- INFORMACION DEL PIPELINE ---")
     print(f"Fuente de datos          : {data_service.settings.file_path}")
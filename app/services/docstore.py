@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Union
+import json
+import logging
+import os
+import sqlite3
+import zlib
+from langchain_core.documents import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+
+logger = logging.getLogger(__name__)
+
+DOCSTORE_FILE = "docstore.sqlite"
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS documents (id TEXT PRIMARY KEY, content BLOB NOT NULL, metadata TEXT NOT NULL);
+    CREATE TABLE IF NOT EXISTS positions (position INTEGER PRIMARY KEY, id TEXT NOT NULL);
+"""
+
+def _document_row(doc_id: str, doc: Document) -> tuple:
+    return doc_id, zlib.compress(doc.page_content.encode("utf-8")), json.dumps(doc.metadata, ensure_ascii=False)
+
+def write_sqlite_docstore(path: Path, docs: Dict[str, Document], index_to_docstore_id: Dict[int, str]):
+    # una fila por chunk (texto comprimido + metadata en JSON) y la posición de cada vector en el índice
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    docstore = SQLiteDocstore(tmp_path, cache_size=0, read_only=False)
+    try:
+        docstore.add(docs)
+        docstore.write_positions(index_to_docstore_id)
+    finally:
+        docstore.close()
+    # reemplazo atómico: los workers con el archivo anterior abierto siguen leyéndolo
+    os.replace(tmp_path, path)
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    # docstore de sólo lectura para la API: en lugar de deserializar todo el pickle al iniciar,
+    # lee de SQLite sólo los chunks que devuelve cada búsqueda; los más consultados quedan
+    # en un LRU en memoria. Con read_only=False lo usa la ingesta: cada lote se escribe
+    # directo al archivo y en memoria sólo quedan los IDs del índice
+    def __init__(self, path: Path, cache_size: int = 1024, read_only: bool = True):
+        self.path = Path(path)
+        if read_only and not self.path.exists():
+            raise FileNotFoundError(self.path)
+        self.read_only = read_only
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, Document] = OrderedDict()
+        self._lock = Lock()
+        # una única conexión abierta al construirse: aunque una ingesta reemplace el archivo,
+        # todos los hilos siguen leyendo la misma generación que el índice cargado
+        # (las consultas se serializan con el lock)
+        if read_only:
+            self._connection = sqlite3.connect(
+                f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def _fetchall(self, query: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._connection.execute(query, params).fetchall()
+
+    def index_to_docstore_id(self) -> Dict[int, str]:
+        return dict(self._fetchall("SELECT position, id FROM positions ORDER BY position"))
+
+    def search(self, search: str) -> Union[str, Document]:
+        with self._lock:
+            doc = self._cache.get(search)
+            if doc is not None:
+                self._cache.move_to_end(search)
+                self.hits += 1
+                return doc
+            self.misses += 1
+
+        rows = self._fetchall("SELECT content, metadata FROM documents WHERE id = ?", (search,))
+        if not rows:
+            return f"ID {search} not found."
+        row = rows[0]
+        doc = Document(
+            id=search,
+            page_content=zlib.decompress(row[0]).decode("utf-8"),
+            metadata=json.loads(row[1])
+        )
+
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[search] = doc
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return doc
+
+    def _check_writable(self):
+        if self.read_only:
+            raise NotImplementedError("SQLiteDocstore abierto de sólo lectura.")
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        self._check_writable()
+        with self._lock:
+            try:
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT INTO documents VALUES (?, ?, ?)",
+                        (_document_row(doc_id, doc) for doc_id, doc in texts.items())
+                    )
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"Tried to add ids that already exist: {e}") from e
+
+    def delete(self, ids: List) -> None:
+        self._check_writable()
+        with self._lock:
+            with self._connection:
+                self._connection.executemany("DELETE FROM documents WHERE id = ?", ((doc_id,) for doc_id in ids))
+            for doc_id in ids:
+                self._cache.pop(doc_id, None)
+
+    def write_positions(self, index_to_docstore_id: Dict[int, str]) -> None:
+        # posición de cada vector en el índice; se escribe al guardar, junto con el índice
+        self._check_writable()
+        with self._lock:
+            with self._connection:
+                self._connection.execute("DELETE FROM positions")
+                self._connection.executemany("INSERT INTO positions VALUES (?, ?)", index_to_docstore_id.items())
+
+    def documents(self) -> Dict[str, Document]:
+        # todos los chunks en memoria: sólo para exportar el docstore pickle
+        rows = self._fetchall("SELECT id FROM documents")
+        return {doc_id: self.search(doc_id) for (doc_id,) in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        return self._fetchall("SELECT COUNT(*) FROM documents")[0][0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "max_size": self.cache_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
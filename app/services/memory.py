@@ -0,0 +1,32 @@
+from pathlib import Path
+import logging
+import os
+import resource
+import sys
+
+logger = logging.getLogger(__name__)
+
+PROC_STATUS = Path("/proc/self/status")
+
+def process_memory() -> dict:
+    # memoria residente del worker: la parte anónima es propia del proceso; la de archivos
+    # (p. ej. el índice FAISS mapeado) está en el page cache y la comparten los workers del host
+    memory = {"pid": os.getpid(), "rss_mb": None, "rss_anon_mb": None, "rss_file_mb": None}
+    try:
+        for line in PROC_STATUS.read_text().splitlines():
+            key, _, value = line.partition(":")
+            field = {"VmRSS": "rss_mb", "RssAnon": "rss_anon_mb", "RssFile": "rss_file_mb"}.get(key)
+            if field:
+                memory[field] = round(int(value.split()[0]) / 1024, 1)
+    except (OSError, ValueError):
+        # fuera de Linux sólo está el máximo histórico (KB en Linux, bytes en macOS)
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        memory["rss_mb"] = round(max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    return memory
+
+def log_process_memory(context: str):
+    memory = process_memory()
+    logger.info(
+        f"Memoria del worker {memory['pid']} ({context}): RSS {memory['rss_mb']} MB "
+        f"(anónima {memory['rss_anon_mb']} MB, archivos compartibles {memory['rss_file_mb']} MB)"
+    )
@@ -0,0 +1,59 @@
+from threading import Lock
+import logging
+from langchain_community.vectorstores import FAISS
+from app.chat_models.factory import get_model_config
+from app.chat_models.ollama import get_ollama_session
+from app.services.chat_service import ChatService
+from app.services.semantic_cache import SemanticCache
+from app.services.retrieval_cache import RetrievalCache
+
+logger = logging.getLogger(__name__)
+
+class ChatServiceRegistry:
+    # un ChatService por (proveedor, configuración del modelo), compartido entre requests;
+    # el modelo de chat (con la API key del request) se pasa en cada llamada
+    def __init__(
+        self,
+        vector_store: FAISS,
+        index_version: str = "0",
+        semantic_cache: SemanticCache | None = None,
+        retrieval_cache: RetrievalCache | None = None
+    ):
+        self.vector_store: FAISS = vector_store
+        self.index_version = index_version
+        self.semantic_cache = semantic_cache
+        self.retrieval_cache = retrieval_cache
+        self._services: dict[tuple, ChatService] = {}
+        self._lock = Lock()
+
+    def get(self, model_provider: str) -> ChatService:
+        key = (model_provider, get_model_config(model_provider))
+        service = self._services.get(key)
+        if service is not None:
+            return service
+
+        with self._lock:
+            service = self._services.get(key)
+            if service is None:
+                logger.info(f"Inicializando ChatService para: {model_provider}")
+                service = ChatService(
+                    self.vector_store,
+                    generation_limiter=self._generation_limiter(model_provider),
+                    semantic_cache=self.semantic_cache,
+                    # las respuestas cacheadas no se comparten entre proveedores ni versiones del índice
+                    cache_scope=key + (self.index_version,),
+                    retrieval_cache=self.retrieval_cache,
+                    index_version=self.index_version
+                )
+                self._services[key] = service
+        return service
+
+    def warmup(self, model_providers: list[str]):
+        for model_provider in model_providers:
+            self.get(model_provider)
+
+    @staticmethod
+    def _generation_limiter(model_provider: str):
+        if model_provider == "ollama":
+            return get_ollama_session().limiter
+        return None
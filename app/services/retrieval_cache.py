@@ -0,0 +1,65 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import List
+import logging
+from app.config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+class RetrievalCache:
+    # resultados del retrieval MMR como IDs del docstore (no copias de Document);
+    # las claves incluyen la versión del índice y el cache se vacía cuando esta cambia
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple, tuple[str, ...]] = OrderedDict()
+        self._index_version: str | None = None
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, index_version: str):
+        if self._index_version != index_version:
+            if self._entries:
+                logger.info("Vector store reconstruido: se invalida el cache de retrieval.")
+            self._entries.clear()
+            self._index_version = index_version
+
+    def get(self, key: tuple, index_version: str) -> List[str] | None:
+        with self._lock:
+            self._check_version(index_version)
+            doc_ids = self._entries.get(key)
+            if doc_ids is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(doc_ids)
+
+    def put(self, key: tuple, index_version: str, doc_ids: List[str]):
+        with self._lock:
+            self._check_version(index_version)
+            self._entries[key] = tuple(doc_ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+def build_retrieval_cache() -> RetrievalCache | None:
+    settings = get_settings()
+    if not settings.retrieval_cache_enabled:
+        return None
+    return RetrievalCache(max_size=settings.retrieval_cache_max_size)
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Hashable
+import logging
+import time
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.embedding_models.cache import CachedQueryEmbeddings
+from app.config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    # respuestas previas indexadas por el embedding de la pregunta; una pregunta "casi igual"
+    # (similitud coseno >= threshold) dentro del mismo scope reutiliza la respuesta sin llamar al LLM
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        threshold: float,
+        max_size: int,
+        ttl_seconds: float
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # scope -> {pregunta normalizada -> (vector unitario, respuesta, creado)}
+        self._scopes: dict[Hashable, OrderedDict[str, tuple[np.ndarray, str, float]]] = {}
+        self._lru: OrderedDict[tuple[Hashable, str], None] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        return " ".join(question.lower().split())
+
+    def embed(self, question: str) -> np.ndarray:
+        # mismo texto que embebe el retrieval: con el cache de consultas, un miss del cache
+        # semántico no paga una segunda pasada del modelo para buscar en el índice
+        vector = np.asarray(self.embeddings.embed_query(CachedQueryEmbeddings.normalize_query(question)), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector: np.ndarray, scope: Hashable) -> str | None:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            entries = self._scopes.get(scope)
+            if not entries:
+                self.misses += 1
+                return None
+
+            keys = list(entries.keys())
+            matrix = np.stack([entries[key][0] for key in keys])
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._lru.move_to_end((scope, keys[best]))
+            logger.info(f"Respuesta servida desde el cache semántico (similitud {similarities[best]:.3f}).")
+            return entries[keys[best]][1]
+
+    def store(self, vector: np.ndarray, question: str, answer: str, scope: Hashable):
+        if not answer:
+            return
+        key = self.normalize_question(question)
+        with self._lock:
+            self._scopes.setdefault(scope, OrderedDict())[key] = (vector, answer, time.monotonic())
+            self._lru[(scope, key)] = None
+            self._lru.move_to_end((scope, key))
+            while len(self._lru) > self.max_size:
+                self._remove(*self._lru.popitem(last=False)[0])
+                self.evictions += 1
+
+    def _evict_expired(self, now: float):
+        expired = [
+            (scope, key)
+            for scope, entries in self._scopes.items()
+            for key, (_, _, created) in entries.items()
+            if now - created > self.ttl_seconds
+        ]
+        for scope, key in expired:
+            del self._lru[(scope, key)]
+            self._remove(scope, key)
+        self.evictions += len(expired)
+
+    def _remove(self, scope: Hashable, key: str):
+        entries = self._scopes.get(scope)
+        if entries is None:
+            return
+        entries.pop(key, None)
+        if not entries:
+            del self._scopes[scope]
+
+    def clear(self):
+        with self._lock:
+            self._scopes.clear()
+            self._lru.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._lru),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+def build_semantic_cache(embeddings: Embeddings) -> SemanticCache | None:
+    settings = get_settings()
+    if not settings.semantic_cache_enabled:
+        return None
+    return SemanticCache(
+        embeddings=embeddings,
+        threshold=settings.semantic_cache_threshold,
+        max_size=settings.semantic_cache_max_size,
+        ttl_seconds=settings.semantic_cache_ttl
+    )
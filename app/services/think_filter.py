@@ -0,0 +1,74 @@
+OPEN_TAG = "<think>"
+CLOSE_TAG = "</think>"
+
+def _partial_tag_suffix(text: str, tag: str) -> int:
+    # largo del sufijo de text que podría ser el comienzo de tag (tag partido entre chunks)
+    for size in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:size]):
+            return size
+    return 0
+
+# versión incremental de ChatService.format_response: elimina los bloques
+# <think>...</think> chunk a chunk, sin esperar la respuesta completa
+class ThinkBlockFilter:
+    def __init__(self):
+        self._buffer = ""
+        self._in_think = False
+        self._started = False # ya se emitió texto visible (para el strip inicial)
+        self._pending_ws = "" # whitespace retenido (para el strip final)
+        self.reasoning_tokens = 0
+
+    def feed(self, chunk: str) -> str:
+        if not chunk:
+            return ""
+
+        if self._in_think:
+            self.reasoning_tokens += 1
+
+        self._buffer += chunk
+        visible = []
+
+        while self._buffer:
+            if self._in_think:
+                end = self._buffer.find(CLOSE_TAG)
+                if end == -1:
+                    # se descarta el razonamiento, salvo un posible "</thi" incompleto
+                    keep = _partial_tag_suffix(self._buffer, CLOSE_TAG)
+                    self._buffer = self._buffer[len(self._buffer) - keep:] if keep else ""
+                    break
+                self._buffer = self._buffer[end + len(CLOSE_TAG):]
+                self._in_think = False
+            else:
+                start = self._buffer.find(OPEN_TAG)
+                if start == -1:
+                    keep = _partial_tag_suffix(self._buffer, OPEN_TAG)
+                    cut = len(self._buffer) - keep
+                    visible.append(self._buffer[:cut])
+                    self._buffer = self._buffer[cut:]
+                    break
+                visible.append(self._buffer[:start])
+                self._buffer = self._buffer[start + len(OPEN_TAG):]
+                self._in_think = True
+                self.reasoning_tokens += 1
+
+        return self._emit("".join(visible))
+
+    def flush(self) -> str:
+        # fin del stream: un tag parcial pendiente es texto visible; un <think> sin cerrar se descarta
+        text = "" if self._in_think else self._buffer.rstrip()
+        self._buffer = ""
+        visible = self._emit(text) if text else ""
+        self._pending_ws = ""
+        return visible
+
+    def _emit(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+
+        text = self._pending_ws + text
+        stripped = text.rstrip()
+        self._pending_ws = text[len(stripped):]
+        return stripped
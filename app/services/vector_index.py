@@ -0,0 +1,109 @@
+import logging
+import math
+import time
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+# tipos que conservan los vectores originales (se pueden reconstruir sin pérdida)
+LOSSLESS_INDEX_TYPES = ("flat", "ivf_flat", "hnsw")
+# puntos de entrenamiento por centroide que pide faiss
+MIN_POINTS_PER_CENTROID = 39
+
+def index_type_of(index: faiss.Index) -> str:
+    if not isinstance(index, faiss.Index):
+        return type(index).__name__
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(index, faiss.IndexFlat):
+        return "flat"
+    return type(index).__name__
+
+def choose_index_type(count: int, settings) -> str:
+    # "auto": búsqueda exacta mientras alcance (< 1 ms), HNSW para corpus medianos
+    # e IVF-PQ (vectores comprimidos) cuando el índice ya no entra cómodo en memoria
+    index_type = settings.vector_index_type
+    if index_type != "auto":
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Tipo de índice no soportado: {index_type}")
+        return index_type
+    if count < settings.vector_index_auto_flat_max:
+        return "flat"
+    if count < settings.vector_index_auto_hnsw_max:
+        return "hnsw"
+    return "ivf_pq"
+
+def _nlist(count: int, settings) -> int:
+    nlist = settings.vector_index_nlist or int(4 * math.sqrt(count))
+    return max(1, min(nlist, count // MIN_POINTS_PER_CENTROID))
+
+def _pq_m(dimension: int, settings) -> int:
+    # subcuantizadores: tienen que dividir la dimensión (por defecto 4 dimensiones por byte)
+    m = min(settings.vector_index_pq_m or dimension // 4, dimension)
+    while dimension % m:
+        m -= 1
+    return max(1, m)
+
+def _training_sample(vectors: np.ndarray, size: int) -> np.ndarray:
+    if len(vectors) <= size:
+        return vectors
+    rows = np.random.default_rng(0).choice(len(vectors), size=size, replace=False)
+    return vectors[np.sort(rows)]
+
+def build_index(vectors: np.ndarray, index_type: str, metric: int, settings) -> faiss.Index:
+    count, dimension = vectors.shape
+    start = time.perf_counter()
+
+    if index_type == "flat":
+        index = faiss.IndexFlat(dimension, metric)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, settings.vector_index_hnsw_m, metric)
+        index.hnsw.efConstruction = settings.vector_index_ef_construction
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        nlist = _nlist(count, settings)
+        quantizer = faiss.IndexFlat(dimension, metric)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+        else:
+            # 2^nbits centroides por subcuantizador: con pocos vectores, menos bits
+            nbits = max(1, min(8, int(math.log2(max(count // MIN_POINTS_PER_CENTROID, 2)))))
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, _pq_m(dimension, settings), nbits, metric)
+        index.train(_training_sample(vectors, settings.vector_index_train_size))
+    else:
+        raise ValueError(f"Tipo de índice no soportado: {index_type}")
+
+    index.add(vectors)
+    if index_type.startswith("ivf"):
+        # el MMR reconstruye los vectores candidatos por posición
+        index.make_direct_map()
+    configure_search(index, settings)
+    logger.info(f"Índice {index_type} construido con {count} vectores en {time.perf_counter() - start:.2f}s.")
+    return index
+
+def configure_search(index: faiss.Index, settings):
+    # parámetros de búsqueda: no se guardan en el archivo, se aplican al cargar
+    if not isinstance(index, faiss.Index):
+        return
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(settings.vector_index_nprobe, index.nlist)
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = settings.vector_index_ef_search
+
+def reconstruct_all(index: faiss.Index) -> np.ndarray:
+    return index.reconstruct_n(0, index.ntotal)
+
+def to_flat(index: faiss.Index) -> faiss.Index:
+    # HNSW e IVF (con direct map de tipo array) no admiten borrar vectores: la ingesta
+    # incremental trabaja sobre una copia exacta y el índice se reconstruye al final
+    flat = faiss.IndexFlat(index.d, index.metric_type)
+    if index.ntotal:
+        flat.add(reconstruct_all(index))
+    return flat
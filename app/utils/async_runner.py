@@ -0,0 +1,12 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+def run_sync(coro):
+    # la ingesta puede dispararse desde el lifespan de FastAPI, con un event loop ya corriendo:
+    # en ese caso la corrutina se ejecuta en un loop propio en otro hilo
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
@@ -3,6 +3,15 @@ from unittest.mock import patch, MagicMock
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def clear_chat_model_pool():
+    """Aísla cada test del pool de clientes compartido."""
+    from app.chat_models.pool import get_chat_model_pool
+    get_chat_model_pool().clear()
+    yield
+    get_chat_model_pool().clear()
+
+
 class TestGetChatModel:
     """Tests para la función get_chat_model."""
 
@@ -85,3 +94,19 @@ class TestGetChatModel:
         result = get_chat_model("modelo_inexistente")
 
         assert result is None
+
+    @patch("app.chat_models.factory.get_groq")
+    @patch("app.chat_models.factory.settings")
+    def test_reutiliza_cliente_por_api_key(self, mock_settings, mock_get_groq):
+        """Debe reutilizar el cliente para la misma API key y crear otro para una distinta."""
+        mock_settings.groq_model = "groq-test"
+        mock_get_groq.side_effect = lambda key: MagicMock(name=key)
+
+        from app.chat_models.factory import get_chat_model
+        first = get_chat_model("groq", user_api_key="key-a")
+        second = get_chat_model("groq", user_api_key="key-a")
+        other = get_chat_model("groq", user_api_key="key-b")
+
+        assert first is second
+        assert other is not first
+        assert mock_get_groq.call_count == 2
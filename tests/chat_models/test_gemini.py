@@ -6,7 +6,7 @@ import pytest
 class TestGetGemini:
     """Tests para la función get_gemini."""
 
-    @patch("app.chat_models.gemini.ChatGoogleGenerativeAI")
+    @patch("langchain_google_genai.ChatGoogleGenerativeAI")
     @patch("app.chat_models.gemini.settings")
     def test_con_api_key_de_usuario(self, mock_settings, mock_chat_class):
         """Debe usar la API key del usuario si se proporciona."""
@@ -24,7 +24,7 @@ class TestGetGemini:
         )
         assert result == mock_instance
 
-    @patch("app.chat_models.gemini.ChatGoogleGenerativeAI")
+    @patch("langchain_google_genai.ChatGoogleGenerativeAI")
     @patch("app.chat_models.gemini.settings")
     def test_con_api_key_de_settings(self, mock_settings, mock_chat_class):
         """Debe usar la API key de settings si no se proporciona user key."""
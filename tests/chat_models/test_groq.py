@@ -6,14 +6,17 @@ import pytest
 class TestGetGroq:
     """Tests para la función get_groq."""
 
-    @patch("app.chat_models.groq.ChatGroq")
+    @patch("app.chat_models.groq.get_shared_http_clients")
+    @patch("langchain_groq.ChatGroq")
     @patch("app.chat_models.groq.settings")
-    def test_con_api_key_de_usuario(self, mock_settings, mock_chat_class):
+    def test_con_api_key_de_usuario(self, mock_settings, mock_chat_class, mock_http_clients):
         """Debe usar la API key del usuario si se proporciona."""
         mock_settings.groq_api_key = "settings-key"
         mock_settings.groq_model = "groq-test"
         mock_instance = MagicMock()
         mock_chat_class.return_value = mock_instance
+        http_client, http_async_client = MagicMock(), MagicMock()
+        mock_http_clients.return_value = (http_client, http_async_client)
 
         from app.chat_models.groq import get_groq
         result = get_groq(user_api_key="user-key")
@@ -22,18 +25,23 @@ class TestGetGroq:
             api_key="user-key",
             model="groq-test",
             temperature=0.1,
-            max_tokens=1024
+            max_tokens=1024,
+            http_client=http_client,
+            http_async_client=http_async_client
         )
         assert result == mock_instance
 
-    @patch("app.chat_models.groq.ChatGroq")
+    @patch("app.chat_models.groq.get_shared_http_clients")
+    @patch("langchain_groq.ChatGroq")
     @patch("app.chat_models.groq.settings")
-    def test_con_api_key_de_settings(self, mock_settings, mock_chat_class):
+    def test_con_api_key_de_settings(self, mock_settings, mock_chat_class, mock_http_clients):
         """Debe usar la API key de settings si no se proporciona user key."""
         mock_settings.groq_api_key = "settings-key"
         mock_settings.groq_model = "groq-test"
         mock_instance = MagicMock()
         mock_chat_class.return_value = mock_instance
+        http_client, http_async_client = MagicMock(), MagicMock()
+        mock_http_clients.return_value = (http_client, http_async_client)
 
         from app.chat_models.groq import get_groq
         result = get_groq(user_api_key=None)
@@ -42,7 +50,9 @@ class TestGetGroq:
             api_key="settings-key",
             model="groq-test",
             temperature=0.1,
-            max_tokens=1024
+            max_tokens=1024,
+            http_client=http_client,
+            http_async_client=http_async_client
         )
         assert result == mock_instance
 
@@ -0,0 +1,66 @@
+"""Tests para app/chat_models/ollama.py"""
+from unittest.mock import patch, MagicMock, AsyncMock
+import pytest
+
+
+class TestOllamaSession:
+    """Tests para la clase OllamaSession."""
+
+    @patch("langchain_ollama.ChatOllama")
+    @patch("app.chat_models.ollama.settings")
+    def test_valida_modelo_una_sola_vez(self, mock_settings, mock_chat_class):
+        """Sólo la primera instancia debe validar el modelo contra el servidor."""
+        mock_settings.ollama_keep_alive = "30m"
+
+        from app.chat_models.ollama import OllamaSession
+        session = OllamaSession()
+        session.get_model()
+        session.get_model()
+
+        first_call, second_call = mock_chat_class.call_args_list
+        assert first_call.kwargs["validate_model_on_init"] is True
+        assert second_call.kwargs["validate_model_on_init"] is False
+        assert first_call.kwargs["keep_alive"] == "30m"
+
+    @patch("app.chat_models.ollama.settings")
+    async def test_limiter_respeta_slots_paralelos(self, mock_settings):
+        """El semáforo debe admitir tantas generaciones como ollama_num_parallel."""
+        mock_settings.ollama_num_parallel = 2
+
+        from app.chat_models.ollama import OllamaSession
+        session = OllamaSession()
+
+        await session.limiter.acquire()
+        await session.limiter.acquire()
+        assert session.limiter.locked()
+        assert session.limiter is session.limiter
+
+    @patch("langchain_ollama.ChatOllama")
+    @patch("ollama.AsyncClient")
+    @patch("app.chat_models.ollama.settings")
+    async def test_precarga_exitosa_evita_validacion(self, mock_settings, mock_client_class, mock_chat_class):
+        """Tras precargar, el modelo ya está validado y no se vuelve a consultar."""
+        mock_settings.ollama_model = "llama2"
+        mock_settings.ollama_keep_alive = "30m"
+        mock_client = MagicMock()
+        mock_client.generate = AsyncMock()
+        mock_client_class.return_value = mock_client
+
+        from app.chat_models.ollama import OllamaSession
+        session = OllamaSession()
+        assert await session.apreload() is True
+        session.get_model()
+
+        mock_client.generate.assert_awaited_once_with(model="llama2", prompt="", keep_alive="30m")
+        assert mock_chat_class.call_args.kwargs["validate_model_on_init"] is False
+
+    @patch("ollama.AsyncClient")
+    @patch("app.chat_models.ollama.settings")
+    async def test_precarga_fallida_no_lanza(self, mock_settings, mock_client_class):
+        """Si el servidor no responde la precarga debe fallar sin lanzar excepción."""
+        mock_client = MagicMock()
+        mock_client.generate = AsyncMock(side_effect=ConnectionError("sin servidor"))
+        mock_client_class.return_value = mock_client
+
+        from app.chat_models.ollama import OllamaSession
+        assert await OllamaSession().apreload() is False
@@ -0,0 +1,71 @@
+"""Tests para app/chat_models/pool.py"""
+from unittest.mock import MagicMock, patch
+import pytest
+
+from app.chat_models.pool import ChatModelPool, hash_api_key
+
+
+class TestChatModelPool:
+    """Tests para la clase ChatModelPool."""
+
+    def test_reutiliza_instancia(self):
+        """Debe construir una sola vez para la misma clave."""
+        pool = ChatModelPool(max_size=4, ttl_seconds=60)
+        builder = MagicMock(return_value=MagicMock())
+
+        first = pool.get("groq", "key", ("m",), builder)
+        second = pool.get("groq", "key", ("m",), builder)
+
+        assert first is second
+        builder.assert_called_once()
+        assert pool.stats()["hits"] == 1
+        assert pool.stats()["misses"] == 1
+
+    def test_config_distinta_crea_otra_instancia(self):
+        """Un cambio en la configuración del modelo debe generar otro cliente."""
+        pool = ChatModelPool(max_size=4, ttl_seconds=60)
+
+        first = pool.get("groq", "key", ("m1",), MagicMock)
+        second = pool.get("groq", "key", ("m2",), MagicMock)
+
+        assert first is not second
+
+    def test_no_cachea_none(self):
+        """Si el builder retorna None no debe quedar nada en el pool."""
+        pool = ChatModelPool(max_size=4, ttl_seconds=60)
+
+        assert pool.get("gemini", "", (), lambda: None) is None
+        assert pool.stats()["size"] == 0
+
+    def test_evict_lru_por_tamano(self):
+        """Debe descartar el menos usado recientemente al superar max_size."""
+        pool = ChatModelPool(max_size=2, ttl_seconds=60)
+
+        a = pool.get("groq", "a", (), MagicMock)
+        pool.get("groq", "b", (), MagicMock)
+        pool.get("groq", "a", (), MagicMock)  # "a" pasa a ser el más reciente
+        pool.get("groq", "c", (), MagicMock)  # se descarta "b"
+
+        builder = MagicMock(return_value=MagicMock())
+        assert pool.get("groq", "a", (), builder) is a
+        pool.get("groq", "b", (), builder)
+        builder.assert_called_once()
+
+    def test_evict_por_ttl(self):
+        """Debe descartar clientes inactivos más tiempo que el TTL."""
+        pool = ChatModelPool(max_size=4, ttl_seconds=10)
+
+        with patch("app.chat_models.pool.time.monotonic", return_value=100.0):
+            first = pool.get("groq", "key", (), MagicMock)
+        with patch("app.chat_models.pool.time.monotonic", return_value=111.0):
+            second = pool.get("groq", "key", (), MagicMock)
+
+        assert first is not second
+
+    def test_hash_api_key(self):
+        """La clave del pool no debe contener la API key en texto plano."""
+        hashed = hash_api_key("secreta")
+
+        assert "secreta" not in hashed
+        assert hashed == hash_api_key("secreta")
+        assert hash_api_key("") == ""
@@ -0,0 +1,120 @@
+"""Tests para app/embedding_models/batching.py"""
+from unittest.mock import MagicMock
+from typing import List
+import os
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from app.embedding_models.batching import BatchedEmbeddings, build_ingestion_embeddings
+
+
+class _LengthEmbeddings(Embeddings):
+    """Embeddings deterministas: [longitud del texto, pid del proceso]."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[float(len(text)), float(os.getpid())] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [float(len(text)), float(os.getpid())]
+
+
+class TestBatchedEmbeddings:
+    """Tests para BatchedEmbeddings."""
+
+    def test_lotes_agrupados_por_longitud(self):
+        """Cada lote debe tener textos de longitud parecida y el resultado conservar el orden original."""
+        underlying = MagicMock(wraps=_LengthEmbeddings())
+        embeddings = BatchedEmbeddings(underlying, batch_size=2)
+        texts = ["aaaa", "a", "aaaaaa", "aa", "aaaaa"]
+
+        vectors = embeddings.embed_documents(texts)
+
+        batches = [c.args[0] for c in underlying.embed_documents.call_args_list]
+        assert batches == [["a", "aa"], ["aaaa", "aaaaa"], ["aaaaaa"]]
+        assert [v[0] for v in vectors] == [4.0, 1.0, 6.0, 2.0, 5.0]
+
+    def test_lista_vacia(self):
+        """No debe llamar al modelo sin textos."""
+        underlying = MagicMock()
+        assert BatchedEmbeddings(underlying, batch_size=8).embed_documents([]) == []
+        underlying.embed_documents.assert_not_called()
+
+    def test_reporta_chunks_por_segundo(self):
+        """Debe acumular chunks embebidos y tiempo para reportar el throughput."""
+        embeddings = BatchedEmbeddings(_LengthEmbeddings(), batch_size=4)
+        embeddings.embed_documents(["a"] * 10)
+
+        assert embeddings.embedded == 10
+        assert embeddings.chunks_per_second() > 0
+
+    def test_varios_procesos(self):
+        """Con workers > 1 debe embeber en procesos separados y conservar el orden."""
+        embeddings = BatchedEmbeddings(
+            _LengthEmbeddings(), batch_size=4, workers=2, worker_factory=_LengthEmbeddings
+        )
+        texts = ["x" * n for n in (5, 1, 8, 3, 2, 7, 4, 6)]
+        try:
+            vectors = embeddings.embed_documents(texts)
+        finally:
+            embeddings.close()
+
+        assert [v[0] for v in vectors] == [5.0, 1.0, 8.0, 3.0, 2.0, 7.0, 4.0, 6.0]
+        assert os.getpid() not in {v[1] for v in vectors}
+        assert embeddings._pool is None
+
+    def test_pocos_textos_en_proceso(self):
+        """Con menos de workers * batch_size textos no debe levantar el pool de procesos."""
+        factory = MagicMock()
+        embeddings = BatchedEmbeddings(_LengthEmbeddings(), batch_size=4, workers=2, worker_factory=factory)
+
+        vectors = embeddings.embed_documents(["abc", "a"])
+
+        assert vectors == [[3.0, float(os.getpid())], [1.0, float(os.getpid())]]
+        assert embeddings._pool is None
+        factory.assert_not_called()
+
+    def test_consultas_en_proceso(self):
+        """embed_query no debe pasar por el pool de procesos."""
+        embeddings = BatchedEmbeddings(_LengthEmbeddings(), batch_size=4)
+        assert embeddings.embed_query("abc") == [3.0, float(os.getpid())]
+
+
+def _settings(batch_size, workers):
+    settings = MagicMock()
+    settings.embedding_batch_size = batch_size
+    settings.embedding_workers = workers
+    return settings
+
+
+class TestBuildIngestionEmbeddings:
+    """Tests para build_ingestion_embeddings."""
+
+    def test_otros_modelos_sin_cambios(self):
+        """Los embeddings que no son HuggingFace se usan tal cual."""
+        embeddings = _LengthEmbeddings()
+        assert build_ingestion_embeddings(embeddings, _settings(batch_size=32, workers=4)) is embeddings
+
+    def test_huggingface_en_proceso(self):
+        """Con un solo worker debe embeber en el proceso actual."""
+        hf = MagicMock(spec=HuggingFaceEmbeddings)
+        embeddings = build_ingestion_embeddings(hf, _settings(batch_size=32, workers=1))
+
+        assert isinstance(embeddings, BatchedEmbeddings)
+        assert embeddings.workers == 1
+        assert embeddings.batch_size == 32
+
+    def test_huggingface_multiproceso(self):
+        """Con varios workers cada proceso debe crear su modelo en CPU con el batch configurado."""
+        hf = MagicMock(spec=HuggingFaceEmbeddings)
+        hf.model_name = "test-model"
+        hf.model_kwargs = {}
+        hf.encode_kwargs = {"normalize_embeddings": True}
+
+        embeddings = build_ingestion_embeddings(hf, _settings(batch_size=16, workers=3))
+
+        assert embeddings.workers == 3
+        assert embeddings.worker_factory.keywords == {
+            "model_name": "test-model",
+            "model_kwargs": {"device": "cpu"},
+            "encode_kwargs": {"normalize_embeddings": True, "batch_size": 16},
+        }
@@ -0,0 +1,81 @@
+"""Tests para app/embedding_models/cache.py"""
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+import pytest
+
+from app.embedding_models.cache import CachedQueryEmbeddings, unwrap_embeddings
+
+
+@pytest.fixture
+def underlying():
+    """Embeddings simulados: el vector depende del largo del texto."""
+    embeddings = MagicMock()
+    embeddings.model_name = "test-model"
+    embeddings.embed_query.side_effect = lambda text: [float(len(text)), 1.0]
+    embeddings.embed_documents.return_value = [[0.1, 0.2]]
+    return embeddings
+
+
+class TestCachedQueryEmbeddings:
+    """Tests para la clase CachedQueryEmbeddings."""
+
+    def test_segunda_consulta_es_hit(self, underlying):
+        """La misma consulta normalizada no debe recalcular el embedding."""
+        cached = CachedQueryEmbeddings(underlying, max_bytes=1024)
+
+        first = cached.embed_query("¿Horarios  de atención?")
+        second = cached.embed_query("  ¿Horarios de atención? ")
+
+        assert first == second
+        underlying.embed_query.assert_called_once_with("¿Horarios de atención?")
+        assert cached.stats()["hits"] == 1
+        assert cached.stats()["misses"] == 1
+
+    def test_retorna_copias(self, underlying):
+        """Modificar el vector retornado no debe alterar el cache."""
+        cached = CachedQueryEmbeddings(underlying, max_bytes=1024)
+
+        cached.embed_query("hola").append(99.0)
+
+        assert len(cached.embed_query("hola")) == 2
+
+    def test_evict_por_memoria(self, underlying):
+        """Debe descartar las entradas menos usadas al superar max_bytes."""
+        # cada entrada ocupa 8 bytes de vector + el texto
+        cached = CachedQueryEmbeddings(underlying, max_bytes=30)
+
+        cached.embed_query("aaaa")
+        cached.embed_query("bbbb")
+        cached.embed_query("cccc")  # supera 30 bytes: se descarta "aaaa"
+
+        assert cached.stats()["entries"] == 2
+        assert cached.stats()["bytes"] <= 30
+        cached.embed_query("aaaa")
+        assert underlying.embed_query.call_count == 4
+
+    def test_embed_documents_no_se_cachea(self, underlying):
+        """embed_documents debe delegar siempre en el modelo real."""
+        cached = CachedQueryEmbeddings(underlying, max_bytes=1024)
+
+        cached.embed_documents(["a"])
+        cached.embed_documents(["a"])
+
+        assert underlying.embed_documents.call_count == 2
+
+    def test_thread_safe(self, underlying):
+        """Consultas concurrentes deben dejar el cache consistente."""
+        cached = CachedQueryEmbeddings(underlying, max_bytes=1024 * 1024)
+        queries = [f"consulta {i % 10}" for i in range(200)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(cached.embed_query, queries))
+
+        assert all(result[0] == len(query) for result, query in zip(results, queries))
+        stats = cached.stats()
+        assert stats["entries"] == 10
+        assert stats["hits"] + stats["misses"] == 200
+
+    def test_unwrap_embeddings(self, underlying):
+        """Debe retornar el modelo real tanto envuelto como sin envolver."""
+        assert unwrap_embeddings(CachedQueryEmbeddings(underlying, max_bytes=1024)) is underlying
+        assert unwrap_embeddings(underlying) is underlying
@@ -0,0 +1,132 @@
+"""Tests para app/embedding_models/disk_cache.py"""
+from unittest.mock import MagicMock
+import pytest
+
+from app.embedding_models.disk_cache import DiskEmbeddingCache, CachedDocumentEmbeddings
+
+
+class TestDiskEmbeddingCache:
+    """Tests para la clase DiskEmbeddingCache."""
+
+    def test_persiste_entre_instancias(self, tmp_path):
+        """Los vectores guardados deben leerse desde otra instancia (otra ejecución)."""
+        cache = DiskEmbeddingCache(tmp_path, "sentence-transformers/test")
+        cache.put_many(["hola", "chau"], [[1.0, 2.0], [3.0, 4.0]])
+
+        reopened = DiskEmbeddingCache(tmp_path, "sentence-transformers/test")
+
+        assert reopened.get_many(["chau", "otro", "hola"]) == [[3.0, 4.0], None, [1.0, 2.0]]
+        assert len(reopened) == 2
+
+    def test_modelos_aislados(self, tmp_path):
+        """Un mismo texto con otro modelo no debe encontrarse en el cache."""
+        DiskEmbeddingCache(tmp_path, "modelo-a").put_many(["hola"], [[1.0, 2.0]])
+
+        assert DiskEmbeddingCache(tmp_path, "modelo-b").get_many(["hola"]) == [None]
+
+    def test_agrega_filas_al_final(self, tmp_path):
+        """Escrituras sucesivas deben conservar las filas previas."""
+        cache = DiskEmbeddingCache(tmp_path, "m")
+        cache.put_many(["a"], [[1.0, 1.0]])
+        cache.get_many(["a"])  # abre el memmap
+        cache.put_many(["b"], [[2.0, 2.0]])
+
+        assert cache.get_many(["a", "b"]) == [[1.0, 1.0], [2.0, 2.0]]
+
+    def test_no_duplica_textos_ya_guardados(self, tmp_path):
+        """Guardar de nuevo un texto (p. ej. un lote ya checkpointeado) no debe agregar filas."""
+        cache = DiskEmbeddingCache(tmp_path, "m")
+        cache.put_many(["a", "b", "a"], [[1.0, 1.0], [2.0, 2.0], [9.0, 9.0]])
+        cache.put_many(["a", "c"], [[5.0, 5.0], [3.0, 3.0]])
+
+        assert len(cache) == 3
+        assert cache.get_many(["a", "b", "c"]) == [[1.0, 1.0], [2.0, 2.0], [3.0, 3.0]]
+
+    def test_dimension_incorrecta_lanza_error(self, tmp_path):
+        """No debe mezclar vectores de distinta dimensión."""
+        cache = DiskEmbeddingCache(tmp_path, "m")
+        cache.put_many(["a"], [[1.0, 1.0]])
+
+        with pytest.raises(ValueError):
+            cache.put_many(["b"], [[1.0, 1.0, 1.0]])
+
+    def test_indice_corrupto_se_descarta(self, tmp_path):
+        """Un index.sqlite ilegible debe tratarse como cache vacío."""
+        cache = DiskEmbeddingCache(tmp_path, "m")
+        cache.put_many(["a"], [[1.0, 1.0]])
+        (cache.directory / "index.sqlite").write_bytes(b"no es una base de datos" * 100)
+
+        assert DiskEmbeddingCache(tmp_path, "m").get_many(["a"]) == [None]
+
+    def test_escritura_interrumpida_no_desalinea_filas(self, tmp_path):
+        """Una fila a medio escribir al final del archivo no debe desplazar los vectores siguientes."""
+        cache = DiskEmbeddingCache(tmp_path, "m")
+        cache.put_many(["a"], [[1.0, 1.0]])
+        with open(cache.directory / "vectors.f32", "ab") as f:
+            f.write(b"\x00" * 6)  # corte en medio de un vector sin confirmar en el índice
+
+        reopened = DiskEmbeddingCache(tmp_path, "m")
+        reopened.put_many(["b"], [[2.0, 2.0]])
+
+        assert DiskEmbeddingCache(tmp_path, "m").get_many(["a", "b"]) == [[1.0, 1.0], [2.0, 2.0]]
+        assert (cache.directory / "vectors.f32").stat().st_size == 2 * 2 * 4
+
+    def test_dos_procesos_sobre_el_mismo_cache(self, tmp_path):
+        """Dos instancias (p. ej. workers de uvicorn) no deben pisarse las filas confirmadas."""
+        a = DiskEmbeddingCache(tmp_path, "m")
+        b = DiskEmbeddingCache(tmp_path, "m")
+
+        a.put_many(["x"], [[1.0, 1.0]])
+        b.put_many(["y"], [[2.0, 2.0]])
+        a.put_many(["z"], [[3.0, 3.0]])
+
+        for cache in (a, b, DiskEmbeddingCache(tmp_path, "m")):
+            assert cache.get_many(["x", "y", "z"]) == [[1.0, 1.0], [2.0, 2.0], [3.0, 3.0]]
+            assert len(cache) == 3
+
+    def test_formato_anterior_se_descarta(self, tmp_path):
+        """Un cache con index.json (filas posiblemente desalineadas) debe descartarse."""
+        directory = tmp_path / "m"
+        directory.mkdir()
+        (directory / "index.json").write_text('{"dim": 2, "rows": {}}')
+        (directory / "vectors.f32").write_bytes(b"\x00" * 16)
+
+        cache = DiskEmbeddingCache(tmp_path, "m")
+
+        assert len(cache) == 0
+        assert not (directory / "index.json").exists()
+        assert not (directory / "vectors.f32").exists()
+
+
+class TestCachedDocumentEmbeddings:
+    """Tests para la clase CachedDocumentEmbeddings."""
+
+    def test_solo_embebe_textos_nuevos(self, tmp_path):
+        """Debe enviar al modelo sólo los textos que no están en el cache."""
+        underlying = MagicMock()
+        underlying.embed_documents.side_effect = lambda texts: [[float(len(t)), 0.0] for t in texts]
+        embeddings = CachedDocumentEmbeddings(underlying, DiskEmbeddingCache(tmp_path, "m"))
+
+        embeddings.embed_documents(["uno", "dos"])
+        result = embeddings.embed_documents(["dos", "tres", "tres"])
+
+        assert result == [[3.0, 0.0], [4.0, 0.0], [4.0, 0.0]]
+        underlying.embed_documents.assert_called_with(["tres"])
+        assert embeddings.hits == 1
+        assert embeddings.misses == 4
+
+    def test_embed_query_delega(self, tmp_path):
+        """Las consultas no deben pasar por el cache de ingesta."""
+        underlying = MagicMock()
+        underlying.embed_query.return_value = [1.0]
+        embeddings = CachedDocumentEmbeddings(underlying, DiskEmbeddingCache(tmp_path, "m"))
+
+        assert embeddings.embed_query("hola") == [1.0]
+        underlying.embed_query.assert_called_once_with("hola")
+
+    def test_close_delega_al_modelo(self, tmp_path):
+        """close() debe liberar los recursos del modelo envuelto (p. ej. su pool de procesos)."""
+        underlying = MagicMock()
+        CachedDocumentEmbeddings(underlying, DiskEmbeddingCache(tmp_path, "m")).close()
+
+        underlying.close.assert_called_once()
@@ -6,13 +6,15 @@ import pytest
 class TestGetEmbeddings:
     """Tests para la función get_embeddings."""
 
-    @patch("app.embedding_models.factory.hugging_face_embeddings")
-    def test_default_retorna_huggingface(self, mock_hf):
+    @patch("app.embedding_models.factory.get_hugging_face_embeddings")
+    def test_default_retorna_huggingface(self, mock_get_hf):
         """Debe retornar embeddings de HuggingFace por defecto."""
         from app.embedding_models.factory import get_embeddings
+        from app.embedding_models.cache import unwrap_embeddings
         result = get_embeddings("default")
 
-        assert result == mock_hf
+        mock_get_hf.assert_called_once()
+        assert unwrap_embeddings(result) == mock_get_hf.return_value
 
     @patch("app.embedding_models.factory.get_gemini_embeddings")
     def test_gemini_retorna_gemini_embeddings(self, mock_get_gemini):
@@ -21,10 +23,44 @@ class TestGetEmbeddings:
         mock_get_gemini.return_value = mock_instance
 
         from app.embedding_models.factory import get_embeddings
+        from app.embedding_models.cache import unwrap_embeddings
         result = get_embeddings("gemini")
 
         mock_get_gemini.assert_called_once()
-        assert result == mock_instance
+        assert unwrap_embeddings(result) == mock_instance
+
+    @patch("app.embedding_models.factory.get_gemini_embeddings")
+    def test_gemini_sin_key_retorna_none(self, mock_get_gemini):
+        """Debe retornar None si Gemini no puede inicializarse."""
+        mock_get_gemini.return_value = None
+
+        from app.embedding_models.factory import get_embeddings
+        assert get_embeddings("gemini") is None
+
+    @patch("app.embedding_models.factory.get_hugging_face_embeddings")
+    def test_reutiliza_cache_de_consultas(self, mock_get_hf):
+        """Llamadas sucesivas deben compartir el mismo cache de consultas."""
+        from app.embedding_models.factory import get_embeddings
+        from app.embedding_models.cache import CachedQueryEmbeddings
+
+        first = get_embeddings("default")
+        second = get_embeddings("default")
+
+        assert isinstance(first, CachedQueryEmbeddings)
+        assert first is second
+
+    def test_cache_de_consultas_por_modelo(self):
+        """Instancias nuevas del mismo modelo deben reemplazar su cache, no acumular uno por instancia."""
+        from app.embedding_models import factory
+
+        with patch.dict(factory._query_caches, clear=True):
+            for _ in range(3):
+                factory._with_query_cache(MagicMock(model_name="models/gemini-embedding-001"))
+            factory._with_query_cache(MagicMock(model_name="sentence-transformers/all-MiniLM-L6-v2"))
+
+            assert sorted(factory._query_caches) == [
+                "models/gemini-embedding-001", "sentence-transformers/all-MiniLM-L6-v2"
+            ]
 
     def test_modelo_no_soportado_retorna_none(self):
         """Debe retornar None para un modelo de embeddings no soportado."""
@@ -0,0 +1,37 @@
+"""Tests para app/embedding_models/gemini.py"""
+from unittest.mock import patch, MagicMock
+import pytest
+
+from app.embedding_models import gemini
+
+
+@pytest.fixture
+def cliente_sin_crear():
+    """Estado del módulo sin cliente creado, con API key y GoogleGenerativeAIEmbeddings mockeado."""
+    settings = MagicMock(google_api_key="fake-key", gemini_embeddings_model_name="models/test")
+    with patch.object(gemini, "_embeddings", None), \
+         patch("app.embedding_models.gemini.get_settings", return_value=settings), \
+         patch("langchain_google_genai.GoogleGenerativeAIEmbeddings") as mock_cls:
+        yield settings, mock_cls
+
+
+class TestGetGeminiEmbeddings:
+    """Tests para la creación del cliente de Gemini."""
+
+    def test_reutiliza_el_cliente(self, cliente_sin_crear):
+        """Llamadas sucesivas deben devolver la misma instancia, sin crear otro cliente."""
+        _, mock_cls = cliente_sin_crear
+
+        first = gemini.get_gemini_embeddings()
+        second = gemini.get_gemini_embeddings()
+
+        mock_cls.assert_called_once_with(model="models/test")
+        assert first is second
+
+    def test_sin_api_key(self, cliente_sin_crear):
+        """Sin API key no debe crear el cliente."""
+        settings, mock_cls = cliente_sin_crear
+        settings.google_api_key = None
+
+        assert gemini.get_gemini_embeddings() is None
+        mock_cls.assert_not_called()
@@ -0,0 +1,189 @@
+"""Tests para app/embedding_models/gemini_batch.py contra un servidor local que imita la API de Gemini."""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+import json
+import time
+import pytest
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+from app.embedding_models.disk_cache import DiskEmbeddingCache
+from app.embedding_models.gemini_batch import AdaptiveConcurrency, GeminiBatchEmbeddings
+
+
+class _GeminiStub(BaseHTTPRequestHandler):
+    """batchEmbedContents: vector [longitud, n° de request]; los fallos se programan por test."""
+    lock = Lock()
+    batches: list = []
+    failures: list = []  # códigos a devolver en los próximos requests
+    reject_text: str | None = None  # texto que provoca un 400
+    delay = 0.0
+    active = 0
+    max_active = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        texts = [r["content"]["parts"][0]["text"] for r in body["requests"]]
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+            failure = cls.failures.pop(0) if cls.failures else None
+            cls.batches.append(texts)
+            number = len(cls.batches)
+        try:
+            time.sleep(cls.delay)
+            if failure:
+                self._send(failure, {"error": {"code": failure, "message": "stub", "status": "ERROR"}}, {"Retry-After": "0"})
+            elif cls.reject_text in texts:
+                self._send(400, {"error": {"code": 400, "message": "texto inválido", "status": "INVALID_ARGUMENT"}})
+            else:
+                self._send(200, {"embeddings": [{"values": [float(len(t)), float(number)]} for t in texts]})
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+@pytest.fixture
+def gemini_stub():
+    """Servidor local con el endpoint batchEmbedContents de Gemini."""
+    _GeminiStub.batches = []
+    _GeminiStub.failures = []
+    _GeminiStub.reject_text = None
+    _GeminiStub.delay = 0.0
+    _GeminiStub.active = 0
+    _GeminiStub.max_active = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GeminiStub)
+    Thread(target=server.serve_forever, daemon=True).start()
+    embeddings = GoogleGenerativeAIEmbeddings(
+        model="models/gemini-embedding-001",
+        google_api_key="fake-key",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}"
+    )
+    yield embeddings, _GeminiStub
+    server.shutdown()
+    server.server_close()
+
+
+class TestGeminiBatchEmbeddings:
+    """Tests de lotes, concurrencia, reintentos y checkpoint."""
+
+    def test_lotes_hasta_el_limite_de_la_api(self, gemini_stub):
+        """Debe partir los textos en requests de hasta 100 y conservar el orden."""
+        underlying, stub = gemini_stub
+        texts = [f"texto {i}" for i in range(250)]
+
+        vectors = GeminiBatchEmbeddings(underlying, batch_size=500).embed_documents(texts)
+
+        assert sorted(len(batch) for batch in stub.batches) == [50, 100, 100]
+        assert [v[0] for v in vectors] == [float(len(t)) for t in texts]
+
+    def test_concurrencia_acotada(self, gemini_stub):
+        """No debe haber más requests simultáneos que max_concurrency."""
+        underlying, stub = gemini_stub
+        stub.delay = 0.05
+        texts = [f"texto {i}" for i in range(80)]
+
+        GeminiBatchEmbeddings(underlying, batch_size=10, max_concurrency=3).embed_documents(texts)
+
+        assert len(stub.batches) == 8
+        assert 1 < stub.max_active <= 3
+
+    def test_reintenta_ante_429_y_5xx(self, gemini_stub):
+        """Ante 429/503 debe reintentar con backoff y terminar bien."""
+        underlying, stub = gemini_stub
+        stub.failures = [429, 503]
+        embeddings = GeminiBatchEmbeddings(underlying, base_delay=0.01)
+
+        vectors = embeddings.embed_documents(["a", "bb"])
+
+        assert [v[0] for v in vectors] == [1.0, 2.0]
+        assert len(stub.batches) == 3
+        assert embeddings.retries == 2
+        assert embeddings.throttled == 1
+
+    def test_error_de_cliente_no_se_reintenta(self, gemini_stub):
+        """Un 400 debe propagarse sin reintentos."""
+        underlying, stub = gemini_stub
+        stub.reject_text = "malo"
+
+        with pytest.raises(Exception):
+            GeminiBatchEmbeddings(underlying, base_delay=0.01).embed_documents(["malo"])
+        assert len(stub.batches) == 1
+
+    def test_agota_reintentos(self, gemini_stub):
+        """Si el error persiste debe fallar después de max_retries reintentos."""
+        underlying, stub = gemini_stub
+        stub.failures = [500] * 10
+
+        with pytest.raises(Exception):
+            GeminiBatchEmbeddings(underlying, max_retries=2, base_delay=0.01).embed_documents(["a"])
+        assert len(stub.batches) == 3
+
+    def test_checkpoint_retoma_corrida_fallida(self, gemini_stub, tmp_path):
+        """Los lotes exitosos quedan en el checkpoint y una nueva corrida sólo pide los que faltan."""
+        underlying, stub = gemini_stub
+        checkpoint = DiskEmbeddingCache(tmp_path, "gemini")
+        texts = [f"texto {i}" for i in range(30)]
+        stub.reject_text = "texto 25"
+
+        with pytest.raises(Exception):
+            GeminiBatchEmbeddings(underlying, batch_size=10, max_concurrency=1, checkpoint=checkpoint).embed_documents(texts)
+        assert len(checkpoint) == 20
+
+        stub.reject_text = None
+        stub.batches = []
+        vectors = GeminiBatchEmbeddings(underlying, batch_size=10, checkpoint=checkpoint).embed_documents(texts)
+
+        assert stub.batches == [texts[20:]]
+        assert [v[0] for v in vectors] == [float(len(t)) for t in texts]
+
+    def test_limite_persiste_entre_llamadas(self, gemini_stub):
+        """Un 429 en un lote de la ingesta debe seguir limitando las llamadas siguientes."""
+        underlying, stub = gemini_stub
+        stub.failures = [429]
+        embeddings = GeminiBatchEmbeddings(underlying, max_concurrency=4, base_delay=0.01)
+
+        embeddings.embed_documents(["a"])
+        assert embeddings.limiter.limit == 2
+
+        stub.delay = 0.05
+        embeddings.embed_documents([f"texto {i}" for i in range(40)])
+        assert embeddings.texts_per_call() == 400
+        assert embeddings.limiter.active == 0
+        assert stub.max_active <= 2
+
+    async def test_desde_un_event_loop(self, gemini_stub):
+        """embed_documents debe funcionar aunque ya haya un event loop corriendo."""
+        underlying, _ = gemini_stub
+        assert len(GeminiBatchEmbeddings(underlying).embed_documents(["a"])) == 1
+
+
+class TestAdaptiveConcurrency:
+    """Tests para el control de concurrencia AIMD."""
+
+    async def test_reduce_ante_429_y_recupera(self):
+        """Un 429 divide el límite por dos; los éxitos lo vuelven a subir hasta el máximo."""
+        limiter = AdaptiveConcurrency(8)
+
+        await limiter.acquire()
+        await limiter.release(throttled=True)
+        assert limiter.limit == 4
+
+        for _ in range(4 + 5 + 6 + 7):
+            await limiter.acquire()
+            await limiter.release()
+        assert limiter.limit == 8
+        assert limiter.active == 0
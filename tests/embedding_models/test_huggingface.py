@@ -0,0 +1,52 @@
+"""Tests para app/embedding_models/huggingface.py"""
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+import time
+import pytest
+
+from app.embedding_models import huggingface
+
+
+@pytest.fixture
+def modelo_sin_cargar():
+    """Estado del módulo sin modelo cargado y HuggingFaceEmbeddings mockeado."""
+    with patch.object(huggingface, "_embeddings", None), \
+         patch.dict(huggingface._load_stats, {"load_seconds": None, "warmup_seconds": None}), \
+         patch("langchain_huggingface.HuggingFaceEmbeddings") as mock_cls:
+        yield mock_cls
+
+
+class TestGetHuggingFaceEmbeddings:
+    """Tests para la carga diferida del modelo."""
+
+    def test_importar_no_carga_el_modelo(self, modelo_sin_cargar):
+        """El modelo no debe instanciarse hasta el primer uso."""
+        assert huggingface.hugging_face_load_stats()["loaded"] is False
+        modelo_sin_cargar.assert_not_called()
+
+        result = huggingface.get_hugging_face_embeddings()
+
+        assert result is modelo_sin_cargar.return_value
+        assert huggingface.hugging_face_load_stats()["loaded"] is True
+        assert huggingface.hugging_face_load_stats()["load_seconds"] is not None
+
+    def test_carga_una_sola_vez_entre_hilos(self, modelo_sin_cargar):
+        """Pedidos concurrentes deben compartir una única carga."""
+        def slow_load(**kwargs):
+            time.sleep(0.05)
+            return MagicMock()
+
+        modelo_sin_cargar.side_effect = slow_load
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: huggingface.get_hugging_face_embeddings(), range(8)))
+
+        modelo_sin_cargar.assert_called_once()
+        assert all(result is results[0] for result in results)
+
+    def test_warmup_hace_un_encode(self, modelo_sin_cargar):
+        """El warmup debe cargar el modelo y embeber un texto de prueba."""
+        elapsed = huggingface.warmup_hugging_face_embeddings()
+
+        modelo_sin_cargar.return_value.embed_query.assert_called_once()
+        assert huggingface.hugging_face_load_stats()["warmup_seconds"] == elapsed
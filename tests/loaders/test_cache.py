@@ -0,0 +1,45 @@
+"""Tests para app/loaders/cache.py"""
+from langchain_core.documents import Document
+import pytest
+
+from app.loaders.cache import ExtractionCache
+
+
+class TestExtractionCache:
+    """Tests para la clase ExtractionCache."""
+
+    def test_guarda_y_recupera_paginas(self, tmp_path):
+        """Debe recuperar texto y metadata de cada página."""
+        cache = ExtractionCache(tmp_path, "v1")
+        docs = [Document(page_content="Página 1", metadata={"page": 0, "source": "a.pdf"})]
+
+        cache.put("hash", docs)
+
+        restored = cache.get("hash")
+        assert restored[0].page_content == "Página 1"
+        assert restored[0].metadata == {"page": 0, "source": "a.pdf"}
+
+    def test_version_del_loader_invalida(self, tmp_path):
+        """Otra versión del loader no debe reutilizar extracciones previas."""
+        ExtractionCache(tmp_path, "v1").put("hash", [Document(page_content="x")])
+
+        assert ExtractionCache(tmp_path, "v2").get("hash") is None
+
+    def test_rango_de_paginas_forma_parte_de_la_clave(self, tmp_path):
+        """Cada rango de páginas se cachea por separado."""
+        cache = ExtractionCache(tmp_path, "v1")
+        cache.put("hash", [Document(page_content="rango")], pages=range(0, 2))
+
+        assert cache.get("hash") is None
+        assert cache.get("hash", pages=range(0, 2))[0].page_content == "rango"
+
+    def test_file_hash_por_contenido(self, tmp_path):
+        """El hash debe depender del contenido del archivo y reutilizarse entre instancias."""
+        path = tmp_path / "a.pdf"
+        path.write_bytes(b"contenido")
+        first = ExtractionCache(tmp_path / "c", "v1").file_hash(path)
+
+        assert ExtractionCache(tmp_path / "c", "v1").file_hash(path) == first
+
+        path.write_bytes(b"otro contenido")
+        assert ExtractionCache(tmp_path / "c", "v1").file_hash(path) != first
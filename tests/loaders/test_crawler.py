@@ -0,0 +1,238 @@
+"""Tests para app/loaders/crawler.py"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from unittest.mock import patch
+from langchain_core.documents import Document
+import asyncio
+import time
+import pytest
+
+from app.loaders.crawler import (
+    HostRateLimiter,
+    WebCrawler,
+    canonicalize_url,
+    extract_links,
+    fetch_sitemap_urls,
+)
+
+
+class TestCanonicalizeUrl:
+    """Tests para la canonicalización de URLs."""
+
+    @pytest.mark.parametrize("url, expected", [
+        ("HTTPS://Example.COM/Productos/", "https://example.com/Productos"),
+        ("https://example.com", "https://example.com/"),
+        ("https://example.com:443/a#seccion", "https://example.com/a"),
+        ("http://example.com:8080/a/../b", "http://example.com:8080/b"),
+        ("https://example.com/p?b=2&utm_source=x&a=1&fbclid=y", "https://example.com/p?a=1&b=2"),
+    ])
+    def test_forma_canonica(self, url, expected):
+        """Distintas formas de la misma página deben dar la misma URL."""
+        assert canonicalize_url(url) == expected
+
+
+class TestExtractLinks:
+    """Tests para la extracción de enlaces."""
+
+    def test_enlaces_absolutos_sin_repetir(self):
+        """Debe resolver enlaces relativos, deduplicar y descartar recursos y esquemas no http."""
+        html = """
+            <a href="/productos/1">Mesa</a>
+            <a href="/productos/1#fotos">Mesa otra vez</a>
+            <a href="https://otro.com/x">Externo</a>
+            <a href="/catalogo.pdf">PDF</a>
+            <a href="mailto:hola@example.com">Mail</a>
+            <a href="detalle?id=2">Relativo</a>
+        """
+        links = extract_links(html, "https://example.com/productos/")
+
+        assert links == [
+            "https://example.com/productos/1",
+            "https://otro.com/x",
+            "https://example.com/productos/detalle?id=2",
+        ]
+
+
+class TestHostRateLimiter:
+    """Tests para el rate limit por host."""
+
+    def test_turnos_por_host(self):
+        """Requests al mismo host se espacian; hosts distintos no se esperan entre sí."""
+        limiter = HostRateLimiter(requests_per_second=2)
+        with patch("app.loaders.crawler.time.monotonic", return_value=100.0):
+            assert limiter.reserve("https://a.com/1") == 0
+            assert limiter.reserve("https://a.com/2") == pytest.approx(0.5)
+            assert limiter.reserve("https://a.com/3") == pytest.approx(1.0)
+            assert limiter.reserve("https://b.com/1") == 0
+
+    def test_sin_limite(self):
+        """Con rate 0 nunca debe esperar."""
+        limiter = HostRateLimiter(requests_per_second=0)
+        assert limiter.reserve("https://a.com/1") == 0
+        assert limiter.reserve("https://a.com/1") == 0
+
+    def test_turno_despues_del_deadline(self):
+        """Si el turno del host cae después del deadline no debe esperar."""
+        limiter = HostRateLimiter(requests_per_second=1)
+        limiter.reserve("https://a.com/1")
+        start = time.monotonic()
+
+        assert limiter.wait("https://a.com/2", deadline=start + 0.5) is False
+        assert limiter.wait("https://b.com/1", deadline=start + 0.5) is True
+        assert time.monotonic() - start < 0.5
+
+    async def test_espera_async(self):
+        """await_turn debe espaciar los requests al mismo host sin bloquear el event loop."""
+        limiter = HostRateLimiter(requests_per_second=20)
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.await_turn("https://a.com/1") for _ in range(3)))
+
+        assert time.monotonic() - start >= 0.09
+
+
+def _site(links: dict[str, list[str]]):
+    """fetch falso: cada URL devuelve un Document con sus enlaces."""
+    calls = []
+
+    def fetch(urls, deadline=None):
+        calls.append(list(urls))
+        return [
+            Document(page_content=f"Página {url}", metadata={"source": url, "links": links.get(url, [])})
+            for url in urls
+        ]
+    return fetch, calls
+
+
+class TestWebCrawler:
+    """Tests para WebCrawler."""
+
+    def _crawler(self, fetch, **kwargs):
+        params = {"max_depth": 3, "max_pages": 100, "time_budget": 60, "batch_size": 10}
+        params.update(kwargs)
+        return WebCrawler(["https://example.com/"], fetch, **params)
+
+    def test_recorre_en_anchura_solo_el_mismo_sitio(self):
+        """Debe seguir enlaces del mismo sitio por niveles, sin repetir URLs."""
+        fetch, calls = _site({
+            "https://example.com/": ["https://example.com/a", "https://otro.com/", "https://www.example.com/b"],
+            "https://example.com/a": ["https://example.com/", "https://example.com/c"],
+        })
+        docs = self._crawler(fetch).crawl()
+
+        assert calls == [
+            ["https://example.com/"],
+            ["https://example.com/a", "https://www.example.com/b"],
+            ["https://example.com/c"],
+        ]
+        assert len(docs) == 4
+
+    def test_limite_de_profundidad(self):
+        """No debe seguir enlaces más allá de max_depth."""
+        fetch, calls = _site({
+            "https://example.com/": ["https://example.com/a"],
+            "https://example.com/a": ["https://example.com/b"],
+        })
+        self._crawler(fetch, max_depth=1).crawl()
+
+        assert calls == [["https://example.com/"], ["https://example.com/a"]]
+
+    def test_limite_de_paginas_y_lotes(self):
+        """Debe descubrir como máximo max_pages URLs y descargarlas en lotes de batch_size."""
+        fetch, calls = _site({"https://example.com/": [f"https://example.com/p{i}" for i in range(10)]})
+        self._crawler(fetch, max_pages=5, batch_size=2).crawl()
+
+        assert sum(len(batch) for batch in calls) == 5
+        assert all(len(batch) <= 2 for batch in calls)
+
+    def test_presupuesto_de_tiempo(self):
+        """Al agotarse el presupuesto debe devolver lo descargado sin iniciar más lotes."""
+        fetch, calls = _site({"https://example.com/": [f"https://example.com/p{i}" for i in range(4)]})
+        with patch("app.loaders.crawler.time.monotonic", side_effect=[0.0, 1.0, 2.0, 100.0]):
+            docs = self._crawler(fetch, time_budget=10, batch_size=2).crawl()
+
+        assert calls == [["https://example.com/"], ["https://example.com/p0", "https://example.com/p1"]]
+        assert len(docs) == 3
+
+    def test_contenido_duplicado_se_indexa_una_vez(self):
+        """Dos URLs con el mismo texto deben producir un único documento."""
+        def fetch(urls, deadline=None):
+            return [Document(page_content="Igual", metadata={"source": url}) for url in urls]
+        crawler = WebCrawler(["https://example.com/a", "https://example.com/b"], fetch, 1, 10, 60, 10)
+
+        assert len(crawler.crawl()) == 1
+
+    def test_agrega_urls_del_sitemap(self):
+        """Con use_sitemap debe encolar también las URLs del sitemap del mismo sitio."""
+        fetch, calls = _site({})
+        with patch("app.loaders.crawler.fetch_sitemap_urls", return_value=[
+            "https://example.com/productos/1/", "https://otro.com/x"
+        ]):
+            self._crawler(fetch, use_sitemap=True).crawl()
+
+        assert calls == [["https://example.com/", "https://example.com/productos/1"]]
+
+    def test_deadline_a_fetch_y_sitemap(self):
+        """fetch y el sitemap deben recibir el deadline; el sitemap, además, el rate limiter."""
+        deadlines = []
+
+        def fetch(urls, deadline=None):
+            deadlines.append(deadline)
+            return []
+        with patch("app.loaders.crawler.fetch_sitemap_urls", return_value=[]) as mock_sitemap, \
+             patch("app.loaders.crawler.time.monotonic", return_value=100.0):
+            self._crawler(fetch, time_budget=30, use_sitemap=True).crawl()
+
+        assert deadlines == [130.0]
+        assert mock_sitemap.call_args.kwargs["deadline"] == 130.0
+        assert isinstance(mock_sitemap.call_args.kwargs["rate_limiter"], HostRateLimiter)
+
+
+class _SitemapHandler(BaseHTTPRequestHandler):
+    base = ""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/sitemap.xml":
+            body = f"<sitemapindex><sitemap><loc>{self.base}/productos.xml</loc></sitemap>" \
+                   f"<url><loc>{self.base}/contacto</loc></url></sitemapindex>"
+        elif self.path == "/productos.xml":
+            body = f"<urlset><url><loc> {self.base}/productos/1 </loc></url></urlset>"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml")
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+
+class TestSitemap:
+    """Tests para la lectura del sitemap contra un servidor local."""
+
+    def test_lee_sitemap_y_sitemaps_anidados(self):
+        """Debe devolver las URLs del sitemap y de los sitemaps que referencia."""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _SitemapHandler)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        _SitemapHandler.base = base
+        Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            urls = fetch_sitemap_urls([f"{base}/"], timeout=5)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert urls == [f"{base}/contacto", f"{base}/productos/1"]
+
+    def test_sitemap_respeta_el_deadline(self):
+        """Con el presupuesto agotado no debe pedir el sitemap."""
+        with patch("app.loaders.crawler.httpx.Client") as mock_client:
+            urls = fetch_sitemap_urls(
+                ["https://example.com/"], timeout=5,
+                rate_limiter=HostRateLimiter(0), deadline=time.monotonic() - 1
+            )
+
+        assert urls == []
+        mock_client.return_value.__enter__.return_value.get.assert_not_called()
@@ -0,0 +1,217 @@
+"""Tests para app/loaders/http.py"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from unittest.mock import patch
+import gzip
+import json
+import pytest
+
+from app.loaders.http import HTTPLoader, parse_html, looks_js_rendered
+from app.loaders.snapshots import SnapshotStore
+
+STATIC_HTML = (
+    "<html><head><title>Catálogo</title><script>var x = 1;</script></head>"
+    "<body><h1>Mesa Roble</h1><p>" + "Mesa de roble macizo hecha a mano. " * 20 + "</p></body></html>"
+)
+SPA_HTML = (
+    "<html><head><title>App</title></head><body>"
+    "<noscript>You need to enable JavaScript to run this app.</noscript>"
+    "<div id=\"root\"></div><script src=\"/bundle.js\"></script></body></html>"
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests_log: list = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requests_log.append((self.path, dict(self.headers)))
+
+        if self.path == "/static":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = STATIC_HTML.encode("utf-8")
+            headers = {"Content-Type": "text/html; charset=utf-8", "ETag": '"v1"'}
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body)
+                headers["Content-Encoding"] = "gzip"
+        elif self.path == "/noetag":
+            body = STATIC_HTML.encode("utf-8")
+            headers = {"Content-Type": "text/html; charset=utf-8"}
+        elif self.path == "/spa":
+            body = SPA_HTML.encode("utf-8")
+            headers = {"Content-Type": "text/html; charset=utf-8"}
+        elif self.path == "/api":
+            body = json.dumps({"producto": "Silla Nogal", "precio": 120}).encode("utf-8")
+            headers = {"Content-Type": "application/json"}
+        elif self.path == "/blocked":
+            self.send_response(403)
+            self.end_headers()
+            return
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def http_server():
+    """Servidor HTTP local con páginas estática, SPA y JSON."""
+    _Handler.requests_log = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", _Handler.requests_log
+    server.shutdown()
+    server.server_close()
+
+
+class TestParseHtml:
+    """Tests para la extracción de texto y la detección de páginas JS."""
+
+    def test_extrae_titulo_y_texto_sin_scripts(self):
+        """Debe devolver el título y el texto visible, sin scripts."""
+        title, text, asks_for_js = parse_html(STATIC_HTML)
+
+        assert title == "Catálogo"
+        assert "Mesa Roble" in text
+        assert "var x" not in text
+        assert asks_for_js is False
+
+    def test_detecta_spa(self):
+        """Una SPA sin renderizar debe detectarse como página JS."""
+        _, text, asks_for_js = parse_html(SPA_HTML)
+
+        assert asks_for_js is True
+        assert looks_js_rendered(text, asks_for_js, min_text_chars=200) is True
+
+    def test_pagina_con_texto_no_es_js(self):
+        """Una página con suficiente texto se considera estática."""
+        _, text, asks_for_js = parse_html(STATIC_HTML)
+        assert looks_js_rendered(text, asks_for_js, min_text_chars=200) is False
+
+
+class TestHTTPLoader:
+    """Tests para HTTPLoader contra un servidor local."""
+
+    def test_carga_estatica_json_y_fallback(self, http_server, tmp_path):
+        """Debe cargar HTML estático y JSON, y dejar sólo la SPA para Selenium."""
+        base, _ = http_server
+        urls = [f"{base}/static", f"{base}/spa", f"{base}/api", f"{base}/missing"]
+        loader = HTTPLoader(urls, store=SnapshotStore(tmp_path))
+
+        docs = loader.load()
+
+        assert [doc.metadata["source"] for doc in docs] == [f"{base}/static", f"{base}/api"]
+        assert "Mesa de roble" in docs[0].page_content
+        assert docs[0].metadata["title"] == "Catálogo"
+        assert docs[0].metadata["source_type"] == "web"
+        assert "Silla Nogal" in docs[1].page_content
+        assert loader.fallback_urls == [f"{base}/spa"]
+        assert loader.failed_urls == [f"{base}/missing"]
+        assert set(loader.timings) == set(urls)
+
+    def test_404_no_se_deriva_al_navegador(self, http_server, tmp_path):
+        """Un 404 es un error definitivo: se registra como fallido y no pasa a Selenium."""
+        base, _ = http_server
+        loader = HTTPLoader([f"{base}/missing"], store=SnapshotStore(tmp_path))
+
+        assert loader.load() == []
+        assert loader.failed_urls == [f"{base}/missing"]
+        assert loader.fallback_urls == []
+
+    def test_403_se_reintenta_con_el_navegador(self, http_server, tmp_path):
+        """Un 403 puede ser un bloqueo anti-bots: la URL debe quedar para Selenium."""
+        base, _ = http_server
+        loader = HTTPLoader([f"{base}/blocked"], store=SnapshotStore(tmp_path))
+
+        assert loader.load() == []
+        assert loader.fallback_urls == [f"{base}/blocked"]
+        assert loader.failed_urls == []
+
+    def test_timeout_no_se_deriva_al_navegador(self, tmp_path):
+        """Un timeout se registra como fallido: el navegador esperaría lo mismo."""
+        import httpx
+        url = "http://127.0.0.1:9/lento"
+        loader = HTTPLoader([url], store=SnapshotStore(tmp_path))
+
+        with patch("httpx.AsyncClient.get", side_effect=httpx.ReadTimeout("timeout")):
+            assert loader.load() == []
+
+        assert loader.failed_urls == [url]
+        assert loader.fallback_urls == []
+
+    def test_respuesta_comprimida(self, http_server, tmp_path):
+        """Debe pedir compresión y descomprimir la respuesta."""
+        base, requests_log = http_server
+        docs = HTTPLoader([f"{base}/static"], store=SnapshotStore(tmp_path)).load()
+
+        assert "gzip" in requests_log[0][1]["Accept-Encoding"]
+        assert "Mesa Roble" in docs[0].page_content
+
+    def test_request_condicional_reutiliza_snapshot(self, http_server, tmp_path):
+        """Con un ETag guardado debe enviar If-None-Match y reutilizar el cuerpo ante un 304."""
+        base, requests_log = http_server
+        store = SnapshotStore(tmp_path)
+        url = f"{base}/static"
+
+        first = HTTPLoader([url], store=store).load()
+        second = HTTPLoader([url], store=store).load()
+
+        assert requests_log[1][1]["If-None-Match"] == '"v1"'
+        assert second[0].page_content == first[0].page_content
+
+    async def test_load_dentro_de_un_event_loop(self, http_server, tmp_path):
+        """load() debe funcionar aunque ya haya un event loop corriendo (lifespan de FastAPI)."""
+        base, _ = http_server
+        docs = HTTPLoader([f"{base}/static"], store=SnapshotStore(tmp_path)).load()
+        assert len(docs) == 1
+
+    def test_mismo_contenido_no_vuelve_a_parsear(self, http_server, tmp_path):
+        """Sin validadores, un cuerpo con el mismo hash debe reutilizar el texto extraído."""
+        base, _ = http_server
+        store = SnapshotStore(tmp_path)
+        url = f"{base}/noetag"
+        HTTPLoader([url], store=store).load()
+
+        with patch("app.loaders.http.parse_html") as mock_parse:
+            docs = HTTPLoader([url], store=store).load()
+
+        mock_parse.assert_not_called()
+        assert "Mesa de roble" in docs[0].page_content
+
+    def test_guarda_snapshot_con_hash_y_fecha(self, http_server, tmp_path):
+        """El snapshot debe incluir el HTML crudo, el hash del contenido y el momento de descarga."""
+        base, _ = http_server
+        store = SnapshotStore(tmp_path)
+        url = f"{base}/noetag"
+        HTTPLoader([url], store=store).load()
+
+        snapshot = store.get(url)
+        assert snapshot["renderer"] == "http"
+        assert snapshot["body"] == STATIC_HTML
+        assert len(snapshot["content_hash"]) == 64
+        assert snapshot["fetched_at"] > 0
+        assert "Mesa Roble" in snapshot["extracted"]["text"]
+
+    def test_deadline_vencido_omite_urls(self, http_server, tmp_path):
+        """Con el presupuesto del crawler agotado no debe pedir URLs ni derivarlas al navegador."""
+        import time
+        base, requests_log = http_server
+        loader = HTTPLoader([f"{base}/static"], store=SnapshotStore(tmp_path), deadline=time.monotonic() - 1)
+
+        assert loader.load() == []
+        assert loader.skipped_urls == [f"{base}/static"]
+        assert loader.fallback_urls == []
+        assert requests_log == []
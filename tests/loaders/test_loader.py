@@ -5,15 +5,23 @@ from langchain_core.documents import Document
 import pytest
 
 
+
+@pytest.fixture(autouse=True)
+def sin_cache_de_extraccion():
+    """Los tests de carga no deben leer ni escribir el cache de extracción real."""
+    with patch("app.loaders.pdf.get_extraction_cache", return_value=None):
+        yield
+
 class TestLoadDocuments:
     """Tests para la función load_documents."""
 
     @patch("app.loaders.loader.normalize_documents", side_effect=lambda x: x)
-    @patch("app.loaders.loader.PDFLoader")
+    @patch("app.loaders.pdf.PDFLoader")
     @patch("app.loaders.loader.settings")
     def test_carga_directorio_con_pdfs(self, mock_settings, mock_pdf_class, mock_normalize):
         """Debe cargar PDFs de un directorio recursivamente."""
         mock_settings.urls = []
+        mock_settings.pdf_extraction_workers = 1
 
         # Crear directorio temporal con un PDF
         with patch.object(Path, "resolve", return_value=Path("/tmp/corpus")), \
@@ -33,11 +41,12 @@ class TestLoadDocuments:
         assert len(docs) == 1
 
     @patch("app.loaders.loader.normalize_documents", side_effect=lambda x: x)
-    @patch("app.loaders.loader.PDFLoader")
+    @patch("app.loaders.pdf.PDFLoader")
     @patch("app.loaders.loader.settings")
     def test_carga_archivo_pdf_individual(self, mock_settings, mock_pdf_class, mock_normalize):
         """Debe cargar un archivo PDF individual."""
         mock_settings.urls = []
+        mock_settings.pdf_extraction_workers = 1
 
         path = Path("/tmp/doc.pdf")
         with patch.object(Path, "resolve", return_value=path), \
@@ -62,6 +71,7 @@ class TestLoadDocuments:
     def test_ruta_no_soportada(self, mock_settings, mock_normalize):
         """No debe cargar nada si la ruta no es PDF ni directorio."""
         mock_settings.urls = []
+        mock_settings.pdf_extraction_workers = 1
 
         path = Path("/tmp/file.txt")
         with patch.object(Path, "resolve", return_value=path), \
@@ -75,7 +85,7 @@ class TestLoadDocuments:
         assert len(docs) == 0
 
     @patch("app.loaders.loader.normalize_documents", side_effect=lambda x: x)
-    @patch("app.loaders.loader.WebLoader")
+    @patch("app.loaders.web.WebLoader")
     @patch("app.loaders.loader.settings")
     def test_incluye_documentos_web(self, mock_settings, mock_web_class, mock_normalize):
         """Debe incluir documentos web cuando include_web=True y hay URLs."""
@@ -97,7 +107,7 @@ class TestLoadDocuments:
         mock_web_class.assert_called_once_with(["https://example.com"])
 
     @patch("app.loaders.loader.normalize_documents", side_effect=lambda x: x)
-    @patch("app.loaders.loader.WebLoader")
+    @patch("app.loaders.web.WebLoader")
     @patch("app.loaders.loader.settings")
     def test_no_incluye_web_si_deshabilitado(self, mock_settings, mock_web_class, mock_normalize):
         """No debe incluir documentos web cuando include_web=False."""
@@ -116,6 +126,7 @@ class TestLoadDocuments:
     def test_normaliza_documentos_de_salida(self, mock_settings, mock_normalize):
         """El output debe pasar por normalize_documents."""
         mock_settings.urls = []
+        mock_settings.pdf_extraction_workers = 1
         mock_normalize.return_value = [
             Document(page_content="Normalizado", metadata={})
         ]
@@ -128,3 +139,109 @@ class TestLoadDocuments:
 
         mock_normalize.assert_called_once()
         assert docs[0].page_content == "Normalizado"
+
+
+def _crear_pdf(path, paginas):
+    """Crea un PDF real con una línea de texto por página."""
+    import pymupdf
+    pdf = pymupdf.open()
+    for i in range(paginas):
+        page = pdf.new_page()
+        page.insert_text((72, 72), f"{path.stem} pagina {i}")
+    pdf.save(str(path))
+    pdf.close()
+
+
+class TestLoadPdfs:
+    """Tests para la extracción paralela de load_pdfs."""
+
+    @patch("app.loaders.loader.settings")
+    def test_paralelo_equivale_a_secuencial(self, mock_settings, tmp_path):
+        """La extracción con procesos y rangos de páginas debe dar el mismo resultado y orden."""
+        mock_settings.pdf_pages_per_task = 2
+        pdfs = [tmp_path / "a.pdf", tmp_path / "b.pdf"]
+        _crear_pdf(pdfs[0], 5)
+        _crear_pdf(pdfs[1], 1)
+
+        from app.loaders.loader import load_pdfs
+        secuencial = load_pdfs(pdfs, workers=1)
+        paralelo = load_pdfs(pdfs, workers=3)
+
+        assert [d.page_content for d in paralelo] == [d.page_content for d in secuencial]
+        assert [d.metadata["page"] for d in paralelo] == [0, 1, 2, 3, 4, 0]
+        assert paralelo[0].page_content == "a pagina 0"
+        assert all(d.metadata["source_type"] == "pdf" for d in paralelo)
+
+    @patch("app.loaders.loader.settings")
+    def test_divide_pdfs_grandes_por_paginas(self, mock_settings, tmp_path):
+        """Un PDF con más páginas que pdf_pages_per_task debe dividirse en rangos."""
+        pdf = tmp_path / "grande.pdf"
+        _crear_pdf(pdf, 5)
+
+        from app.loaders.loader import _pdf_tasks
+        tasks = _pdf_tasks([pdf], pages_per_task=2)
+
+        assert [pages for _, pages in tasks] == [range(0, 2), range(2, 4), range(4, 5)]
+
+    def test_pdf_ilegible_no_se_divide(self, tmp_path):
+        """Un PDF que no se puede abrir queda como una sola tarea (el error se informa al cargarlo)."""
+        pdf = tmp_path / "roto.pdf"
+        pdf.write_text("no es un pdf")
+
+        from app.loaders.loader import _pdf_tasks
+        assert _pdf_tasks([pdf], pages_per_task=2) == [(pdf, None)]
+
+
+class TestIterDocuments:
+    """Tests para la carga en streaming."""
+
+    @patch("app.loaders.web.WebLoader")
+    @patch("app.loaders.loader.settings")
+    def test_entrega_pdfs_normalizados_y_web(self, mock_settings, mock_web_class, tmp_path):
+        """Debe entregar las páginas de los PDFs normalizadas y después los documentos web."""
+        mock_settings.urls = ["https://example.com"]
+        mock_settings.pdf_extraction_workers = 1
+        _crear_pdf(tmp_path / "a.pdf", 2)
+        mock_web_class.return_value.load.return_value = [
+            Document(page_content="Web", metadata={"source": "https://example.com", "links": ["x"]})
+        ]
+
+        from app.loaders.loader import iter_documents
+        docs = iter_documents(str(tmp_path))
+
+        primero = next(docs)
+        mock_web_class.assert_not_called()
+        resto = list(docs)
+
+        assert primero.page_content == "a pagina 0"
+        assert [d.page_content for d in resto] == ["a pagina 1", "Web"]
+        assert "links" not in resto[-1].metadata
+
+    @patch("app.loaders.loader.settings")
+    def test_paralelo_en_streaming(self, mock_settings, tmp_path):
+        """En paralelo debe conservar el orden de las páginas aunque haya pocas tareas en vuelo."""
+        mock_settings.pdf_pages_per_task = 1
+        pdf = tmp_path / "grande.pdf"
+        _crear_pdf(pdf, 6)
+
+        from app.loaders.loader import iter_pdfs
+        docs = list(iter_pdfs([pdf], workers=2))
+
+        assert [d.metadata["page"] for d in docs] == list(range(6))
+
+    @patch("app.loaders.loader.settings")
+    def test_paralelo_desde_otro_hilo(self, mock_settings, tmp_path):
+        """Desde el hilo de prefetch de la ingesta el pool debe usar spawn, no fork."""
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        from app.loaders.loader import iter_pdfs
+
+        mock_settings.pdf_pages_per_task = 1
+        pdf = tmp_path / "grande.pdf"
+        _crear_pdf(pdf, 3)
+
+        with patch("app.loaders.loader.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pool_cls:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                docs = executor.submit(lambda: list(iter_pdfs([pdf], workers=2))).result()
+
+        assert [d.metadata["page"] for d in docs] == [0, 1, 2]
+        assert pool_cls.call_args.kwargs["mp_context"].get_start_method() == "spawn"
@@ -5,6 +5,13 @@ from langchain_core.documents import Document
 import pytest
 
 
+
+@pytest.fixture(autouse=True)
+def sin_cache_de_extraccion():
+    """Los tests de carga no deben leer ni escribir el cache de extracción real."""
+    with patch("app.loaders.pdf.get_extraction_cache", return_value=None):
+        yield
+
 class TestPDFLoader:
     """Tests para la clase PDFLoader."""
 
@@ -55,3 +62,108 @@ class TestPDFLoader:
         docs = loader.load()
 
         assert docs == []
+
+    def test_carga_rango_de_paginas(self, tmp_path):
+        """Con pages debe extraer sólo ese rango de páginas."""
+        import pymupdf
+        path = tmp_path / "catalogo.pdf"
+        pdf = pymupdf.open()
+        for i in range(4):
+            pdf.new_page().insert_text((72, 72), f"Pagina {i}")
+        pdf.save(str(path))
+        pdf.close()
+
+        from app.loaders.pdf import PDFLoader
+        docs = PDFLoader(path, pages=range(1, 3)).load()
+
+        assert [d.page_content for d in docs] == ["Pagina 1", "Pagina 2"]
+        assert docs[0].metadata["page"] == 1
+        assert docs[0].metadata["total_pages"] == 4
+        assert docs[0].metadata["source"] == str(path.resolve())
+
+
+class TestPDFLoaderCache:
+    """Tests del cache de extracción en PDFLoader."""
+
+    @staticmethod
+    def _crear_pdf(path, texto):
+        """Crea un PDF real de una página."""
+        import pymupdf
+        pdf = pymupdf.open()
+        pdf.new_page().insert_text((72, 72), texto)
+        pdf.save(str(path))
+        pdf.close()
+
+    def test_pdf_sin_cambios_no_se_reparsea(self, tmp_path):
+        """La segunda carga de un PDF sin cambios debe servirse desde el cache."""
+        from app.loaders.cache import ExtractionCache
+        from app.loaders.pdf import PDFLoader
+
+        path = tmp_path / "catalogo.pdf"
+        self._crear_pdf(path, "Sillas y mesas")
+        cache = ExtractionCache(tmp_path / "cache", "test-v1")
+
+        with patch("app.loaders.pdf.get_extraction_cache", return_value=cache):
+            first = PDFLoader(path).load()
+            with patch("app.loaders.pdf.PyMuPDFLoader") as mock_pymupdf_class:
+                second = PDFLoader(path).load()
+
+        mock_pymupdf_class.assert_not_called()
+        assert [d.page_content for d in second] == [d.page_content for d in first] == ["Sillas y mesas"]
+        assert second[0].metadata == first[0].metadata
+
+    def test_pdf_renombrado_usa_la_ruta_nueva(self, tmp_path):
+        """Un PDF renombrado o duplicado debe servirse del cache con su propia ruta."""
+        from app.loaders.cache import ExtractionCache
+        from app.loaders.pdf import PDFLoader
+
+        original = tmp_path / "catalogo.pdf"
+        self._crear_pdf(original, "Sillas y mesas")
+        cache = ExtractionCache(tmp_path / "cache", "test-v1")
+
+        with patch("app.loaders.pdf.get_extraction_cache", return_value=cache):
+            PDFLoader(original).load()
+            copia = tmp_path / "copia.pdf"
+            copia.write_bytes(original.read_bytes())
+            renombrado = original.rename(tmp_path / "catalogo_2024.pdf")
+            with patch("app.loaders.pdf.PyMuPDFLoader") as mock_pymupdf_class:
+                docs_renombrado = PDFLoader(renombrado).load()
+                docs_copia = PDFLoader(copia).load()
+
+        mock_pymupdf_class.assert_not_called()
+        assert docs_renombrado[0].metadata["source"] == str(renombrado.resolve())
+        assert docs_renombrado[0].metadata["file_path"] == str(renombrado.resolve())
+        assert docs_copia[0].metadata["source"] == str(copia.resolve())
+        assert docs_copia[0].metadata["file_path"] == str(copia.resolve())
+
+    def test_pdf_modificado_se_reparsea(self, tmp_path):
+        """Si cambia el contenido del archivo debe volver a extraerse."""
+        from app.loaders.cache import ExtractionCache
+        from app.loaders.pdf import PDFLoader
+
+        path = tmp_path / "catalogo.pdf"
+        cache = ExtractionCache(tmp_path / "cache", "test-v1")
+
+        with patch("app.loaders.pdf.get_extraction_cache", return_value=cache):
+            self._crear_pdf(path, "Version 1")  # distinto tamaño: no depende de la resolución de mtime
+            PDFLoader(path).load()
+            self._crear_pdf(path, "Version numero 2")
+            docs = PDFLoader(path).load()
+
+        assert docs[0].page_content == "Version numero 2"
+
+    @patch("app.loaders.pdf.PyMuPDFLoader")
+    def test_error_de_extraccion_no_se_cachea(self, mock_pymupdf_class, tmp_path):
+        """Una extracción fallida no debe quedar guardada en el cache."""
+        from app.loaders.cache import ExtractionCache
+        from app.loaders.pdf import PDFLoader
+
+        path = tmp_path / "roto.pdf"
+        path.write_bytes(b"%PDF roto")
+        mock_pymupdf_class.side_effect = Exception("Error de lectura")
+        cache = ExtractionCache(tmp_path / "cache", "test-v1")
+
+        with patch("app.loaders.pdf.get_extraction_cache", return_value=cache):
+            assert PDFLoader(path).load() == []
+
+        assert cache.get(cache.file_hash(path)) is None
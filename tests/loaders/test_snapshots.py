@@ -0,0 +1,64 @@
+"""Tests para app/loaders/snapshots.py"""
+from unittest.mock import patch
+import gzip
+
+from app.loaders.snapshots import SnapshotStore, content_hash, snapshot_document
+
+
+class TestSnapshotStore:
+    """Tests para SnapshotStore."""
+
+    def test_guarda_y_recupera_comprimido(self, tmp_path):
+        """Debe persistir el snapshot comprimido con hash del contenido y fecha de descarga."""
+        store = SnapshotStore(tmp_path)
+        store.put("https://example.com", {"body": "<p>Hola</p>", "extracted": {"title": "T", "text": "Hola"}})
+
+        files = list(tmp_path.glob("*.json.gz"))
+        assert len(files) == 1
+        assert b"Hola" in gzip.decompress(files[0].read_bytes())
+
+        snapshot = store.get("https://example.com")
+        assert snapshot["url"] == "https://example.com"
+        assert snapshot["content_hash"] == content_hash("<p>Hola</p>")
+        assert snapshot["fetched_at"] > 0
+
+    def test_url_sin_snapshot(self, tmp_path):
+        """Debe devolver None si la URL nunca se descargó."""
+        assert SnapshotStore(tmp_path).get("https://nada.com") is None
+
+    def test_snapshot_corrupto(self, tmp_path):
+        """Un snapshot ilegible debe tratarse como inexistente."""
+        store = SnapshotStore(tmp_path)
+        store.put("https://example.com", {"body": "x"})
+        next(tmp_path.glob("*.json.gz")).write_bytes(b"basura")
+
+        assert store.get("https://example.com") is None
+
+    def test_ventana_de_frescura(self, tmp_path):
+        """Un snapshot es fresco sólo dentro de max_age_seconds."""
+        store = SnapshotStore(tmp_path, max_age_seconds=60)
+        with patch("app.loaders.snapshots.time.time", return_value=1000.0):
+            snapshot = store.put("https://example.com", {"body": "x"})
+
+        with patch("app.loaders.snapshots.time.time", return_value=1030.0):
+            assert store.is_fresh(snapshot) is True
+        with patch("app.loaders.snapshots.time.time", return_value=1100.0):
+            assert store.is_fresh(snapshot) is False
+
+    def test_mismo_contenido(self, tmp_path):
+        """same_content compara el hash del cuerpo y requiere texto extraído guardado."""
+        store = SnapshotStore(tmp_path)
+        snapshot = store.put("https://example.com", {"body": "<p>A</p>", "extracted": None})
+
+        assert store.same_content(snapshot, "<p>A</p>") is True
+        assert store.same_content(snapshot, "<p>B</p>") is False
+        assert store.same_content(None, "<p>A</p>") is False
+        assert store.same_content({"content_hash": content_hash("<p>A</p>")}, "<p>A</p>") is False
+
+    def test_documento_desde_snapshot(self):
+        """Debe construir el Document con el texto extraído, o None si no hay texto."""
+        doc = snapshot_document("https://example.com", {"extracted": {"title": "T", "text": "Hola"}})
+
+        assert doc.page_content == "Hola"
+        assert doc.metadata == {"source": "https://example.com", "title": "T", "source_type": "web", "language": "es"}
+        assert snapshot_document("https://example.com", {"extracted": None}) is None
@@ -7,8 +7,8 @@ import pytest
 class TestSeleniumURLLoaderWithWait:
     """Tests para SeleniumURLLoaderWithWait."""
 
-    @patch("app.loaders.web.webdriver.Chrome")
-    @patch("app.loaders.web.webdriver.ChromeOptions")
+    @patch("selenium.webdriver.Chrome")
+    @patch("selenium.webdriver.ChromeOptions")
     def test_carga_url_con_contenido(self, mock_options_class, mock_chrome_class):
         """Debe extraer contenido de una URL y generar un Document."""
         mock_driver = MagicMock()
@@ -30,8 +30,8 @@ class TestSeleniumURLLoaderWithWait:
         assert docs[0].metadata["title"] == "Página de Prueba"
         mock_driver.quit.assert_called_once()
 
-    @patch("app.loaders.web.webdriver.Chrome")
-    @patch("app.loaders.web.webdriver.ChromeOptions")
+    @patch("selenium.webdriver.Chrome")
+    @patch("selenium.webdriver.ChromeOptions")
     def test_contenido_vacio_no_genera_documento(self, mock_options_class, mock_chrome_class):
         """No debe generar documentos si la página no tiene texto."""
         mock_driver = MagicMock()
@@ -46,8 +46,8 @@ class TestSeleniumURLLoaderWithWait:
         assert len(docs) == 0
         mock_driver.quit.assert_called_once()
 
-    @patch("app.loaders.web.webdriver.Chrome")
-    @patch("app.loaders.web.webdriver.ChromeOptions")
+    @patch("selenium.webdriver.Chrome")
+    @patch("selenium.webdriver.ChromeOptions")
     def test_error_en_url_continua(self, mock_options_class, mock_chrome_class):
         """Debe continuar con las demás URLs si una falla."""
         mock_driver = MagicMock()
@@ -69,8 +69,8 @@ class TestSeleniumURLLoaderWithWait:
         assert len(docs) == 1
         mock_driver.quit.assert_called_once()
 
-    @patch("app.loaders.web.webdriver.Chrome")
-    @patch("app.loaders.web.webdriver.ChromeOptions")
+    @patch("selenium.webdriver.Chrome")
+    @patch("selenium.webdriver.ChromeOptions")
     def test_espera_selector_wait_map(self, mock_options_class, mock_chrome_class):
         """Debe esperar el selector si la URL está en wait_map."""
         mock_driver = MagicMock()
@@ -87,7 +87,7 @@ class TestSeleniumURLLoaderWithWait:
             wait_time=5
         )
 
-        with patch("app.loaders.web.WebDriverWait") as mock_wait:
+        with patch("selenium.webdriver.support.ui.WebDriverWait") as mock_wait:
             mock_wait_instance = MagicMock()
             mock_wait.return_value = mock_wait_instance
             docs = loader.load()
@@ -96,20 +96,249 @@ class TestSeleniumURLLoaderWithWait:
         mock_wait.assert_called_once()
 
 
+class TestPoolDeNavegadores:
+    """Tests para la carga concurrente y la detección de página estable."""
+
+    def _driver(self, content="Contenido"):
+        driver = MagicMock()
+        driver.page_source = f"<html><body><p>{content}</p></body></html>"
+        driver.title = content
+        driver.execute_script.return_value = ["complete", 3, 100]
+        return driver
+
+    @patch("selenium.webdriver.Chrome")
+    @patch("selenium.webdriver.ChromeOptions")
+    def test_pool_usa_varios_drivers_y_conserva_orden(self, mock_options_class, mock_chrome_class):
+        """Con max_drivers > 1 debe abrir varios navegadores y devolver los docs en el orden de las URLs."""
+        drivers = [self._driver(f"Driver {i}") for i in range(3)]
+        mock_chrome_class.side_effect = drivers
+
+        from app.loaders.web import SeleniumURLLoaderWithWait
+        urls = [f"https://example.com/{i}" for i in range(6)]
+        loader = SeleniumURLLoaderWithWait(urls=urls, max_drivers=3, stable_time=0, poll_interval=0)
+        docs = loader.load()
+
+        assert [doc.metadata["source"] for doc in docs] == urls
+        assert mock_chrome_class.call_count == 3
+        for driver in drivers:
+            driver.quit.assert_called_once()
+        assert set(loader.timings) == set(urls)
+
+    @patch("selenium.webdriver.Chrome")
+    @patch("selenium.webdriver.ChromeOptions")
+    def test_deadline_acota_la_carga(self, mock_options_class, mock_chrome_class):
+        """Con deadline debe acotar la carga de cada página y omitir las URLs una vez vencido."""
+        import time
+        driver = self._driver("Contenido")
+        mock_chrome_class.return_value = driver
+        urls = [f"https://example.com/{i}" for i in range(3)]
+
+        from app.loaders.web import SeleniumURLLoaderWithWait
+        loader = SeleniumURLLoaderWithWait(urls=urls, stable_time=0, poll_interval=0, deadline=time.monotonic() + 60)
+        driver.get.side_effect = lambda url: setattr(loader, "deadline", time.monotonic() - 1)
+        docs = loader.load()
+
+        assert [doc.metadata["source"] for doc in docs] == urls[:1]
+        assert loader.skipped_urls == urls[1:]
+        driver.get.assert_called_once_with(urls[0])
+        assert 1 <= driver.set_page_load_timeout.call_args.args[0] <= 60
+
+    def test_tope_de_memoria_limita_el_pool(self):
+        """El tamaño del pool no debe superar el tope de memoria ni la cantidad de URLs."""
+        from app.loaders.web import SeleniumURLLoaderWithWait
+        urls = [f"https://example.com/{i}" for i in range(10)]
+
+        assert SeleniumURLLoaderWithWait(urls, max_drivers=8, max_memory_mb=1000, driver_memory_mb=300)._pool_size() == 3
+        assert SeleniumURLLoaderWithWait(urls[:2], max_drivers=8)._pool_size() == 2
+        assert SeleniumURLLoaderWithWait(urls, max_drivers=8, max_memory_mb=100)._pool_size() == 1
+
+    def test_espera_hasta_que_la_pagina_se_estabiliza(self):
+        """Debe seguir consultando mientras el DOM o la red cambian y cortar cuando se estabilizan."""
+        from app.loaders.web import SeleniumURLLoaderWithWait
+        driver = MagicMock()
+        driver.execute_script.side_effect = [
+            ["loading", 1, 10],
+            ["complete", 4, 50],
+            ["complete", 6, 80],
+            ["complete", 6, 80],
+            ["complete", 6, 80],
+        ]
+        loader = SeleniumURLLoaderWithWait(["https://example.com"], stable_time=0, poll_interval=0)
+
+        loader._wait_until_stable(driver, timeout=5)
+
+        assert driver.execute_script.call_count == 4
+
+    @patch("selenium.webdriver.Chrome")
+    @patch("selenium.webdriver.ChromeOptions")
+    def test_guarda_snapshot_renderizado(self, mock_options_class, mock_chrome_class, tmp_path):
+        """Con store debe guardar el HTML renderizado y reutilizar el texto si no cambió."""
+        from app.loaders.snapshots import SnapshotStore
+        from app.loaders.web import SeleniumURLLoaderWithWait
+        mock_chrome_class.return_value = self._driver("Renderizado")
+        store = SnapshotStore(tmp_path)
+        loader = SeleniumURLLoaderWithWait(["https://example.com"], stable_time=0, poll_interval=0, store=store)
+
+        loader.load()
+        snapshot = store.get("https://example.com")
+        with patch("app.loaders.web.parse_html") as mock_parse:
+            docs = loader.load()
+
+        assert snapshot["renderer"] == "browser"
+        assert "Renderizado" in snapshot["body"]
+        assert snapshot["extracted"]["text"] == "Renderizado"
+        mock_parse.assert_not_called()
+        assert docs[0].page_content == "Renderizado"
+
+    @patch("selenium.webdriver.Chrome")
+    @patch("selenium.webdriver.ChromeOptions")
+    def test_error_al_iniciar_todos_los_drivers_se_propaga(self, mock_options_class, mock_chrome_class):
+        """Si ningún navegador del pool arranca, la carga debe fallar."""
+        mock_chrome_class.side_effect = RuntimeError("sin chrome")
+
+        from app.loaders.web import SeleniumURLLoaderWithWait
+        loader = SeleniumURLLoaderWithWait(urls=["https://a.com", "https://b.com"], max_drivers=2)
+
+        with pytest.raises(RuntimeError):
+            loader.load()
+
+
 class TestWebLoader:
     """Tests para WebLoader."""
 
+    @pytest.fixture(autouse=True)
+    def sin_snapshots(self):
+        with patch("app.loaders.web.get_snapshot_store", return_value=None), \
+             patch("app.loaders.crawler.fetch_sitemap_urls", return_value=[]):
+            yield
+
+    def _http_loader(self, docs, fallback_urls):
+        http_loader = MagicMock()
+        http_loader.load.return_value = docs
+        http_loader.fallback_urls = fallback_urls
+        return http_loader
+
+    @patch("app.loaders.web.HTTPLoader")
     @patch("app.loaders.web.SeleniumURLLoaderWithWait")
-    def test_delega_a_selenium_loader(self, mock_selenium_class):
-        """WebLoader debe delegar la carga a SeleniumURLLoaderWithWait."""
+    def test_delega_a_selenium_loader(self, mock_selenium_class, mock_http_class):
+        """WebLoader debe delegar a Selenium las URLs que HTTP no pudo resolver."""
+        urls = ["https://example.com/1", "https://example.com/2"]
+        mock_http_class.return_value = self._http_loader([], urls)
         mock_loader = MagicMock()
         expected_docs = [Document(page_content="Web", metadata={"source": "url"})]
         mock_loader.load.return_value = expected_docs
         mock_selenium_class.return_value = mock_loader
 
         from app.loaders.web import WebLoader
-        loader = WebLoader(urls=["https://example.com/1", "https://example.com/2"])
+        loader = WebLoader(urls=urls)
         docs = loader.load()
 
         mock_selenium_class.assert_called_once()
+        assert mock_selenium_class.call_args.kwargs["urls"] == urls
         assert docs == expected_docs
+
+    @patch("app.loaders.web.HTTPLoader")
+    @patch("app.loaders.web.SeleniumURLLoaderWithWait")
+    def test_paginas_estaticas_no_abren_navegador(self, mock_selenium_class, mock_http_class):
+        """Si HTTP resuelve todas las URLs no debe iniciarse Selenium."""
+        urls = ["https://example.com/1", "https://example.com/2"]
+        http_docs = [Document(page_content=f"Web {i}", metadata={"source": url}) for i, url in enumerate(urls)]
+        mock_http_class.return_value = self._http_loader(http_docs, [])
+
+        from app.loaders.web import WebLoader
+        docs = WebLoader(urls=urls).load()
+
+        mock_selenium_class.assert_not_called()
+        assert docs == http_docs
+
+    @patch("app.loaders.web.get_settings")
+    @patch("app.loaders.web.HTTPLoader")
+    @patch("app.loaders.web.SeleniumURLLoaderWithWait")
+    def test_urls_js_configuradas_van_a_selenium(self, mock_selenium_class, mock_http_class, mock_get_settings):
+        """Las URLs configuradas como JS se cargan con Selenium y el resultado conserva el orden."""
+        urls = ["https://example.com/spa", "https://example.com/static", "https://example.com/react"]
+        settings = MagicMock()
+        settings.web_http_first = True
+        settings.web_js_rendered_urls = [urls[0]]
+        settings.web_offline = False
+        settings.web_crawl = False
+        mock_get_settings.return_value = settings
+        mock_http_class.return_value = self._http_loader(
+            [Document(page_content="Static", metadata={"source": urls[1]})], [urls[2]]
+        )
+        mock_selenium_class.return_value.load.return_value = [
+            Document(page_content="React", metadata={"source": urls[2]}),
+            Document(page_content="SPA", metadata={"source": urls[0]}),
+        ]
+
+        from app.loaders.web import WebLoader
+        docs = WebLoader(urls=urls).load()
+
+        assert mock_http_class.call_args.args[0] == urls[1:]
+        assert mock_selenium_class.call_args.kwargs["urls"] == [urls[0], urls[2]]
+        assert [doc.page_content for doc in docs] == ["SPA", "Static", "React"]
+
+    @patch("app.loaders.web.HTTPLoader")
+    @patch("app.loaders.web.SeleniumURLLoaderWithWait")
+    def test_snapshot_fresco_no_descarga(self, mock_selenium_class, mock_http_class, tmp_path):
+        """Las URLs con snapshot fresco se sirven sin HTTP ni navegador."""
+        from app.loaders.snapshots import SnapshotStore
+        from app.loaders.web import WebLoader
+        urls = ["https://example.com/1", "https://example.com/2"]
+        store = SnapshotStore(tmp_path, max_age_seconds=3600)
+        store.put(urls[0], {"renderer": "browser", "body": "<p>1</p>", "extracted": {"title": "1", "text": "Uno"}})
+        mock_http_class.return_value = self._http_loader(
+            [Document(page_content="Dos", metadata={"source": urls[1]})], []
+        )
+
+        with patch("app.loaders.web.get_snapshot_store", return_value=store):
+            docs = WebLoader(urls=urls).load()
+
+        assert mock_http_class.call_args.args[0] == [urls[1]]
+        mock_selenium_class.assert_not_called()
+        assert [doc.page_content for doc in docs] == ["Uno", "Dos"]
+
+    @patch("app.loaders.web.get_settings")
+    @patch("app.loaders.web.HTTPLoader")
+    @patch("app.loaders.web.SeleniumURLLoaderWithWait")
+    def test_modo_offline_usa_snapshots_vencidos(self, mock_selenium_class, mock_http_class, mock_get_settings, tmp_path):
+        """En modo offline se usan snapshots aunque estén vencidos y nunca se accede a la red."""
+        from app.loaders.snapshots import SnapshotStore
+        from app.loaders.web import WebLoader
+        settings = MagicMock()
+        settings.web_offline = True
+        settings.web_crawl = False
+        mock_get_settings.return_value = settings
+        urls = ["https://example.com/1", "https://example.com/2"]
+        store = SnapshotStore(tmp_path, max_age_seconds=0)
+        store.put(urls[0], {"renderer": "http", "body": "<p>1</p>", "extracted": {"title": "1", "text": "Uno"}})
+
+        with patch("app.loaders.web.get_snapshot_store", return_value=store):
+            docs = WebLoader(urls=urls).load()
+
+        mock_http_class.assert_not_called()
+        mock_selenium_class.assert_not_called()
+        assert [doc.page_content for doc in docs] == ["Uno"]
+
+    @patch("app.loaders.web.HTTPLoader")
+    @patch("app.loaders.web.SeleniumURLLoaderWithWait")
+    def test_crawler_sigue_enlaces_del_mismo_sitio(self, mock_selenium_class, mock_http_class):
+        """En modo crawler debe descargar las páginas enlazadas desde las semillas."""
+        seed = "https://example.com/"
+        product = "https://example.com/productos/1"
+        pages = {
+            seed: Document(page_content="Inicio", metadata={"source": seed, "links": [product, "https://otro.com/x"]}),
+            product: Document(page_content="Mesa", metadata={"source": product}),
+        }
+
+        def http_loader(urls, **kwargs):
+            return self._http_loader([pages[url] for url in urls], [])
+        mock_http_class.side_effect = http_loader
+
+        from app.loaders.web import WebLoader
+        docs = WebLoader(urls=[seed]).load()
+
+        assert [doc.page_content for doc in docs] == ["Inicio", "Mesa"]
+        assert [c.args[0] for c in mock_http_class.call_args_list] == [[seed], [product]]
+        assert all(c.kwargs["deadline"] is not None for c in mock_http_class.call_args_list)
+        mock_selenium_class.assert_not_called()
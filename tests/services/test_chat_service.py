@@ -7,7 +7,7 @@ import pytest
 class TestChatService:
     """Tests para la clase ChatService."""
 
-    def _create_service(self, mock_vector_store, mock_chat_model):
+    def _create_service(self, mock_vector_store, mock_chat_model, **kwargs):
         """Helper para crear un ChatService con mocks."""
         with patch("app.services.chat_service.get_settings") as mock_get_settings:
             mock_settings = MagicMock()
@@ -18,7 +18,7 @@ class TestChatService:
             mock_get_settings.return_value = mock_settings
 
             from app.services.chat_service import ChatService
-            return ChatService(vector_store=mock_vector_store, chat_model=mock_chat_model)
+            return ChatService(vector_store=mock_vector_store, chat_model=mock_chat_model, **kwargs)
 
     def test_format_docs(self):
         """Debe concatenar page_content de los documentos con doble salto de línea."""
@@ -114,3 +114,170 @@ class TestChatService:
         call_args = mock_model.invoke.call_args[0][0]
         # El contexto en el prompt debería estar truncado
         assert result == "Respuesta."
+
+    async def test_achat_con_documentos(self):
+        """El path async debe usar ainvoke del modelo y el retriever en el executor."""
+        from unittest.mock import AsyncMock
+
+        mock_vs = MagicMock()
+        mock_retriever = MagicMock()
+        mock_retriever.invoke.return_value = [
+            Document(page_content="Somos una mueblería", metadata={})
+        ]
+        mock_vs.as_retriever.return_value = mock_retriever
+
+        mock_model = MagicMock()
+        mock_response = MagicMock()
+        mock_response.content = "<think>razonando</think>Hermanos Jota es una mueblería."
+        mock_model.ainvoke = AsyncMock(return_value=mock_response)
+
+        service = self._create_service(mock_vs, mock_model)
+        result = await service.achat("¿Qué es Hermanos Jota?")
+
+        assert result == "Hermanos Jota es una mueblería."
+        mock_retriever.invoke.assert_called_once_with("¿Qué es Hermanos Jota?")
+        mock_model.ainvoke.assert_awaited_once()
+        mock_model.invoke.assert_not_called()
+
+    async def test_achat_sin_documentos(self):
+        """Debe retornar mensaje por defecto sin llamar al modelo."""
+        from unittest.mock import AsyncMock
+
+        mock_vs = MagicMock()
+        mock_retriever = MagicMock()
+        mock_retriever.invoke.return_value = []
+        mock_vs.as_retriever.return_value = mock_retriever
+
+        mock_model = MagicMock()
+        mock_model.ainvoke = AsyncMock()
+
+        service = self._create_service(mock_vs, mock_model)
+        result = await service.achat("Pregunta sin contexto")
+
+        assert "no tengo información disponible" in result.lower()
+        mock_model.ainvoke.assert_not_awaited()
+
+    async def test_astream_chat_emite_eventos(self):
+        """Debe emitir retrieval, los tokens del modelo y un evento final."""
+        mock_vs = MagicMock()
+        mock_retriever = MagicMock()
+        mock_retriever.invoke.return_value = [
+            Document(page_content="Somos una mueblería", metadata={})
+        ]
+        mock_vs.as_retriever.return_value = mock_retriever
+
+        async def fake_astream(messages):
+            for text in ["Hermanos ", "", "Jota."]:
+                chunk = MagicMock()
+                chunk.content = text
+                yield chunk
+
+        mock_model = MagicMock()
+        mock_model.astream = fake_astream
+
+        service = self._create_service(mock_vs, mock_model)
+        events = [e async for e in service.astream_chat("¿Qué es Hermanos Jota?")]
+
+        names = [name for name, _ in events]
+        assert names == ["retrieval", "token", "token", "end"]
+        assert events[0][1]["documents"] == 1
+        assert "".join(p["text"] for n, p in events if n == "token") == "Hermanos Jota."
+        assert events[-1][1]["chunks"] == 2
+        assert events[-1][1]["first_token_ms"] is not None
+
+    def test_chat_con_modelo_por_llamada(self):
+        """Un servicio sin modelo propio debe usar el modelo recibido en la llamada."""
+        mock_vs = MagicMock()
+        mock_retriever = MagicMock()
+        mock_retriever.invoke.return_value = [
+            Document(page_content="Somos una mueblería", metadata={})
+        ]
+        mock_vs.as_retriever.return_value = mock_retriever
+
+        mock_model = MagicMock()
+        mock_response = MagicMock()
+        mock_response.content = "Respuesta."
+        mock_model.invoke.return_value = mock_response
+
+        service = self._create_service(mock_vs, None)
+        result = service.chat("Pregunta", chat_model=mock_model)
+
+        assert result == "Respuesta."
+        mock_model.invoke.assert_called_once()
+
+    def test_chat_sin_modelo_lanza_error(self):
+        """Debe lanzar ValueError si no hay modelo en el servicio ni en la llamada."""
+        service = self._create_service(MagicMock(), None)
+
+        with pytest.raises(ValueError, match="modelo de chat"):
+            service.chat("Pregunta")
+
+    async def test_achat_usa_cache_semantico(self):
+        """La segunda pregunta equivalente debe responderse sin retrieval ni LLM."""
+        from unittest.mock import AsyncMock
+        from app.services.semantic_cache import SemanticCache
+
+        mock_vs = MagicMock()
+        mock_retriever = MagicMock()
+        mock_retriever.invoke.return_value = [
+            Document(page_content="Somos una mueblería", metadata={})
+        ]
+        mock_vs.as_retriever.return_value = mock_retriever
+
+        mock_model = MagicMock()
+        mock_response = MagicMock()
+        mock_response.content = "Hermanos Jota es una mueblería."
+        mock_model.ainvoke = AsyncMock(return_value=mock_response)
+
+        embeddings = MagicMock()
+        embeddings.embed_query.return_value = [0.6, 0.8]
+        cache = SemanticCache(embeddings=embeddings, threshold=0.95, max_size=10, ttl_seconds=60)
+
+        service = self._create_service(mock_vs, mock_model, semantic_cache=cache, cache_scope=("groq", "v1"))
+        first = await service.achat("¿Qué es Hermanos Jota?")
+        second = await service.achat("¿qué es hermanos jota?")
+
+        assert first == second == "Hermanos Jota es una mueblería."
+        mock_model.ainvoke.assert_awaited_once()
+        mock_retriever.invoke.assert_called_once()
+        assert cache.stats()["hits"] == 1
+
+    def test_retrieve_usa_cache_de_ids(self):
+        """La segunda consulta debe resolverse desde el docstore sin volver a buscar."""
+        from app.services.retrieval_cache import RetrievalCache
+
+        doc = Document(id="doc-1", page_content="Somos una mueblería", metadata={})
+        mock_vs = MagicMock()
+        mock_retriever = MagicMock()
+        mock_retriever.invoke.return_value = [doc]
+        mock_vs.as_retriever.return_value = mock_retriever
+        mock_vs.docstore.search.side_effect = lambda doc_id: doc if doc_id == "doc-1" else "not found"
+
+        cache = RetrievalCache(max_size=10)
+        service = self._create_service(mock_vs, MagicMock(), retrieval_cache=cache, index_version="v1")
+
+        first = service.retrieve("¿Qué es Hermanos Jota?")
+        second = service.retrieve("¿Qué es  Hermanos Jota? ")
+
+        assert first == second == [doc]
+        mock_retriever.invoke.assert_called_once()
+        mock_vs.docstore.search.assert_called_once_with("doc-1")
+
+    def test_retrieve_recalcula_si_falta_un_documento(self):
+        """Si un ID cacheado ya no existe en el docstore debe volver a buscar."""
+        from app.services.retrieval_cache import RetrievalCache
+
+        doc = Document(id="doc-1", page_content="Contenido", metadata={})
+        mock_vs = MagicMock()
+        mock_retriever = MagicMock()
+        mock_retriever.invoke.return_value = [doc]
+        mock_vs.as_retriever.return_value = mock_retriever
+        mock_vs.docstore.search.return_value = "ID doc-1 not found."
+
+        cache = RetrievalCache(max_size=10)
+        service = self._create_service(mock_vs, MagicMock(), retrieval_cache=cache, index_version="v1")
+
+        service.retrieve("pregunta")
+        service.retrieve("pregunta")
+
+        assert mock_retriever.invoke.call_count == 2
@@ -1,9 +1,13 @@
 """Tests para app/services/data_service.py"""
 from unittest.mock import patch, MagicMock, PropertyMock
+import json
+import time
 from pathlib import Path
 from langchain_core.documents import Document
 import pytest
 
+from app.services.vector_index import index_type_of
+
 
 class TestDataIngestionService:
     """Tests para la clase DataIngestionService."""
@@ -119,6 +123,7 @@ class TestDataIngestionService:
 
         mock_settings = MagicMock()
         mock_settings.persist_path_huggingface = mock_persist
+        mock_settings.vector_store_mmap = False
         mock_settings.chunk_size = 200
         mock_settings.chunk_overlap = 50
         mock_get_settings.return_value = mock_settings
@@ -156,3 +161,414 @@ class TestDataIngestionService:
 
         # No debería lanzar error
         service.print_vector_store_info()
+
+    @patch("app.services.data_service.get_settings")
+    def test_index_version_desde_metadata(self, mock_get_settings, tmp_path):
+        """Debe leer la versión del índice de store_meta.json y regenerarla al escribirla."""
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        mock_settings = MagicMock()
+        mock_settings.persist_path_huggingface = tmp_path
+        mock_settings.chunk_size = 200
+        mock_settings.chunk_overlap = 50
+        mock_get_settings.return_value = mock_settings
+
+        from app.services.data_service import DataIngestionService
+        service = DataIngestionService(embeddings=MagicMock(spec=HuggingFaceEmbeddings))
+
+        assert service.index_version == "0"  # sin índice persistido
+
+        service._write_store_meta()
+        first = service.index_version
+        service._index_version = None
+        assert service.index_version == first  # releído desde disco
+
+        service._write_store_meta()
+        assert service.index_version != first
+
+    @patch("app.services.data_service.get_settings")
+    def test_persist_path_con_cache_de_consultas(self, mock_get_settings):
+        """Debe resolver el path según el modelo real aunque esté envuelto en el cache."""
+        from langchain_huggingface import HuggingFaceEmbeddings
+        from app.embedding_models.cache import CachedQueryEmbeddings
+
+        mock_settings = MagicMock()
+        mock_settings.persist_path_huggingface = Path("/tmp/vs/hf")
+        mock_settings.chunk_size = 200
+        mock_settings.chunk_overlap = 50
+        mock_get_settings.return_value = mock_settings
+
+        embeddings = CachedQueryEmbeddings(MagicMock(spec=HuggingFaceEmbeddings), max_bytes=1024)
+
+        from app.services.data_service import DataIngestionService
+        service = DataIngestionService(embeddings=embeddings)
+
+        assert service._persist_path == Path("/tmp/vs/hf")
+
+
+class TestIngestaIncremental:
+    """Tests de vectorize() incremental con un FAISS real sobre tmp_path."""
+
+    @staticmethod
+    def _fake_embeddings():
+        """Embeddings deterministas de dimensión 8 derivados del texto."""
+        import hashlib
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        def embed(text):
+            digest = hashlib.sha256(text.encode("utf-8")).digest()
+            return [b / 255 for b in digest[:8]]
+
+        embeddings = MagicMock(spec=HuggingFaceEmbeddings)
+        embeddings.embed_documents.side_effect = lambda texts: [embed(t) for t in texts]
+        embeddings.embed_query.side_effect = embed
+        return embeddings
+
+    @staticmethod
+    def _service(tmp_path, embeddings, index_type="auto"):
+        """DataIngestionService con settings apuntando a tmp_path."""
+        with patch("app.services.data_service.get_settings") as mock_get_settings:
+            mock_settings = MagicMock()
+            mock_settings.persist_path_huggingface = tmp_path / "vs"
+            mock_settings.chunk_size = 200
+            mock_settings.chunk_overlap = 0
+            mock_settings.incremental_ingestion = True
+            mock_settings.embedding_cache_enabled = True
+            mock_settings.embedding_cache_path = tmp_path / "emb_cache"
+            mock_settings.ingestion_batch_size = 256
+            mock_settings.ingestion_prefetch_batches = 2
+            mock_settings.embedding_batch_size = 64
+            mock_settings.embedding_workers = 1
+            mock_settings.vector_store_mmap = True
+            mock_settings.docstore_backend = "sqlite"
+            mock_settings.docstore_cache_size = 16
+            mock_settings.vector_index_type = index_type
+            mock_settings.vector_index_auto_flat_max = 20_000
+            mock_settings.vector_index_auto_hnsw_max = 1_000_000
+            mock_settings.vector_index_nlist = 0
+            mock_settings.vector_index_nprobe = 16
+            mock_settings.vector_index_hnsw_m = 16
+            mock_settings.vector_index_ef_construction = 40
+            mock_settings.vector_index_ef_search = 64
+            mock_settings.vector_index_pq_m = 0
+            mock_settings.vector_index_train_size = 1000
+            mock_get_settings.return_value = mock_settings
+
+            from app.services.data_service import DataIngestionService
+            return DataIngestionService(embeddings=embeddings)
+
+    def test_chunk_id_determinista(self):
+        """El mismo chunk debe generar siempre el mismo ID y otro contenido otro ID."""
+        from app.services.data_service import DataIngestionService
+
+        chunk = Document(page_content="Sillas", metadata={"source": "a.pdf", "page": 0, "start_index": 0})
+        same = Document(page_content="Sillas", metadata={"source": "a.pdf", "page": 0, "start_index": 0})
+        other = Document(page_content="Mesas", metadata={"source": "a.pdf", "page": 0, "start_index": 0})
+
+        assert DataIngestionService.chunk_id(chunk) == DataIngestionService.chunk_id(same)
+        assert DataIngestionService.chunk_id(chunk) != DataIngestionService.chunk_id(other)
+
+    @patch("app.services.data_service.iter_documents")
+    def test_solo_embebe_chunks_nuevos(self, mock_load_docs, tmp_path):
+        """Una segunda ingesta debe embeber sólo lo nuevo y borrar lo eliminado."""
+        embeddings = self._fake_embeddings()
+        service = self._service(tmp_path, embeddings)
+
+        mock_load_docs.return_value = [
+            Document(page_content="Catálogo de sillas", metadata={"source": "a.pdf", "page": 0}),
+            Document(page_content="Catálogo de mesas", metadata={"source": "a.pdf", "page": 1}),
+        ]
+        service.vectorize()
+        first_version = service.index_version
+        assert service._vector_store.index.ntotal == 2
+        assert embeddings.embed_documents.call_count == 1
+
+        # cambia una página y se agrega otra
+        mock_load_docs.return_value = [
+            Document(page_content="Catálogo de sillas", metadata={"source": "a.pdf", "page": 0}),
+            Document(page_content="Catálogo de mesas 2025", metadata={"source": "a.pdf", "page": 1}),
+            Document(page_content="Catálogo de camas", metadata={"source": "b.pdf", "page": 0}),
+        ]
+        service._vector_store = None
+        store = service.vectorize()
+
+        embedded = embeddings.embed_documents.call_args[0][0]
+        assert sorted(embedded) == ["Catálogo de camas", "Catálogo de mesas 2025"]
+        assert store.index.ntotal == 3
+        contents = sorted(doc.page_content for doc in store.docstore.documents().values())
+        assert contents == ["Catálogo de camas", "Catálogo de mesas 2025", "Catálogo de sillas"]
+        assert service.index_version != first_version
+
+    @patch("app.services.data_service.iter_documents")
+    def test_sin_cambios_no_embebe(self, mock_load_docs, tmp_path):
+        """Si el corpus no cambió no debe embeber nada ni cambiar la versión."""
+        embeddings = self._fake_embeddings()
+        service = self._service(tmp_path, embeddings)
+        mock_load_docs.return_value = [
+            Document(page_content="Catálogo de sillas", metadata={"source": "a.pdf", "page": 0}),
+        ]
+
+        service.vectorize()
+        version = service.index_version
+        service.vectorize()
+
+        assert embeddings.embed_documents.call_count == 1
+        assert service.index_version == version
+
+    @patch("app.services.data_service.iter_documents")
+    def test_rebuild_reutiliza_cache_de_embeddings(self, mock_load_docs, tmp_path):
+        """Una reconstrucción completa no debe volver a embeber textos ya cacheados."""
+        embeddings = self._fake_embeddings()
+        service = self._service(tmp_path, embeddings)
+        mock_load_docs.return_value = [
+            Document(page_content="Catálogo de sillas", metadata={"source": "a.pdf", "page": 0}),
+            Document(page_content="Catálogo de mesas", metadata={"source": "a.pdf", "page": 1}),
+        ]
+
+        first = service.vectorize(incremental=False)
+        first_vectors = first.index.reconstruct_n(0, 2)
+        service._vector_store = None
+        second = service.vectorize(incremental=False)
+
+        assert embeddings.embed_documents.call_count == 1
+        assert (second.index.reconstruct_n(0, 2) == first_vectors).all()
+        # las consultas siguen usando el modelo original
+        assert second.embedding_function is embeddings
+
+    @patch("app.services.data_service.iter_documents")
+    def test_carga_mmap_de_solo_lectura(self, mock_load_docs, tmp_path):
+        """La API debe mapear el índice y una ingesta posterior no debe escribir sobre él."""
+        embeddings = self._fake_embeddings()
+        mock_load_docs.return_value = [
+            Document(page_content="Catálogo de sillas", metadata={"source": "a.pdf", "page": 0}),
+            Document(page_content="Catálogo de mesas", metadata={"source": "a.pdf", "page": 1}),
+        ]
+        self._service(tmp_path, embeddings).vectorize()
+
+        served = self._service(tmp_path, embeddings).load_vector_store()
+        assert served.index.ntotal == 2
+        assert served.similarity_search("Catálogo de mesas", k=1)[0].page_content == "Catálogo de mesas"
+
+        # la ingesta carga su propia copia y reemplaza los archivos sin tocar el índice mapeado
+        mock_load_docs.return_value.append(
+            Document(page_content="Catálogo de camas", metadata={"source": "b.pdf", "page": 0})
+        )
+        updated = self._service(tmp_path, embeddings).vectorize()
+
+        assert updated.index.ntotal == 3
+        assert served.index.ntotal == 2
+        assert served.similarity_search("Catálogo de mesas", k=1)[0].page_content == "Catálogo de mesas"
+        assert sorted(path.name for path in (tmp_path / "vs").iterdir()) == [
+            "docstore.sqlite", "index.faiss", "manifest.json", "store_meta.json"
+        ]
+
+    @patch("app.services.data_service.iter_documents")
+    def test_chunks_en_docstore_en_disco(self, mock_load_docs, tmp_path):
+        """La ingesta debe escribir los chunks al docstore SQLite, no acumularlos en memoria."""
+        from app.services.docstore import SQLiteDocstore
+
+        embeddings = self._fake_embeddings()
+        mock_load_docs.return_value = [
+            Document(page_content=f"Producto {i}", metadata={"source": "a.pdf", "page": i}) for i in range(5)
+        ]
+        service = self._service(tmp_path, embeddings)
+        service.settings.ingestion_batch_size = 2
+
+        store = service.vectorize()
+
+        assert isinstance(store.docstore, SQLiteDocstore)
+        assert len(store.docstore) == 5
+        assert store.similarity_search("Producto 3", k=1)[0].metadata["page"] == 3
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["emb_cache", "vs"]
+
+    @patch("app.services.data_service.iter_documents")
+    def test_backend_pickle_exporta_el_docstore(self, mock_load_docs, tmp_path):
+        """Con docstore_backend="pickle" debe guardarse también index.pkl para la API."""
+        embeddings = self._fake_embeddings()
+        mock_load_docs.return_value = [
+            Document(page_content="Catálogo de sillas", metadata={"source": "a.pdf", "page": 0}),
+        ]
+        service = self._service(tmp_path, embeddings)
+        service.settings.docstore_backend = "pickle"
+        service.vectorize()
+
+        served = self._service(tmp_path, embeddings)
+        served.settings.docstore_backend = "pickle"
+        served.settings.vector_store_mmap = False
+
+        assert served.load_vector_store().similarity_search("sillas", k=1)[0].page_content == "Catálogo de sillas"
+        assert (tmp_path / "vs" / "index.pkl").exists()
+
+    @patch("app.services.data_service.iter_documents")
+    def test_api_no_deserializa_pickle(self, mock_load_docs, tmp_path):
+        """La API debe leer los chunks desde SQLite, sin cargar index.pkl."""
+        from app.services.docstore import SQLiteDocstore
+
+        embeddings = self._fake_embeddings()
+        mock_load_docs.return_value = [
+            Document(page_content="Catálogo de sillas", metadata={"source": "a.pdf", "page": 0}),
+            Document(page_content="Catálogo de mesas", metadata={"source": "a.pdf", "page": 1}),
+        ]
+        self._service(tmp_path, embeddings).vectorize()
+
+        with patch("app.services.data_service.pickle.load", side_effect=AssertionError("pickle en la API")):
+            served = self._service(tmp_path, embeddings).load_vector_store()
+            doc = served.similarity_search("Catálogo de sillas", k=1)[0]
+
+        assert isinstance(served.docstore, SQLiteDocstore)
+        assert doc.page_content == "Catálogo de sillas"
+        assert doc.metadata["source"] == "a.pdf"
+        assert doc.id
+
+    def test_migra_vector_store_con_pickle(self, tmp_path):
+        """Un vector store con sólo index.pkl debe poder servirse desde SQLite sin reembeber."""
+        from langchain_community.vectorstores import FAISS
+
+        embeddings = self._fake_embeddings()
+        FAISS.from_texts(
+            ["Catálogo de sillas", "Catálogo de mesas"], embeddings, metadatas=[{"page": 0}, {"page": 1}]
+        ).save_local(tmp_path / "vs", index_name="index")
+        embeddings.embed_documents.reset_mock()
+
+        self._service(tmp_path, embeddings).migrate_store()
+        with patch("app.services.data_service.pickle.load", side_effect=AssertionError("pickle en la API")):
+            served = self._service(tmp_path, embeddings).load_vector_store()
+            doc = served.similarity_search("Catálogo de mesas", k=1)[0]
+
+        embeddings.embed_documents.assert_not_called()
+        assert doc.metadata["page"] == 1
+        assert json.loads((tmp_path / "vs" / "store_meta.json").read_text())["vectors"] == 2
+        assert not (tmp_path / "vs" / "manifest.json").exists()
+
+    @pytest.mark.parametrize("index_type", ["ivf_flat", "hnsw"])
+    @patch("app.services.data_service.iter_documents")
+    def test_indice_aproximado_incremental(self, mock_load_docs, index_type, tmp_path):
+        """Un índice ANN debe persistir su tipo, servir MMR mapeado y admitir borrar chunks."""
+        embeddings = self._fake_embeddings()
+        mock_load_docs.return_value = [
+            Document(page_content=f"Producto {i}", metadata={"source": "a.pdf", "page": i}) for i in range(50)
+        ]
+        self._service(tmp_path, embeddings, index_type).vectorize()
+
+        meta = json.loads((tmp_path / "vs" / "store_meta.json").read_text())
+        assert meta["index_type"] == index_type
+        assert meta["vectors"] == 50
+
+        served = self._service(tmp_path, embeddings, index_type).load_vector_store()
+        docs = served.max_marginal_relevance_search("Producto 7", k=3, fetch_k=10)
+        assert docs[0].page_content == "Producto 7"
+
+        # se elimina una página y se agrega otra: borrar requiere pasar por un índice exacto
+        mock_load_docs.return_value = mock_load_docs.return_value[1:] + [
+            Document(page_content="Producto nuevo", metadata={"source": "b.pdf", "page": 0})
+        ]
+        updated = self._service(tmp_path, embeddings, index_type).vectorize()
+
+        assert index_type_of(updated.index) == index_type
+        assert updated.index.ntotal == 50
+        contents = {doc.page_content for doc in updated.docstore.documents().values()}
+        assert "Producto 0" not in contents and "Producto nuevo" in contents
+        assert updated.similarity_search("Producto nuevo", k=1)[0].page_content == "Producto nuevo"
+
+
+class TestIngestaEnStreaming:
+    """Tests del pipeline de ingesta por lotes."""
+
+    @patch("app.services.data_service.iter_documents")
+    def test_embebe_por_lotes(self, mock_iter_docs, tmp_path):
+        """Debe embeber e indexar en lotes de ingestion_batch_size, sin duplicar chunks repetidos."""
+        embeddings = TestIngestaIncremental._fake_embeddings()
+        service = TestIngestaIncremental._service(tmp_path, embeddings)
+        service.settings.ingestion_batch_size = 2
+        mock_iter_docs.return_value = [
+            Document(page_content=f"Producto número {i}", metadata={"source": "a.pdf", "page": i})
+            for i in range(5)
+        ] + [Document(page_content="Producto número 0", metadata={"source": "a.pdf", "page": 0})]
+
+        store = service.vectorize(incremental=False)
+
+        batch_sizes = [len(c.args[0]) for c in embeddings.embed_documents.call_args_list]
+        assert batch_sizes == [2, 2, 1]
+        assert store.index.ntotal == 5
+        assert store.embedding_function is embeddings
+        manifest = json.loads((tmp_path / "vs" / "manifest.json").read_text())["chunks"]
+        assert len(manifest) == 5
+
+    @patch("app.services.data_service.iter_documents")
+    def test_lotes_segun_la_concurrencia_del_modelo(self, mock_iter_docs, tmp_path):
+        """Si el modelo pide más textos por llamada (Gemini) los lotes deben alcanzar ese tamaño."""
+        embeddings = TestIngestaIncremental._fake_embeddings()
+        service = TestIngestaIncremental._service(tmp_path, embeddings)
+        service.settings.ingestion_batch_size = 2
+        mock_iter_docs.return_value = [
+            Document(page_content=f"Producto número {i}", metadata={"source": "a.pdf", "page": i})
+            for i in range(5)
+        ]
+        remote = MagicMock(embed_documents=embeddings.embed_documents, texts_per_call=lambda: 3)
+
+        with patch("app.services.data_service.build_ingestion_embeddings", return_value=remote):
+            service.vectorize(incremental=False)
+
+        batch_sizes = [len(c.args[0]) for c in embeddings.embed_documents.call_args_list]
+        assert batch_sizes == [3, 2]
+
+    @patch("app.services.data_service.iter_documents")
+    def test_sin_documentos_lanza_error(self, mock_iter_docs, tmp_path):
+        """Si la carga no produce chunks debe fallar sin crear el vector store."""
+        service = TestIngestaIncremental._service(tmp_path, TestIngestaIncremental._fake_embeddings())
+        mock_iter_docs.return_value = []
+
+        with pytest.raises(RuntimeError):
+            service.vectorize(incremental=False)
+        assert not (tmp_path / "vs").exists()
+
+
+class TestPrefetch:
+    """Tests para prefetch (productor/consumidor acotado)."""
+
+    def test_conserva_orden(self):
+        """Debe entregar todos los elementos en orden."""
+        from app.services.data_service import prefetch
+        assert list(prefetch(range(10), max_items=2)) == list(range(10))
+
+    def test_productor_no_se_adelanta(self):
+        """El productor no debe adelantarse más que max_items elementos al consumidor."""
+        from app.services.data_service import prefetch
+        produced = []
+
+        def source():
+            for i in range(20):
+                produced.append(i)
+                yield i
+
+        for consumed in prefetch(source(), max_items=2):
+            time.sleep(0.01)
+            # elementos en el buffer + uno retenido por el productor esperando lugar
+            assert len(produced) - (consumed + 1) <= 3
+
+    def test_propaga_errores_del_productor(self):
+        """Un error en la carga debe llegar al consumidor."""
+        from app.services.data_service import prefetch
+
+        def source():
+            yield 1
+            raise ValueError("PDF roto")
+
+        with pytest.raises(ValueError):
+            list(prefetch(source(), max_items=2))
+
+    def test_corte_del_consumidor_detiene_al_productor(self):
+        """Si el consumidor deja de iterar, el productor debe terminar."""
+        from app.services.data_service import prefetch
+        produced = []
+
+        def source():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        items = prefetch(source(), max_items=1)
+        next(items)
+        items.close()
+
+        assert len(produced) < 10
@@ -0,0 +1,109 @@
+"""Tests para app/services/docstore.py"""
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.documents import Document
+import pytest
+
+from app.services.docstore import SQLiteDocstore, write_sqlite_docstore
+
+
+@pytest.fixture
+def docstore_path(tmp_path):
+    """Docstore SQLite con dos chunks."""
+    path = tmp_path / "docstore.sqlite"
+    write_sqlite_docstore(
+        path,
+        {
+            "a": Document(page_content="Catálogo de sillas", metadata={"source": "a.pdf", "page": 0}),
+            "b": Document(page_content="Catálogo de mesas", metadata={"source": "a.pdf", "page": 1}),
+        },
+        {0: "a", 1: "b"}
+    )
+    return path
+
+
+class TestSQLiteDocstore:
+    """Tests para la clase SQLiteDocstore."""
+
+    def test_lee_documentos_y_posiciones(self, docstore_path):
+        """Debe devolver el chunk con su ID y metadata, y el mapeo de posiciones del índice."""
+        docstore = SQLiteDocstore(docstore_path)
+
+        doc = docstore.search("b")
+
+        assert doc == Document(id="b", page_content="Catálogo de mesas", metadata={"source": "a.pdf", "page": 1})
+        assert docstore.index_to_docstore_id() == {0: "a", 1: "b"}
+        assert len(docstore) == 2
+
+    def test_id_inexistente(self, docstore_path):
+        """Un ID desconocido debe devolver un mensaje, como InMemoryDocstore."""
+        assert SQLiteDocstore(docstore_path).search("x") == "ID x not found."
+
+    def test_cache_lru_de_documentos(self, docstore_path):
+        """Los chunks consultados deben servirse desde memoria y respetar el tamaño máximo."""
+        docstore = SQLiteDocstore(docstore_path, cache_size=1)
+
+        first = docstore.search("a")
+        assert docstore.search("a") is first
+        docstore.search("b")
+        assert docstore.search("a") is not first
+
+        assert docstore.stats()["hits"] == 1
+        assert docstore.stats()["misses"] == 3
+        assert docstore.stats()["size"] == 1
+
+    def test_lectura_desde_varios_hilos(self, docstore_path):
+        """Cada hilo del pool de retrieval debe poder consultar el docstore."""
+        docstore = SQLiteDocstore(docstore_path, cache_size=0)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(docstore.search, ["a", "b"] * 8))
+
+        assert [doc.page_content for doc in results[:2]] == ["Catálogo de sillas", "Catálogo de mesas"]
+
+    def test_sigue_leyendo_la_generacion_cargada(self, docstore_path):
+        """Si una ingesta reemplaza el archivo, hilos nuevos deben seguir viendo los chunks del índice cargado."""
+        docstore = SQLiteDocstore(docstore_path, cache_size=0)
+        write_sqlite_docstore(
+            docstore_path,
+            {"a": Document(page_content="Catálogo de sillas", metadata={})},
+            {0: "a"}
+        )
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            doc = executor.submit(docstore.search, "b").result()
+
+        assert doc.page_content == "Catálogo de mesas"
+        assert len(SQLiteDocstore(docstore_path)) == 1
+
+    def test_es_de_solo_lectura(self, docstore_path):
+        """Abierto para la API no debe permitir borrar ni agregar."""
+        with pytest.raises(NotImplementedError):
+            SQLiteDocstore(docstore_path).delete(["a"])
+        with pytest.raises(NotImplementedError):
+            SQLiteDocstore(docstore_path).add({"c": Document(page_content="Camas")})
+
+    def test_escritura_para_la_ingesta(self, tmp_path):
+        """Con read_only=False debe agregar, borrar y guardar posiciones directo en el archivo."""
+        docstore = SQLiteDocstore(tmp_path / "docstore.sqlite", cache_size=0, read_only=False)
+        docstore.add({"a": Document(page_content="Sillas"), "b": Document(page_content="Mesas")})
+        docstore.delete(["a"])
+        docstore.write_positions({0: "b"})
+        docstore.close()
+
+        reopened = SQLiteDocstore(tmp_path / "docstore.sqlite")
+        assert reopened.search("a") == "ID a not found."
+        assert reopened.search("b").page_content == "Mesas"
+        assert reopened.index_to_docstore_id() == {0: "b"}
+
+    def test_ids_repetidos(self, tmp_path):
+        """Agregar un ID existente debe fallar como InMemoryDocstore."""
+        docstore = SQLiteDocstore(tmp_path / "docstore.sqlite", read_only=False)
+        docstore.add({"a": Document(page_content="Sillas")})
+
+        with pytest.raises(ValueError):
+            docstore.add({"a": Document(page_content="Mesas")})
+
+    def test_archivo_inexistente(self, tmp_path):
+        """Debe fallar al construirse si el archivo no existe."""
+        with pytest.raises(FileNotFoundError):
+            SQLiteDocstore(tmp_path / "no-existe.sqlite")
@@ -0,0 +1,27 @@
+"""Tests para app/services/memory.py"""
+from unittest.mock import patch
+import os
+
+from app.services.memory import process_memory
+
+
+class TestProcessMemory:
+    """Tests para la función process_memory."""
+
+    def test_lee_proc_status(self, tmp_path):
+        """Debe separar la memoria anónima de la mapeada desde archivos."""
+        status = tmp_path / "status"
+        status.write_text("Name:\tpython\nVmRSS:\t  204800 kB\nRssAnon:\t  102400 kB\nRssFile:\t  102400 kB\n")
+
+        with patch("app.services.memory.PROC_STATUS", status):
+            memory = process_memory()
+
+        assert memory == {"pid": os.getpid(), "rss_mb": 200.0, "rss_anon_mb": 100.0, "rss_file_mb": 100.0}
+
+    def test_sin_proc_usa_getrusage(self, tmp_path):
+        """Fuera de Linux debe informar al menos el RSS máximo."""
+        with patch("app.services.memory.PROC_STATUS", tmp_path / "no-existe"):
+            memory = process_memory()
+
+        assert memory["rss_mb"] > 0
+        assert memory["rss_file_mb"] is None
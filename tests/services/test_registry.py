@@ -0,0 +1,45 @@
+"""Tests para app/services/registry.py"""
+from unittest.mock import MagicMock, patch
+import pytest
+
+
+class TestChatServiceRegistry:
+    """Tests para la clase ChatServiceRegistry."""
+
+    @patch("app.services.registry.ChatService")
+    def test_reutiliza_servicio_por_proveedor(self, mock_chat_svc_class, mock_vector_store):
+        """Debe construir un único ChatService por proveedor y reutilizarlo."""
+        mock_chat_svc_class.side_effect = lambda *a, **kw: MagicMock()
+
+        from app.services.registry import ChatServiceRegistry
+        registry = ChatServiceRegistry(mock_vector_store)
+        first = registry.get("groq")
+        second = registry.get("groq")
+        other = registry.get("gemini")
+
+        assert first is second
+        assert other is not first
+        assert mock_chat_svc_class.call_count == 2
+
+    @patch("app.services.registry.get_model_config")
+    @patch("app.services.registry.ChatService")
+    def test_config_distinta_crea_otro_servicio(self, mock_chat_svc_class, mock_model_config, mock_vector_store):
+        """Un cambio en la configuración del modelo debe generar otro servicio."""
+        mock_chat_svc_class.side_effect = lambda *a, **kw: MagicMock()
+        mock_model_config.side_effect = [("modelo-a",), ("modelo-b",)]
+
+        from app.services.registry import ChatServiceRegistry
+        registry = ChatServiceRegistry(mock_vector_store)
+
+        assert registry.get("groq") is not registry.get("groq")
+
+    @patch("app.services.registry.get_ollama_session")
+    @patch("app.services.registry.ChatService")
+    def test_ollama_usa_limiter_de_la_sesion(self, mock_chat_svc_class, mock_get_session, mock_vector_store):
+        """El servicio de Ollama debe limitar la concurrencia con los slots de la sesión."""
+        from app.services.registry import ChatServiceRegistry
+        ChatServiceRegistry(mock_vector_store).warmup(["ollama", "groq"])
+
+        ollama_call, groq_call = mock_chat_svc_class.call_args_list
+        assert ollama_call.kwargs["generation_limiter"] is mock_get_session.return_value.limiter
+        assert groq_call.kwargs["generation_limiter"] is None
@@ -0,0 +1,46 @@
+"""Tests para app/services/retrieval_cache.py"""
+import pytest
+
+from app.services.retrieval_cache import RetrievalCache
+
+
+KEY = ("¿horarios?", 5, 20, 0.5)
+
+
+class TestRetrievalCache:
+    """Tests para la clase RetrievalCache."""
+
+    def test_guarda_y_recupera_ids(self):
+        """Debe retornar los IDs almacenados para la misma clave y versión."""
+        cache = RetrievalCache(max_size=4)
+        cache.put(KEY, "v1", ["a", "b"])
+
+        assert cache.get(KEY, "v1") == ["a", "b"]
+        assert cache.stats()["hits"] == 1
+
+    def test_parametros_mmr_forman_parte_de_la_clave(self):
+        """Otra combinación de k/fetch_k/lambda no debe reutilizar el resultado."""
+        cache = RetrievalCache(max_size=4)
+        cache.put(KEY, "v1", ["a"])
+
+        assert cache.get(("¿horarios?", 10, 20, 0.5), "v1") is None
+
+    def test_nueva_version_invalida_el_cache(self):
+        """Al cambiar la versión del índice deben descartarse todas las entradas."""
+        cache = RetrievalCache(max_size=4)
+        cache.put(KEY, "v1", ["a"])
+        cache.put(("otra", 5, 20, 0.5), "v1", ["b"])
+
+        assert cache.get(KEY, "v2") is None
+        assert cache.stats()["size"] == 0
+
+    def test_evict_lru(self):
+        """Debe descartar la consulta menos usada al superar max_size."""
+        cache = RetrievalCache(max_size=2)
+        cache.put(("q1",), "v1", ["a"])
+        cache.put(("q2",), "v1", ["b"])
+        cache.get(("q1",), "v1")
+        cache.put(("q3",), "v1", ["c"])
+
+        assert cache.get(("q2",), "v1") is None
+        assert cache.get(("q1",), "v1") == ["a"]
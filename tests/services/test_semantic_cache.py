@@ -0,0 +1,94 @@
+"""Tests para app/services/semantic_cache.py"""
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pytest
+
+from app.embedding_models.cache import CachedQueryEmbeddings
+from app.services.semantic_cache import SemanticCache
+
+
+VECTORS = {
+    "cuáles son los productos más vendidos?": [1.0, 0.0, 0.0],
+    "¿cuáles son los productos más vendidos?": [0.99, 0.1, 0.0],
+    "horarios de atención": [0.0, 1.0, 0.0],
+    "envíos": [0.0, 0.0, 1.0],
+}
+
+
+@pytest.fixture
+def cache():
+    """SemanticCache con embeddings deterministas por pregunta (sin distinguir mayúsculas)."""
+    embeddings = MagicMock()
+    embeddings.embed_query.side_effect = lambda text: VECTORS[text.lower()]
+    return SemanticCache(embeddings=embeddings, threshold=0.95, max_size=2, ttl_seconds=60)
+
+
+class TestSemanticCache:
+    """Tests para la clase SemanticCache."""
+
+    def test_hit_con_pregunta_similar(self, cache):
+        """Una pregunta casi idéntica debe reutilizar la respuesta previa."""
+        cache.store(cache.embed("Cuáles son los productos  más vendidos?"), "Cuáles son los productos más vendidos?", "Sillas.", "groq")
+
+        result = cache.lookup(cache.embed("¿Cuáles son los productos más vendidos?"), "groq")
+
+        assert result == "Sillas."
+        assert cache.stats()["hits"] == 1
+
+    def test_miss_bajo_threshold(self, cache):
+        """Una pregunta distinta no debe devolver la respuesta cacheada."""
+        cache.store(cache.embed("envíos"), "envíos", "Enviamos a todo el país.", "groq")
+
+        assert cache.lookup(cache.embed("horarios de atención"), "groq") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_scope_aislado(self, cache):
+        """Las respuestas de un scope no deben servirse en otro."""
+        vector = cache.embed("envíos")
+        cache.store(vector, "envíos", "Respuesta groq.", ("groq", "v1"))
+
+        assert cache.lookup(vector, ("gemini", "v1")) is None
+        assert cache.lookup(vector, ("groq", "v2")) is None
+
+    def test_evict_lru_por_tamano(self, cache):
+        """Debe descartar la entrada menos usada al superar max_size."""
+        for question in ("envíos", "horarios de atención", "cuáles son los productos más vendidos?"):
+            cache.store(cache.embed(question), question, f"R: {question}", "groq")
+
+        assert cache.lookup(cache.embed("envíos"), "groq") is None
+        assert cache.stats()["size"] == 2
+        assert cache.stats()["evictions"] == 1
+
+    def test_evict_por_ttl(self, cache):
+        """Las entradas vencidas no deben servirse."""
+        vector = cache.embed("envíos")
+        with patch("app.services.semantic_cache.time.monotonic", return_value=100.0):
+            cache.store(vector, "envíos", "Respuesta.", "groq")
+        with patch("app.services.semantic_cache.time.monotonic", return_value=161.0):
+            assert cache.lookup(vector, "groq") is None
+
+    def test_hit_rate(self, cache):
+        """Debe reportar la tasa de aciertos."""
+        vector = cache.embed("envíos")
+        cache.lookup(vector, "groq")
+        cache.store(vector, "envíos", "Respuesta.", "groq")
+        cache.lookup(vector, "groq")
+
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_vector_normalizado(self, cache):
+        """El embedding almacenado debe tener norma unitaria."""
+        vector = cache.embed("¿cuáles son los productos más vendidos?")
+        assert np.isclose(np.linalg.norm(vector), 1.0)
+
+    def test_comparte_embedding_con_el_retrieval(self):
+        """La pregunta debe embeberse igual que en el retrieval: una sola pasada del modelo."""
+        model = MagicMock()
+        model.embed_query.return_value = [1.0, 0.0, 0.0]
+        embeddings = CachedQueryEmbeddings(model, max_bytes=1024 * 1024)
+        cache = SemanticCache(embeddings=embeddings, threshold=0.95, max_size=2, ttl_seconds=60)
+
+        cache.embed("¿Cuáles son  los Envíos?")
+        embeddings.embed_query("¿Cuáles son los Envíos?")
+
+        model.embed_query.assert_called_once_with("¿Cuáles son los Envíos?")
@@ -0,0 +1,56 @@
+"""Tests para app/services/think_filter.py"""
+import pytest
+
+from app.services.think_filter import ThinkBlockFilter
+from app.services.chat_service import ChatService
+
+
+def _run(chunks):
+    """Alimenta el filtro chunk a chunk y retorna el texto visible completo."""
+    think_filter = ThinkBlockFilter()
+    out = "".join(think_filter.feed(chunk) for chunk in chunks)
+    return out + think_filter.flush(), think_filter
+
+
+class TestThinkBlockFilter:
+    """Tests para la clase ThinkBlockFilter."""
+
+    def test_elimina_bloque_think(self):
+        """Debe descartar el razonamiento y emitir solo el texto visible."""
+        out, _ = _run(["<think>Pensando...</think>", "Respuesta limpia."])
+        assert out == "Respuesta limpia."
+
+    def test_tags_partidos_entre_chunks(self):
+        """Debe reconocer tags de apertura y cierre partidos entre chunks."""
+        out, _ = _run(["<th", "ink>razono", " mucho</th", "ink>\n\nHola", " mundo"])
+        assert out == "Hola mundo"
+
+    def test_emite_texto_antes_del_final(self):
+        """El texto visible debe salir apenas llega, sin esperar el final del stream."""
+        think_filter = ThinkBlockFilter()
+        assert think_filter.feed("<think>razono</think>") == ""
+        assert think_filter.feed("Hola") == "Hola"
+
+    def test_texto_parecido_a_tag_no_se_pierde(self):
+        """Un '<' que no forma un tag debe emitirse como texto normal."""
+        out, _ = _run(["a < b y c <t", "d"])
+        assert out == "a < b y c <td"
+
+    def test_cuenta_tokens_de_razonamiento(self):
+        """Debe contar los chunks que pertenecen al bloque de razonamiento."""
+        _, think_filter = _run(["<think>", "uno", "dos", "</think>", "Hola"])
+        assert think_filter.reasoning_tokens == 4
+
+    @pytest.mark.parametrize("text", [
+        "<think>a\nb</think>\n\nRespuesta final.  ",
+        "x<think>1</think>y<think>2</think> z ",
+        "Respuesta normal sin bloques think.",
+        "  <think></think>  ",
+    ])
+    def test_equivalente_a_format_response(self, text):
+        """Con cualquier partición en chunks debe coincidir con format_response."""
+        expected = ChatService.format_response(text)
+        for size in (1, 2, 3, 7):
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            out, _ = _run(chunks)
+            assert out == expected
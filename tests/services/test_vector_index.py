@@ -0,0 +1,103 @@
+"""Tests para app/services/vector_index.py"""
+from unittest.mock import MagicMock
+import faiss
+import numpy as np
+import pytest
+
+from app.services.vector_index import (
+    build_index, choose_index_type, configure_search, index_type_of, reconstruct_all, to_flat
+)
+
+
+def _settings(index_type="auto"):
+    """Settings simulados con parámetros chicos para construir rápido."""
+    settings = MagicMock()
+    settings.vector_index_type = index_type
+    settings.vector_index_auto_flat_max = 1000
+    settings.vector_index_auto_hnsw_max = 100_000
+    settings.vector_index_nlist = 0
+    settings.vector_index_nprobe = 8
+    settings.vector_index_hnsw_m = 16
+    settings.vector_index_ef_construction = 40
+    settings.vector_index_ef_search = 48
+    settings.vector_index_pq_m = 0
+    settings.vector_index_train_size = 2000
+    return settings
+
+
+@pytest.fixture
+def vectors():
+    """Vectores aleatorios reproducibles de dimensión 32."""
+    return np.random.default_rng(7).random((4000, 32), dtype=np.float32)
+
+
+class TestChooseIndexType:
+    """Tests para la selección automática del tipo de índice."""
+
+    def test_auto_segun_cantidad_de_chunks(self):
+        """Exacto para corpus chicos, HNSW para medianos e IVF-PQ para grandes."""
+        settings = _settings()
+
+        assert choose_index_type(999, settings) == "flat"
+        assert choose_index_type(1000, settings) == "hnsw"
+        assert choose_index_type(100_000, settings) == "ivf_pq"
+
+    def test_tipo_explicito(self):
+        """Un tipo configurado explícitamente no depende de la cantidad de chunks."""
+        assert choose_index_type(10, _settings("ivf_flat")) == "ivf_flat"
+
+    def test_tipo_no_soportado(self):
+        """Un tipo desconocido debe lanzar ValueError."""
+        with pytest.raises(ValueError):
+            choose_index_type(10, _settings("lsh"))
+
+
+class TestBuildIndex:
+    """Tests para la construcción de índices aproximados."""
+
+    @pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "hnsw", "ivf_pq"])
+    def test_construye_y_encuentra_vecinos(self, vectors, index_type):
+        """Cada tipo debe encontrar el propio vector y permitir reconstruir (MMR)."""
+        index = build_index(vectors, index_type, faiss.METRIC_L2, _settings())
+
+        assert index_type_of(index) == index_type
+        assert index.ntotal == len(vectors)
+        _, ids = index.search(vectors[:20], 1)
+        assert (ids[:, 0] == np.arange(20)).mean() >= 0.9
+        assert index.reconstruct(3).shape == (32,)
+
+    def test_parametros_de_busqueda(self, vectors):
+        """nprobe y efSearch deben aplicarse desde la configuración."""
+        ivf = build_index(vectors, "ivf_flat", faiss.METRIC_L2, _settings())
+        hnsw = build_index(vectors, "hnsw", faiss.METRIC_L2, _settings())
+
+        assert faiss.downcast_index(ivf).nprobe == 8
+        assert faiss.downcast_index(hnsw).hnsw.efSearch == 48
+
+        settings = _settings()
+        settings.vector_index_nprobe = 2
+        configure_search(ivf, settings)
+        assert faiss.downcast_index(ivf).nprobe == 2
+
+    def test_ivf_con_pocos_vectores(self):
+        """Con pocos vectores IVF debe usar menos listas en lugar de fallar el entrenamiento."""
+        few = np.random.default_rng(1).random((10, 8), dtype=np.float32)
+
+        index = build_index(few, "ivf_pq", faiss.METRIC_L2, _settings())
+
+        assert index.ntotal == 10
+        assert faiss.downcast_index(index).nlist == 1
+
+
+class TestToFlat:
+    """Tests para la conversión a índice exacto."""
+
+    @pytest.mark.parametrize("index_type", ["ivf_flat", "hnsw"])
+    def test_sin_perdida(self, vectors, index_type):
+        """HNSW e IVF-Flat deben convertirse a exacto con los mismos vectores y posiciones."""
+        index = build_index(vectors, index_type, faiss.METRIC_L2, _settings())
+
+        flat = to_flat(index)
+
+        assert index_type_of(flat) == "flat"
+        np.testing.assert_array_equal(reconstruct_all(flat), vectors)
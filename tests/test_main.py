@@ -1,14 +1,31 @@
 """Tests para app/main.py — endpoints FastAPI."""
+from pathlib import Path
 from unittest.mock import patch, MagicMock, AsyncMock
+import os
+import re
+import subprocess
+import sys
 import pytest
 from fastapi.testclient import TestClient
 
+ROOT = Path(__file__).resolve().parent.parent
+
+# módulos que sólo se usan al elegir un proveedor, al ingestar o al scrapear
+HEAVY_MODULES = {
+    "langchain_groq", "langchain_google_genai", "langchain_ollama", "ollama",
+    "langchain_huggingface", "sentence_transformers", "torch",
+    "selenium", "pymupdf", "langserve",
+}
+# holgado para máquinas de CI lentas; la verificación estricta es la de módulos
+IMPORT_BUDGET_SECONDS = 5.0
+
 
 @pytest.fixture
 def mock_app_dependencies():
     """Mock de todas las dependencias externas antes de importar app."""
     with patch("app.main.get_embeddings") as mock_emb, \
          patch("app.main.DataIngestionService") as mock_data_svc, \
+         patch("app.main.warmup_hugging_face_embeddings") as mock_warmup, \
          patch("app.main.get_settings") as mock_get_settings:
 
         mock_settings = MagicMock()
@@ -33,6 +50,7 @@ def mock_app_dependencies():
             "vector_store": mock_vs,
             "data_service": mock_service,
             "settings": mock_settings,
+            "warmup": mock_warmup,
         }
 
 
@@ -59,16 +77,16 @@ class TestHealthCheck:
 class TestChatEndpoint:
     """Tests para el endpoint POST /api/chat."""
 
-    @patch("app.main.ChatService")
+    @patch("app.main.chat_service_registry")
     @patch("app.main.get_chat_model")
-    def test_chat_exitoso(self, mock_get_model, mock_chat_svc_class, client):
+    def test_chat_exitoso(self, mock_get_model, mock_registry, client):
         """Debe retornar respuesta exitosa con modelo válido."""
         mock_model = MagicMock()
         mock_get_model.return_value = mock_model
 
         mock_chat_svc = MagicMock()
-        mock_chat_svc.chat.return_value = "Respuesta de prueba."
-        mock_chat_svc_class.return_value = mock_chat_svc
+        mock_chat_svc.achat = AsyncMock(return_value="Respuesta de prueba.")
+        mock_registry.get.return_value = mock_chat_svc
 
         response = client.post("/api/chat", json={
             "question": "¿Qué productos tienen?",
@@ -78,6 +96,8 @@ class TestChatEndpoint:
 
         assert response.status_code == 200
         assert response.json()["response"] == "Respuesta de prueba."
+        mock_registry.get.assert_called_once_with("gemini")
+        mock_chat_svc.achat.assert_awaited_once_with("¿Qué productos tienen?", mock_model)
 
     def test_ollama_deshabilitado(self, client, mock_app_dependencies):
         """Debe retornar 400 si se pide ollama y está deshabilitado."""
@@ -106,12 +126,56 @@ class TestChatEndpoint:
         assert response.status_code == 400
 
 
+class TestChatStreamEndpoint:
+    """Tests para el endpoint POST /api/chat/stream."""
+
+    @patch("app.main.chat_service_registry")
+    @patch("app.main.get_chat_model")
+    def test_stream_emite_eventos_sse(self, mock_get_model, mock_registry, client):
+        """Debe transmitir los eventos del servicio como server-sent events."""
+        mock_get_model.return_value = MagicMock()
+
+        async def fake_stream(question, chat_model):
+            yield "retrieval", {"documents": 1, "retrieval_ms": 1.0}
+            yield "token", {"text": "Hola"}
+            yield "end", {"chunks": 1}
+
+        mock_chat_svc = MagicMock()
+        mock_chat_svc.astream_chat = fake_stream
+        mock_registry.get.return_value = mock_chat_svc
+
+        response = client.post("/api/chat/stream", json={
+            "question": "Hola",
+            "model_provider": "gemini",
+            "api_key": "fake-key"
+        })
+
+        assert response.status_code == 200
+        assert "text/event-stream" in response.headers["content-type"]
+        body = response.text
+        assert body.index("event: retrieval") < body.index("event: token") < body.index("event: end")
+        assert '"text": "Hola"' in body
+
+    @patch("app.main.get_chat_model")
+    def test_stream_modelo_invalido(self, mock_get_model, client):
+        """Debe retornar 400 antes de abrir el stream si el modelo no se inicia."""
+        mock_get_model.return_value = None
+
+        response = client.post("/api/chat/stream", json={
+            "question": "Hola",
+            "model_provider": "gemini",
+            "api_key": ""
+        })
+
+        assert response.status_code == 400
+
+
 class TestRagChain:
     """Tests para la función rag_chain."""
 
-    @patch("app.main.ChatService")
+    @patch("app.main.chat_service_registry")
     @patch("app.main.get_chat_model")
-    def test_rag_chain_con_dict(self, mock_get_model, mock_chat_svc_class, client, mock_app_dependencies):
+    def test_rag_chain_con_dict(self, mock_get_model, mock_registry, client, mock_app_dependencies):
         """rag_chain debe funcionar con input de tipo dict."""
         import app.main as main_module
         main_module.vector_store = mock_app_dependencies["vector_store"]
@@ -121,7 +185,7 @@ class TestRagChain:
 
         mock_svc = MagicMock()
         mock_svc.chat.return_value = "Respuesta RAG"
-        mock_chat_svc_class.return_value = mock_svc
+        mock_registry.get.return_value = mock_svc
 
         from app.main import rag_chain
         result = rag_chain({
@@ -131,6 +195,7 @@ class TestRagChain:
         })
 
         assert result.response == "Respuesta RAG"
+        mock_svc.chat.assert_called_once_with("¿Horarios?", mock_model)
 
     def test_rag_chain_sin_pregunta(self, client, mock_app_dependencies):
         """rag_chain debe lanzar ValueError si no hay pregunta."""
@@ -149,3 +214,29 @@ class TestRagChain:
         from app.main import rag_chain
         with pytest.raises(RuntimeError, match="Vector store no está disponible"):
             rag_chain({"question": "Hola", "model_provider": "gemini", "api_key": ""})
+
+
+class TestImportTime:
+    """Presupuesto de importación de app.main (arranque de cada worker)."""
+
+    def test_importar_app_no_carga_modulos_pesados(self):
+        """Importar la API no debe cargar proveedores, loaders ni el modelo local."""
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            cwd=ROOT,
+            env={**os.environ, "LANGSERVE_ENABLED": "false"},
+            capture_output=True,
+            text=True,
+            timeout=120
+        )
+        assert result.returncode == 0, result.stderr[-2000:]
+
+        # formato: "import time: self [us] | cumulative | imported package"
+        times = {
+            match.group(2).strip(): int(match.group(1))
+            for match in re.finditer(r"^import time:\s+\d+ \|\s+(\d+) \|(.*)$", result.stderr, re.MULTILINE)
+        }
+        loaded = {module.split(".")[0] for module in times}
+
+        assert loaded & HEAVY_MODULES == set()
+        assert times["app.main"] / 1e6 < IMPORT_BUDGET_SECONDS